@@ -1,8 +1,3 @@
-import numpy as np
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from collections import defaultdict
-import pandas as pd
 import streamlit as st
 
 st.set_page_config(layout="wide")
@@ -0,0 +1,70 @@
+"""
+Benchmark scenario_grid against evaluating the scalar formulas in a Python loop.
+
+The grid is every weight between 60 and 150 kg (in --weight-step kg) x every
+activity level x every deficit/surplus between -1000 and +1000 kcal (in
+--adjustment-step kcal), for each BMR formula.
+
+Usage:
+    python -m benchmarks.bench_calculators [--weight-step 0.1] [--adjustment-step 10]
+"""
+import argparse
+import itertools
+import time
+
+import numpy as np
+
+from utils.calculators import ACTIVITY_MULTIPLIERS, BMR_FORMULAS, scenario_grid
+
+PROFILE = dict(height=180.0, age=30, gender="Male", body_fat=20.0)
+
+
+def scalar_bmr(formula, weight, height, age, gender, body_fat):
+    # The Tools page formulas before they were vectorized
+    male = gender == "Male"
+    if formula == "Mifflin-St Jeor":
+        return 10 * weight + 6.25 * height - 5 * age + (5 if male else -161)
+    if formula == "Harris-Benedict":
+        if male:
+            return 66.47 + (13.75 * weight) + (5.003 * height) - (6.755 * age)
+        return 655.1 + (9.563 * weight) + (1.850 * height) - (4.676 * age)
+    return 370 + (21.6 * weight * (1 - body_fat / 100))
+
+
+def loop_grid(formula, weights, activities, adjustments):
+    targets = np.empty((len(weights), len(activities), len(adjustments)))
+    for (i, weight), (j, activity), (k, adjustment) in itertools.product(
+            enumerate(weights), enumerate(activities), enumerate(adjustments)):
+        targets[i, j, k] = scalar_bmr(formula, weight, **PROFILE) * activity + adjustment
+    return targets
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized calculator grid.')
+    parser.add_argument('--weight-step', type=float, default=0.1)
+    parser.add_argument('--adjustment-step', type=int, default=10)
+    args = parser.parse_args()
+
+    weights = np.arange(60, 150 + args.weight_step / 2, args.weight_step)
+    activities = list(ACTIVITY_MULTIPLIERS.values())
+    adjustments = np.arange(-1000, 1001, args.adjustment_step)
+    n_scenarios = len(weights) * len(activities) * len(adjustments)
+    print(f"{n_scenarios:,} scenarios per formula "
+          f"({len(weights)} weights x {len(activities)} activity levels x {len(adjustments)} adjustments)")
+    print(f"{'formula':>16} {'loop':>10} {'grid':>10} {'speedup':>9}  max |diff|")
+    for formula in BMR_FORMULAS:
+        loop_time, expected = timed(loop_grid, formula, weights.tolist(), activities, adjustments.tolist())
+        grid_time, (targets, _) = timed(scenario_grid, formula, weight=weights, activity=activities,
+                                        adjustment=adjustments, **PROFILE)
+        print(f"{formula:>16} {loop_time * 1e3:>8.1f}ms {grid_time * 1e3:>8.2f}ms {loop_time / grid_time:>8.0f}x"
+              f"  {np.abs(targets - expected).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
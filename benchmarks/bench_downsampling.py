@@ -0,0 +1,43 @@
+"""
+Payload size and build time of plot_weight_progression with and without downsampling.
+
+Usage:
+    python -m benchmarks.bench_downsampling [--sizes 1000 100000 1000000]
+"""
+import argparse
+import time
+
+from benchmarks.generators import make_weight_frame
+from utils.data_utils import compute_ewma, compute_time_moving_average, compute_trend, elapsed_days
+from utils.charts import plot_weight_progression
+from utils.downsampling import DEFAULT_MAX_POINTS
+
+
+def build_and_serialize(series, max_points):
+    start = time.perf_counter()
+    fig = plot_weight_progression(*series, max_points=max_points)
+    built = time.perf_counter()
+    payload = fig.to_json()
+    return built - start, time.perf_counter() - built, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark progression chart downsampling.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'mode':>12} {'build':>10} {'to_json':>10} {'payload':>12}")
+    for n_rows in args.sizes:
+        df = make_weight_frame(n_rows)
+        dates, weights = df['date'].values, df['weight'].values
+        series = (
+            dates, weights, *compute_time_moving_average(dates, weights, 7), compute_trend(dates, weights),
+            elapsed_days(dates), [('EWMA', *compute_ewma(dates, weights, 7))],
+        )
+        for label, max_points in (('full', None), ('downsampled', DEFAULT_MAX_POINTS)):
+            build, serialize, size = build_and_serialize(series, max_points)
+            print(f"{n_rows:>10,} {label:>12} {build * 1e3:>8.1f}ms {serialize * 1e3:>8.1f}ms {size / 1e6:>10.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Time FitNotes ingestion, the all-exercise session summary and date-range
+queries through FitNotesIndex against boolean-mask filtering of the sets.
+
+Usage:
+    python -m benchmarks.bench_fitnotes [--sizes 10000 100000 1000000]
+"""
+import argparse
+import pathlib
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.generators import make_fitnotes_frame
+from utils.fitnotes import FitNotesIndex, exercise_summary, load_fitnotes, summarize_sessions
+from utils.storage import write_fitnotes_csv
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def mask_query(sets, exercise, start, end):
+    rows = sets[(sets['Exercise'] == exercise) & (sets['Date'] >= start) & (sets['Date'] <= end)]
+    return summarize_sessions(rows)
+
+
+def random_queries(summary, n_queries, seed=0):
+    rng = np.random.default_rng(seed)
+    exercises = summary.index.get_level_values('Exercise').unique()
+    dates = summary.index.get_level_values('Date')
+    days = (dates.max() - dates.min()).days
+    queries = []
+    for _ in range(n_queries):
+        lo, hi = np.sort(rng.integers(0, days + 1, size=2))
+        queries.append((exercises[rng.integers(len(exercises))],
+                        dates.min() + np.timedelta64(int(lo), 'D'), dates.min() + np.timedelta64(int(hi), 'D')))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the FitNotes summary.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--queries', type=int, default=50, help='random date-range queries per size')
+    args = parser.parse_args()
+
+    query_rows = []
+
+    print(f"{'sets':>10} {'ingest':>10} {'summary':>10} {'per-exercise filter':>20}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "fitnotes.csv"
+        for n_sets in args.sizes:
+            write_fitnotes_csv(make_fitnotes_frame(n_sets), path)
+            ingest, sets = timed(load_fitnotes, path)
+            summarize, summary = timed(summarize_sessions, sets)
+            exercises = summary.index.get_level_values('Exercise').unique()
+            filter_time, _ = timed(lambda: [exercise_summary(summary, exercise) for exercise in exercises])
+            print(f"{n_sets:>10,} {ingest * 1e3:>8.1f}ms {summarize * 1e3:>8.1f}ms {filter_time * 1e3:>18.1f}ms")
+
+            build, index = timed(FitNotesIndex, summary)
+            queries = random_queries(summary, args.queries)
+            mask_time, _ = timed(lambda: [mask_query(sets, *query) for query in queries])
+            index_time, _ = timed(lambda: [(index.sessions(*query), index.totals(*query)) for query in queries])
+            query_rows.append((n_sets, build, mask_time / len(queries), index_time / len(queries)))
+
+    print(f"\n{'sets':>10} {'index build':>12} {'mask query':>12} {'index query':>12} {'speedup':>8}")
+    for n_sets, build, mask_time, index_time in query_rows:
+        print(f"{n_sets:>10,} {build * 1e3:>10.2f}ms {mask_time * 1e3:>10.3f}ms {index_time * 1e3:>10.3f}ms "
+              f"{mask_time / index_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Time the Monte Carlo goal forecast against the 100 ms budget of the Analysis page.
+
+Two targets are timed: one most paths reach within a few months, and one
+out of reach, where no path stops early and the full horizon is simulated.
+
+Usage:
+    python -m benchmarks.bench_forecast [--paths 10000 50000 200000] [--weeks 104] [--repeat 7]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils.forecast import DEFAULT_HORIZON_WEEKS, forecast_goal
+
+BUDGET_SECONDS = 0.1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the goal-date forecast.')
+    parser.add_argument('--paths', type=int, nargs='+', default=[10_000, 50_000, 200_000])
+    parser.add_argument('--weeks', type=int, default=DEFAULT_HORIZON_WEEKS, help='simulated horizon')
+    parser.add_argument('--history', type=int, default=104, help='observed weekly changes to resample')
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    weekly_diffs = [None] + list(rng.normal(-0.4, 0.7, args.history))
+    print(f"{'target':>8} {'paths':>10} {'best':>10} {'median':>10}  P10/P50/P90 weeks")
+    for target in (90.0, 150.0):
+        for n_paths in args.paths:
+            forecast_goal(100.0, target, weekly_diffs, n_paths, args.weeks)  # warm-up
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                forecast = forecast_goal(100.0, target, weekly_diffs, n_paths, args.weeks)
+                timings.append(time.perf_counter() - start)
+            median = np.median(timings)
+            goal = '/'.join(f"{weeks:.1f}" for weeks in forecast.goal_weeks.values())
+            flag = '' if median < BUDGET_SECONDS else '  over budget'
+            print(f"{target:>8.0f} {n_paths:>10,} {min(timings) * 1e3:>8.1f}ms {median * 1e3:>8.1f}ms  {goal}{flag}")
+
+
+if __name__ == "__main__":
+    main()
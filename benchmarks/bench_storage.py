@@ -0,0 +1,61 @@
+"""
+Compare CSV and Parquet storage for weight and FitNotes data.
+
+Reports load time, file size and the memory held by the loaded DataFrame.
+
+Usage:
+    python -m benchmarks.bench_storage [--sizes 10000 1000000]
+"""
+import argparse
+import pathlib
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generators import make_fitnotes_frame, make_weight_frame
+from utils.storage import (BASE_FORMATS, read_fitnotes_csv, read_fitnotes_parquet, write_fitnotes_csv,
+                           write_fitnotes_parquet)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def report(label, path, load):
+    seconds, df = timed(load, path)
+    memory = df.memory_usage(deep=True).sum()
+    print(f"  {label:<8} load {seconds * 1e3:>9.1f}ms  file {path.stat().st_size / 1e6:>8.2f}MB  "
+          f"frame {memory / 1e6:>8.2f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CSV against Parquet storage.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = pathlib.Path(tmp)
+        for n_rows in args.sizes:
+            weights = make_weight_frame(n_rows)
+            weights['day_of_week'] = weights['date'].dt.day_name()
+            weights['month'] = weights['date'].dt.month_name()
+            print(f"weight data, {n_rows:,} rows")
+            for backend, base_format in BASE_FORMATS.items():
+                path = tmp / f"weights{base_format.suffix}"
+                base_format.write(weights, path)
+                report(backend, path, base_format.read)
+
+            fitnotes = make_fitnotes_frame(n_rows)
+            print(f"FitNotes export, {n_rows:,} sets")
+            write_fitnotes_csv(fitnotes, tmp / "fitnotes.csv")
+            report('csv', tmp / "fitnotes.csv", read_fitnotes_csv)
+            report('csv-raw', tmp / "fitnotes.csv", pd.read_csv)
+            write_fitnotes_parquet(fitnotes, tmp / "fitnotes.parquet")
+            report('parquet', tmp / "fitnotes.parquet", read_fitnotes_parquet)
+
+
+if __name__ == "__main__":
+    main()
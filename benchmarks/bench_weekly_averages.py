@@ -0,0 +1,63 @@
+"""
+Benchmark compute_weekly_averages against the previous per-row implementation.
+
+Usage:
+    python -m benchmarks.bench_weekly_averages [--sizes 1000 100000 10000000] [--legacy-limit 100000]
+"""
+import argparse
+import time
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.generators import make_weight_frame
+from utils.data_utils import compute_weekly_averages
+
+
+def legacy_compute_weekly_averages(df):
+    dates = df['date'].values
+    weights = df['weight'].values
+    weeks = defaultdict(list)
+    for date, weight in zip(dates, weights):
+        py_date = pd.Timestamp(date).to_pydatetime()
+        year, week, weekday = py_date.isocalendar()
+        weeks[(year, week)].append(weight)
+    sorted_weeks = sorted(weeks.items())
+    weekly_means = [np.mean(week_weights) for _, week_weights in sorted_weeks]
+    week_labels = [f"{year}-W{week}" for (year, week), _ in sorted_weeks]
+    weekly_diffs = [None] + [weekly_means[i] - weekly_means[i-1] for i in range(1, len(weekly_means))]
+    return week_labels, weekly_means, weekly_diffs
+
+
+def best_of(func, *args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark weekly averaging.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 10_000_000])
+    parser.add_argument('--legacy-limit', type=int, default=100_000,
+                        help='Largest size the per-row implementation is timed at')
+    args = parser.parse_args()
+
+    print(f"{'rows':>12} {'vectorized':>12} {'legacy':>12} {'speedup':>9}  identical")
+    for n_rows in args.sizes:
+        df = make_weight_frame(n_rows)
+        fast_time, fast_result = best_of(compute_weekly_averages, df)
+        if n_rows <= args.legacy_limit:
+            legacy_time, legacy_result = best_of(legacy_compute_weekly_averages, df, repeat=1)
+            identical = fast_result == legacy_result
+            print(f"{n_rows:>12,} {fast_time * 1e3:>10.1f}ms {legacy_time * 1e3:>10.1f}ms "
+                  f"{legacy_time / fast_time:>8.0f}x  {identical}")
+        else:
+            print(f"{n_rows:>12,} {fast_time * 1e3:>10.1f}ms {'skipped':>12} {'-':>9}  -")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Seeded synthetic data shared by the benchmarks.
+
+Every generator is deterministic for a given seed, so timings from different
+runs are measured on identical data.
+"""
+import numpy as np
+import pandas as pd
+
+from utils.storage import FITNOTES_COLUMNS, FITNOTES_DTYPES
+
+# Beyond this many days, larger series get several weigh-ins per day instead of a longer span
+MAX_SPAN_DAYS = 20 * 365
+
+FITNOTES_EXERCISES = {
+    'Chest': ['Flat Barbell Bench Press', 'Incline Barbell Bench Press', 'Seated Machine Fly', 'Cable Crossover'],
+    'Back': ['Pull Up', 'Seated Cable Row', 'Barbell Row', 'Lat Pulldown', 'Barbell Shrug'],
+    'Shoulders': ['Standing Barbell Shoulder Press', 'Lateral Dumbbell Raise', 'Rear Delt Machine Fly',
+                  'Cable Face Pull'],
+    'Biceps': ['EZ-Bar Curl', 'Dumbbell Hammer Curl', 'Preacher Curl'],
+    'Triceps': ['Rope Push Down', 'Cable Overhead Triceps Extension', 'Single Arm Tricep Rope'],
+    'Legs': ['Barbell Squat', 'Leg Press', 'Leg Extension Machine', 'Lying Leg Curl Machine', 'Barbell Calf Raise'],
+}
+# Training days cycle through these splits
+FITNOTES_SPLITS = (('Chest', 'Triceps'), ('Back', 'Biceps'), ('Legs', 'Shoulders'))
+
+
+def _gap_mask(n_days, gap_fraction, rng):
+    """Boolean mask of days without weigh-ins: runs of 1-14 days covering about gap_fraction of the span."""
+    missing = np.zeros(n_days, dtype=bool)
+    n_gaps = int(n_days * gap_fraction / 7.5)
+    if n_gaps == 0:
+        return missing
+    starts = rng.integers(0, n_days, n_gaps)
+    lengths = rng.integers(1, 15, n_gaps)
+    # Mark each run with +1 at its start and -1 after its end, then a running sum
+    delta = np.zeros(n_days + 1, dtype=np.int64)
+    np.add.at(delta, starts, 1)
+    np.add.at(delta, np.minimum(starts + lengths, n_days), -1)
+    missing[:] = np.cumsum(delta[:-1]) > 0
+    return missing
+
+
+def make_weight_frame(n_rows, seed=0, start='2005-01-01', trend_kg=-10.0, seasonal_kg=1.0, weekend_kg=0.3,
+                      noise_kg=0.5, gap_fraction=0.1, duplicate_fraction=0.03):
+    """
+    Realistic weigh-ins: a slowing weight-loss trend, yearly and weekend swings, gaps and re-weighs.
+
+    Weigh-ins are daily, mostly in the morning, over up to MAX_SPAN_DAYS;
+    larger series get several weigh-ins per day. Runs of missing days
+    (holidays, illness) cover about gap_fraction of the span, and
+    duplicate_fraction of the rows are re-weighs a few minutes after another
+    weigh-in on the same day.
+
+    Returns:
+        pd.DataFrame: 'date' (datetime64[ns], sorted) and 'weight' (kg, one decimal).
+    """
+    rng = np.random.default_rng(seed)
+    n_duplicates = int(n_rows * duplicate_fraction)
+    n_primary = n_rows - n_duplicates
+    span_days = max(1, min(int(np.ceil(n_primary / (1 - gap_fraction))), MAX_SPAN_DAYS))
+    days = np.flatnonzero(~_gap_mask(span_days, gap_fraction, rng))
+    # Overlapping gaps can leave too few days; widen the span until every weigh-in gets its own day
+    while len(days) < n_primary and span_days < MAX_SPAN_DAYS:
+        span_days = min(int(span_days * 1.1) + 1, MAX_SPAN_DAYS)
+        days = np.flatnonzero(~_gap_mask(span_days, gap_fraction, rng))
+    if len(days) == 0:
+        days = np.arange(span_days)
+    picked = np.sort(rng.choice(days, n_primary, replace=n_primary > len(days)))
+    seconds = np.clip(rng.normal(7.5 * 3600, 3600, n_primary), 0, 86399).astype(np.int64)
+    offsets = picked * 86400 + seconds
+
+    if n_duplicates:
+        originals = rng.integers(0, n_primary, n_duplicates)
+        reweighs = np.minimum(offsets[originals] + rng.integers(60, 600, n_duplicates), (picked[originals] + 1) * 86400 - 1)
+        offsets = np.concatenate((offsets, reweighs))
+    offsets.sort()
+
+    dates = np.datetime64(start, 's') + offsets.astype('timedelta64[s]')
+    # Loss slows down over time, like most diets; trend_kg is reached after the span or a year at the earliest
+    elapsed = offsets / 86400 / max(span_days, 365)
+    trend = trend_kg * (1 - np.exp(-3 * elapsed)) / (1 - np.exp(-3))
+    day_of_year = (dates.astype('datetime64[D]') - dates.astype('datetime64[Y]')).astype(np.int64)
+    seasonal = seasonal_kg * np.cos(2 * np.pi * (day_of_year - 15) / 365.25)
+    weekday = (dates.astype('datetime64[D]').view(np.int64) + 3) % 7
+    weekend = np.where((weekday == 6) | (weekday == 0), weekend_kg, 0.0)
+    weights = 90 + trend + seasonal + weekend + rng.normal(0, noise_kg, len(offsets))
+    return pd.DataFrame({'date': dates.astype('datetime64[ns]'), 'weight': weights.round(1)})
+
+
+def make_scale_export(n_rows, seed=0, missing_fraction=0.02):
+    """
+    A scale export as read by convert_xls_to_cvs: 'date' as dd.mm.yyyy and 'Raw' with a decimal comma.
+
+    About missing_fraction of the rows have an empty Raw value.
+
+    Returns:
+        pd.DataFrame: String 'date' and 'Raw' columns; write it with to_csv(index=False).
+    """
+    rng = np.random.default_rng(seed)
+    df = make_weight_frame(n_rows, seed)
+    raw = df['weight'].map('{:.1f}'.format).str.replace('.', ',', regex=False)
+    raw[rng.random(n_rows) < missing_fraction] = ''
+    return pd.DataFrame({'date': df['date'].dt.strftime('%d.%m.%Y'), 'Raw': raw})
+
+
+def make_fitnotes_frame(n_rows, seed=0, start='2015-01-01', sets_per_session=20, sets_per_exercise=4):
+    """
+    A FitNotes export of n_rows sets with progressive overload.
+
+    Training days cycle through FITNOTES_SPLITS with one or two rest days in
+    between; each session does sets_per_exercise sets of consecutive
+    exercises of its split. Weights grow slowly per session and reps drop
+    over the sets of an exercise.
+
+    Returns:
+        pd.DataFrame: FITNOTES_COLUMNS with the FITNOTES_DTYPES of read_fitnotes_csv.
+    """
+    rng = np.random.default_rng(seed)
+    session = np.arange(n_rows) // sets_per_session
+    n_sessions = int(session[-1]) + 1 if n_rows else 0
+    session_days = np.cumsum(rng.integers(1, 3, n_sessions)) - 1
+
+    split_exercises = [[(category, name) for category in split for name in FITNOTES_EXERCISES[category]]
+                       for split in FITNOTES_SPLITS]
+    set_in_session = np.arange(n_rows) % sets_per_session
+    split = session % len(FITNOTES_SPLITS)
+    # Each session starts at a different exercise of its split
+    rotation = session // len(FITNOTES_SPLITS)
+    slot = set_in_session // sets_per_exercise + rotation
+    categories, exercises = np.empty(n_rows, dtype=object), np.empty(n_rows, dtype=object)
+    base_weight = np.empty(n_rows)
+    for i, entries in enumerate(split_exercises):
+        rows = split == i
+        picked = slot[rows] % len(entries)
+        categories[rows] = np.array([category for category, _ in entries], dtype=object)[picked]
+        exercises[rows] = np.array([name for _, name in entries], dtype=object)[picked]
+        base_weight[rows] = (20 + (7.5 * np.arange(len(entries))) % 80)[picked]
+
+    overload = 1 + 0.004 * rotation
+    weights = np.round(base_weight * overload / 2.5) * 2.5
+    reps = np.clip(12 - (set_in_session % sets_per_exercise) - rng.integers(0, 3, n_rows), 3, None)
+    df = pd.DataFrame({
+        'Date': np.datetime64(start, 'D') + session_days[session].astype('timedelta64[D]'),
+        'Exercise': exercises,
+        'Category': categories,
+        'Weight': weights,
+        'Weight Unit': 'kgs',
+        'Reps': reps,
+        'Distance': np.nan,
+        'Distance Unit': np.nan,
+        'Time': pd.NA,
+    })
+    df['Date'] = df['Date'].astype('datetime64[ns]')
+    return df[FITNOTES_COLUMNS].astype(FITNOTES_DTYPES)
@@ -0,0 +1,116 @@
+"""
+Import-time regression check for the Streamlit entry points.
+
+Each page's top-level imports run in a fresh interpreter under
+`python -X importtime`, after `import streamlit` (which every page pays
+regardless and which Streamlit has loaded before any page runs). The time
+of everything imported after streamlit is the page's own cold-start cost;
+it is compared against IMPORT_BUDGETS_MS and the heaviest third-party
+packages it pulls in are listed.
+
+Usage:
+    python -m benchmarks.import_budget [--repeat 3] [--pages Home.py pages/2_Analysis.py]
+
+Exits with status 1 if a page is over its budget.
+"""
+import argparse
+import ast
+import pathlib
+import re
+import subprocess
+import sys
+
+ROOT = pathlib.Path(__file__).parent.parent.resolve()
+ENTRY_POINTS = ['Home.py', *sorted(str(path.relative_to(ROOT)) for path in (ROOT / 'pages').glob('*.py'))]
+# Milliseconds of imports on top of streamlit. The data pages need pandas and
+# numpy (~0.5-0.6 s); SQLAlchemy or plotly.express coming back at import time
+# adds 0.3-0.4 s and trips the budget.
+IMPORT_BUDGETS_MS = {
+    'Home.py': 20,
+    'pages/1_Data_Editor.py': 900,
+    'pages/2_Analysis.py': 900,
+    'pages/3_Tools.py': 900,
+    'pages/4_Fit_Notes.py': 900,
+}
+# Third-party packages reported when they take at least this long
+HEAVY_PACKAGE_MS = 20
+_LOCAL_PACKAGES = {'utils', 'components', 'benchmarks'}
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def top_level_imports(path):
+    """
+    Source of the module-level import statements of a script.
+    """
+    tree = ast.parse(pathlib.Path(path).read_text(encoding='utf-8'))
+    return '\n'.join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def parse_importtime(stderr):
+    """
+    Parse -X importtime output.
+
+    Returns:
+        list: (module, depth, self_us, cumulative_us) in completion order.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, len(indent) // 2, int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure(path):
+    """
+    Import cost of one entry point on top of streamlit.
+
+    Returns:
+        tuple: (total ms, {third-party package: ms} for the heavy packages it loads)
+    """
+    code = 'import streamlit\n' + top_level_imports(ROOT / path)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    entries = parse_importtime(result.stderr)
+    # Everything streamlit imports is logged before its own top-level line
+    start = next(i for i, (module, depth, _, _) in enumerate(entries) if module == 'streamlit' and depth == 0) + 1
+    page_entries = entries[start:]
+    total_us = sum(cumulative for _, depth, _, cumulative in page_entries if depth == 0)
+    # A package's cost is the sum over its outermost imports, i.e. those not imported by the package itself
+    packages = {}
+    parents = {}
+    for module, depth, _, cumulative in reversed(page_entries):
+        # Walking backwards, a module's parent is the last module seen one level up
+        parents[depth] = module
+        package = module.split('.')[0]
+        parent = parents.get(depth - 1) if depth > 0 else None
+        third_party = package not in _LOCAL_PACKAGES and package not in sys.stdlib_module_names
+        if third_party and (parent is None or parent.split('.')[0] != package):
+            packages[package] = packages.get(package, 0) + cumulative
+    heavy = {package: us / 1e3 for package, us in packages.items() if us / 1e3 >= HEAVY_PACKAGE_MS}
+    return total_us / 1e3, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check page import times against their budgets.')
+    parser.add_argument('--pages', nargs='+', default=ENTRY_POINTS)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per page; the fastest one counts')
+    args = parser.parse_args()
+
+    over_budget = []
+    print(f"{'entry point':<26} {'imports':>10} {'budget':>8}  heavy packages")
+    for page in args.pages:
+        total_ms, heavy = min((measure(page) for _ in range(args.repeat)), key=lambda result: result[0])
+        budget = IMPORT_BUDGETS_MS.get(page)
+        status = '' if budget is None or total_ms <= budget else '  OVER BUDGET'
+        if status:
+            over_budget.append(page)
+        packages = ', '.join(f"{package} {ms:.0f}ms" for package, ms in sorted(heavy.items(), key=lambda item: -item[1]))
+        budget_text = f"{budget}ms" if budget is not None else '-'
+        print(f"{page:<26} {total_ms:>8.1f}ms {budget_text:>8}  {packages or '-'}{status}")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Load test of the SQLite workspace store: concurrent sessions adding entries.
+
+Each simulated session loads its user's history, then adds one weigh-in
+per day as an upsert (delete the day + insert) with a short think time,
+reloading its data every few writes like the Analysis page does.
+
+Usage:
+    python -m benchmarks.load_workspace [--sessions 100] [--writes 50] [--history 365]
+"""
+import argparse
+import pathlib
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.workspace import WorkspaceStore
+
+
+def run_session(store, user, n_writes, think_time, barrier, write_latencies, read_latencies, errors, seed):
+    rng = np.random.default_rng(seed)
+    barrier.wait()
+    try:
+        start = time.perf_counter()
+        store.load(user)
+        read_latencies.append(time.perf_counter() - start)
+        for i in range(n_writes):
+            day = pd.Timestamp('2025-01-01') + pd.Timedelta(days=i)
+            rows = pd.DataFrame({'date': [day], 'weight': [80 + rng.normal()]})
+            start = time.perf_counter()
+            store.commit(user, rows, [day])
+            write_latencies.append(time.perf_counter() - start)
+            if i % 10 == 9:
+                start = time.perf_counter()
+                store.load(user)
+                read_latencies.append(time.perf_counter() - start)
+            time.sleep(rng.uniform(0, 2 * think_time))
+    except Exception as e:
+        errors.append(e)
+
+
+def percentiles(latencies):
+    values = np.asarray(latencies) * 1e3
+    return np.percentile(values, 50), np.percentile(values, 99), values.max()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the SQLite workspace store.')
+    parser.add_argument('--sessions', type=int, default=100)
+    parser.add_argument('--writes', type=int, default=50, help='entries added per session')
+    parser.add_argument('--history', type=int, default=365, help='existing rows per user')
+    parser.add_argument('--think-time', type=float, default=0.01, help='mean seconds between writes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = WorkspaceStore(pathlib.Path(tmp) / "workspace.sqlite")
+        history = pd.DataFrame({'date': pd.date_range('2024-01-01', periods=args.history),
+                                'weight': np.linspace(90, 80, args.history)})
+        users = [f"user{i:03d}" for i in range(args.sessions)]
+        for user in users:
+            store.write(user, history)
+
+        write_latencies, read_latencies, errors = [], [], []
+        barrier = threading.Barrier(args.sessions)
+        threads = [
+            threading.Thread(target=run_session, args=(store, user, args.writes, args.think_time, barrier,
+                                                       write_latencies, read_latencies, errors, seed))
+            for seed, user in enumerate(users)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        consistent = all(store.count(user) == len(history) + args.writes for user in users)
+
+    print(f"{args.sessions} sessions x {args.writes} writes in {elapsed:.2f}s "
+          f"({len(write_latencies) / elapsed:,.0f} writes/s), errors: {len(errors)}, row counts consistent: {consistent}")
+    for label, latencies in (('write', write_latencies), ('read', read_latencies)):
+        p50, p99, worst = percentiles(latencies)
+        print(f"{label:>6} latency  p50 {p50:7.2f}ms  p99 {p99:7.2f}ms  max {worst:7.2f}ms  (n={len(latencies)})")
+    if errors:
+        raise SystemExit(f"First error: {errors[0]!r}")
+
+
+if __name__ == "__main__":
+    main()
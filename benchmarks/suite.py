@@ -0,0 +1,371 @@
+"""
+Scaling benchmark of the public data functions, chart builders and loaders.
+
+Every case runs at each --sizes on seeded synthetic data from
+benchmarks.generators: the fastest of --repeat timed calls is reported,
+and one more call under tracemalloc gives the peak memory it allocates.
+Inputs a case only consumes (moving averages for a chart, a session
+summary for its index, files for the loaders) are prepared outside the
+timed call.
+
+Results are written as JSON; pass an earlier file to --compare to list
+the cases that got slower or hungrier than --threshold times the baseline.
+
+Usage:
+    python -m benchmarks.suite [--sizes 1000 100000] [--cases 'charts.*' 'data_utils.*'] [--repeat 5]
+                               [--output results.json] [--compare benchmarks/results/baseline.json]
+
+Exits with status 1 if --compare finds a regression.
+"""
+import argparse
+import contextlib
+import datetime
+import fnmatch
+import functools
+import io
+import json
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+import convert_xls_to_cvs
+from benchmarks.generators import make_fitnotes_frame, make_scale_export, make_weight_frame
+from utils.analysis import compute_analysis
+from utils.calculators import ACTIVITY_MULTIPLIERS, CALORIE_ADJUSTMENTS, scenario_grid
+from utils.charts import (WEEKLY_TABLE_PAGE_SIZE, plot_calorie_heatmap, plot_day_of_week_bar, plot_goal_fan_chart,
+                          plot_month_bar, plot_seasonality_bar, plot_weekly_average_weight, plot_weekly_table,
+                          plot_weight_progression)
+from utils.compact import CompactWeights
+from utils.data_utils import (aggregate_periods, compute_ewma, compute_moving_average, compute_moving_average_dates,
+                              compute_time_moving_average, compute_trend, compute_weekly_averages, elapsed_days)
+from utils.downsampling import DEFAULT_MAX_POINTS, downsample
+from utils.figure_cache import FigureCache, use_figure_cache
+from utils.file_utils import read_weight_rows
+from utils.fitnotes import FitNotesIndex, exercise_summary, load_fitnotes, summarize_sessions
+from utils.forecast import forecast_goal
+from utils.gym_charts import plot_exercise_progress
+from utils.incremental import IncrementalWeightStats
+from utils.seasonality import compute_seasonality
+from utils.storage import BASE_FORMATS, read_fitnotes_csv, write_fitnotes_csv
+from utils.tdee import AdaptiveTdee
+
+RESULTS_DIR = pathlib.Path(__file__).parent / "results"
+DEFAULT_SIZES = (1_000, 100_000)
+# A case regresses when it is this many times slower (or allocates this much more) than the baseline ...
+DEFAULT_THRESHOLD = 1.25
+# ... and by more than these absolute amounts, so timer noise on sub-millisecond cases is ignored
+MIN_REGRESSION_SECONDS = 1e-3
+MIN_REGRESSION_BYTES = 1 << 20
+SEED = 0
+PROFILE = dict(height=180.0, age=30, gender="Male", body_fat=20.0)
+
+
+class Case(NamedTuple):
+    name: str
+    dataset: str
+    # Builds the timed call from the dataset, outside the measurement
+    prepare: Callable
+
+
+# --- datasets, built once per size for the selected cases ---
+
+def _weight_csv(n_rows, tmp):
+    path = tmp / f"weights-{n_rows}.csv"
+    BASE_FORMATS['csv'].write(make_weight_frame(n_rows, SEED), path)
+    return path
+
+
+def _fitnotes_csv(n_rows, tmp):
+    path = tmp / f"fitnotes-{n_rows}.csv"
+    write_fitnotes_csv(make_fitnotes_frame(n_rows, SEED), path)
+    return path
+
+
+def _scale_csv(n_rows, tmp):
+    path = tmp / f"scale-{n_rows}.csv"
+    make_scale_export(n_rows, SEED).to_csv(path, index=False)
+    return path
+
+
+DATASETS = {
+    'weights': lambda n_rows, tmp: make_weight_frame(n_rows, SEED),
+    'fitnotes': lambda n_rows, tmp: make_fitnotes_frame(n_rows, SEED),
+    'weight_csv': _weight_csv,
+    'fitnotes_csv': _fitnotes_csv,
+    'scale_csv': _scale_csv,
+}
+
+
+# --- case inputs ---
+
+def _series(df):
+    return df['date'].values, df['weight'].values
+
+
+def _progression_inputs(df):
+    dates, weights = _series(df)
+    return (dates, weights, *compute_time_moving_average(dates, weights, 7), compute_trend(dates, weights),
+            elapsed_days(dates), [('30-day Moving Average', *compute_time_moving_average(dates, weights, 30)),
+                                  ('EWMA', *compute_ewma(dates, weights, 7))])
+
+
+def _weekly_diffs(df):
+    return np.array(compute_weekly_averages(df)[2][1:], dtype=np.float64)
+
+
+def _forecast(df):
+    weights = df['weight'].values
+    return functools.partial(forecast_goal, weights[-1], weights[-1] - 10, _weekly_diffs(df))
+
+
+def _fan_chart(df):
+    weights = df['weight'].values
+    result = forecast_goal(weights[-1], weights[-1] - 10, _weekly_diffs(df))
+    return functools.partial(plot_goal_fan_chart, df['date'].iloc[-1], result.fan_weeks, result.fan,
+                             weights[-1] - 10, result.goal_weeks)
+
+
+def _grid_weights(n_rows):
+    # One scenario per row: weight steps x activity levels x adjustments
+    n_weights = max(2, n_rows // (len(ACTIVITY_MULTIPLIERS) * len(CALORIE_ADJUSTMENTS)))
+    return np.linspace(60, 150, n_weights)
+
+
+def _scenario_grid(df):
+    return functools.partial(scenario_grid, weight=_grid_weights(len(df)),
+                             activity=list(ACTIVITY_MULTIPLIERS.values()), adjustment=CALORIE_ADJUSTMENTS, **PROFILE)
+
+
+def _calorie_heatmap(df):
+    weights = _grid_weights(len(df))
+    targets, _ = scenario_grid(weight=weights, activity=list(ACTIVITY_MULTIPLIERS.values()), **PROFILE)
+    return functools.partial(plot_calorie_heatmap, targets, list(ACTIVITY_MULTIPLIERS), weights,
+                             'Activity Level', 'Calorie Targets')
+
+
+def _figure_cache_load(df):
+    directory = tempfile.TemporaryDirectory()
+    cache = FigureCache(directory.name)
+    key = cache.key('progression', {}, 'benchmark')
+    cache.store(key, plot_weight_progression(*_progression_inputs(df), max_points=DEFAULT_MAX_POINTS))
+
+    def load():
+        # Referencing directory keeps it alive as long as the call
+        return directory and cache.load(key)
+    return load
+
+
+def _first_exercise(sets):
+    return str(sets['Exercise'].iloc[0])
+
+
+def _exercise_progress(sets):
+    summary = summarize_sessions(sets)
+    exercise = _first_exercise(sets)
+    return functools.partial(plot_exercise_progress, exercise_summary(summary, exercise), exercise)
+
+
+def _process_csv(path):
+    output = path.with_name(path.stem + '-converted.csv')
+
+    def run():
+        # process_csv reports errors on stdout instead of raising
+        with contextlib.redirect_stdout(io.StringIO()) as stdout:
+            convert_xls_to_cvs.process_csv(str(path), str(output))
+        if not stdout.getvalue().startswith('Successfully'):
+            raise RuntimeError(stdout.getvalue().strip())
+    return run
+
+
+CASES = [
+    Case('data_utils.compute_weekly_averages', 'weights', lambda df: functools.partial(compute_weekly_averages, df)),
+    Case('data_utils.aggregate_periods[M]', 'weights',
+         lambda df: functools.partial(aggregate_periods, *_series(df), 'M')),
+    Case('data_utils.compute_moving_average', 'weights',
+         lambda df: functools.partial(compute_moving_average, df['weight'].values, 7)),
+    Case('data_utils.compute_moving_average_dates', 'weights',
+         lambda df: functools.partial(compute_moving_average_dates, df['date'].values, 7)),
+    Case('data_utils.compute_time_moving_average', 'weights',
+         lambda df: functools.partial(compute_time_moving_average, *_series(df), 7)),
+    Case('data_utils.compute_ewma', 'weights', lambda df: functools.partial(compute_ewma, *_series(df), 7)),
+    Case('data_utils.compute_trend', 'weights', lambda df: functools.partial(compute_trend, *_series(df))),
+    Case('data_utils.elapsed_days', 'weights', lambda df: functools.partial(elapsed_days, df['date'].values)),
+    Case('seasonality.compute_seasonality', 'weights',
+         lambda df: functools.partial(compute_seasonality, *_series(df))),
+    Case('downsampling.downsample[lttb]', 'weights',
+         lambda df: functools.partial(downsample, *_series(df), DEFAULT_MAX_POINTS, 'lttb')),
+    Case('downsampling.downsample[minmax]', 'weights',
+         lambda df: functools.partial(downsample, *_series(df), DEFAULT_MAX_POINTS, 'minmax')),
+    Case('incremental.IncrementalWeightStats.from_series', 'weights',
+         lambda df: functools.partial(IncrementalWeightStats.from_series, *_series(df))),
+    Case('tdee.AdaptiveTdee.estimates', 'weights',
+         lambda df: functools.partial(AdaptiveTdee.from_series(*_series(df)).estimates, 2500)),
+    Case('compact.CompactWeights.from_frame', 'weights', lambda df: functools.partial(CompactWeights.from_frame, df)),
+    Case('forecast.forecast_goal', 'weights', _forecast),
+    Case('calculators.scenario_grid', 'weights', _scenario_grid),
+    Case('analysis.compute_analysis', 'weights', lambda df: functools.partial(compute_analysis, df)),
+    Case('charts.plot_weight_progression[full]', 'weights',
+         lambda df: functools.partial(plot_weight_progression, *_progression_inputs(df))),
+    Case('charts.plot_weight_progression[downsampled]', 'weights',
+         lambda df: functools.partial(plot_weight_progression, *_progression_inputs(df),
+                                      max_points=DEFAULT_MAX_POINTS)),
+    Case('charts.plot_weekly_average_weight', 'weights',
+         lambda df: functools.partial(plot_weekly_average_weight, *compute_weekly_averages(df)[:2])),
+    Case('charts.plot_weekly_table', 'weights',
+         lambda df: functools.partial(plot_weekly_table, *compute_weekly_averages(df),
+                                      page_size=WEEKLY_TABLE_PAGE_SIZE)),
+    Case('charts.plot_day_of_week_bar', 'weights',
+         lambda df: functools.partial(plot_day_of_week_bar, compute_seasonality(*_series(df))['weekday'])),
+    Case('charts.plot_month_bar', 'weights',
+         lambda df: functools.partial(plot_month_bar, compute_seasonality(*_series(df))['month'])),
+    Case('charts.plot_seasonality_bar[week_of_year]', 'weights',
+         lambda df: functools.partial(plot_seasonality_bar, compute_seasonality(*_series(df))['week_of_year'],
+                                      'ISO Week', "Average Weight Change by Week of Year")),
+    Case('charts.plot_goal_fan_chart', 'weights', _fan_chart),
+    Case('figure_cache.FigureCache.load[progression]', 'weights', _figure_cache_load),
+    Case('charts.plot_calorie_heatmap', 'weights', _calorie_heatmap),
+    Case('fitnotes.summarize_sessions', 'fitnotes', lambda sets: functools.partial(summarize_sessions, sets)),
+    Case('fitnotes.exercise_summary', 'fitnotes',
+         lambda sets: functools.partial(exercise_summary, summarize_sessions(sets), _first_exercise(sets))),
+    Case('fitnotes.FitNotesIndex.from_sets', 'fitnotes',
+         lambda sets: functools.partial(FitNotesIndex.from_sets, sets)),
+    Case('fitnotes.FitNotesIndex.totals', 'fitnotes',
+         lambda sets: functools.partial(FitNotesIndex.from_sets(sets).totals, _first_exercise(sets))),
+    Case('gym_charts.plot_exercise_progress', 'fitnotes', _exercise_progress),
+    Case('storage.CsvFormat.read', 'weight_csv', lambda path: functools.partial(BASE_FORMATS['csv'].read, path)),
+    Case('file_utils.read_weight_rows', 'weight_csv',
+         lambda path: functools.partial(read_weight_rows, io.BytesIO(path.read_bytes()))),
+    Case('storage.read_fitnotes_csv', 'fitnotes_csv', lambda path: functools.partial(read_fitnotes_csv, path)),
+    Case('fitnotes.load_fitnotes', 'fitnotes_csv', lambda path: functools.partial(load_fitnotes, path)),
+    Case('convert_xls_to_cvs.process_csv', 'scale_csv', _process_csv),
+]
+
+
+def measure(call, repeat):
+    """
+    Time and memory of one prepared call.
+
+    Returns:
+        tuple: (fastest seconds, median seconds, peak bytes allocated during one call)
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    # Traced separately: tracemalloc slows allocations down several times
+    tracemalloc.start()
+    try:
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), float(np.median(timings)), peak
+
+
+def run_suite(cases, sizes, repeat):
+    """
+    Run every case at every size.
+
+    Returns:
+        list: One dict per (case, size) with 'case', 'size', 'seconds',
+        'median_seconds' and 'peak_bytes'.
+    """
+    results = []
+    # Time the builders themselves rather than hits in the on-disk figure cache
+    with tempfile.TemporaryDirectory() as tmp, use_figure_cache(FigureCache(tmp, max_bytes=0)):
+        tmp = pathlib.Path(tmp)
+        for size in sizes:
+            datasets = {}
+            for case in cases:
+                if case.dataset not in datasets:
+                    datasets[case.dataset] = DATASETS[case.dataset](size, tmp)
+                call = case.prepare(datasets[case.dataset])
+                seconds, median_seconds, peak = measure(call, repeat)
+                results.append({'case': case.name, 'size': size, 'seconds': seconds,
+                                'median_seconds': median_seconds, 'peak_bytes': peak})
+                print(f"{case.name:<48} {size:>10,} {seconds * 1e3:>10.2f}ms {peak / 1e6:>10.2f}MB", flush=True)
+    return results
+
+
+def metadata(args):
+    return {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'sizes': args.sizes,
+        'repeat': args.repeat,
+        'seed': SEED,
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Ratios of results to a baseline run for the (case, size) pairs both contain.
+
+    Returns:
+        list: (case, size, time ratio, memory ratio, regressed) tuples.
+    """
+    previous = {(record['case'], record['size']): record for record in baseline['results']}
+    rows = []
+    for record in results:
+        base = previous.get((record['case'], record['size']))
+        if base is None:
+            continue
+        time_ratio = record['seconds'] / base['seconds'] if base['seconds'] > 0 else np.inf
+        memory_ratio = record['peak_bytes'] / base['peak_bytes'] if base['peak_bytes'] > 0 else np.inf
+        slower = time_ratio > threshold and record['seconds'] - base['seconds'] > MIN_REGRESSION_SECONDS
+        hungrier = memory_ratio > threshold and record['peak_bytes'] - base['peak_bytes'] > MIN_REGRESSION_BYTES
+        rows.append((record['case'], record['size'], time_ratio, memory_ratio, slower or hungrier))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time and memory-profile the data functions and chart builders.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help='rows of weight data / sets of FitNotes data')
+    parser.add_argument('--cases', nargs='+', default=['*'], help='glob patterns of the case names to run')
+    parser.add_argument('--repeat', type=int, default=5, help='timed calls per case; the fastest one counts')
+    parser.add_argument('--output', type=pathlib.Path,
+                        help='JSON file for the results (default: benchmarks/results/suite-<timestamp>.json)')
+    parser.add_argument('--compare', type=pathlib.Path, help='results JSON of an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='slowdown or memory growth factor reported as a regression')
+    args = parser.parse_args()
+
+    cases = [case for case in CASES if any(fnmatch.fnmatch(case.name, pattern) for pattern in args.cases)]
+    if not cases:
+        parser.error(f"No case matches {args.cases}")
+
+    print(f"{'case':<48} {'size':>10} {'time':>12} {'peak':>12}")
+    meta = metadata(args)
+    results = run_suite(cases, args.sizes, args.repeat)
+
+    output = args.output or RESULTS_DIR / f"suite-{datetime.datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({'meta': meta, 'results': results}, indent=2), encoding='utf-8')
+    print(f"Saved {len(results)} results to {output}")
+
+    if args.compare is None:
+        return 0
+    rows = compare(results, json.loads(args.compare.read_text(encoding='utf-8')), args.threshold)
+    print(f"\nCompared with {args.compare}")
+    print(f"{'case':<48} {'size':>10} {'time':>8} {'peak':>8}")
+    for case, size, time_ratio, memory_ratio, regressed in rows:
+        print(f"{case:<48} {size:>10,} {time_ratio:>7.2f}x {memory_ratio:>7.2f}x{'  REGRESSION' if regressed else ''}")
+    regressions = sum(row[-1] for row in rows)
+    print(f"{regressions} regression(s) above {args.threshold:g}x")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,34 +1,65 @@
-from datetime import timedelta
 import numpy as np
 import streamlit as st
-import plotly.graph_objects as go
 
-def predictive_goal_date(weights, weekly_diffs):        
+from utils.charts import plot_goal_fan_chart
+from utils.analysis import get_goal_forecast
+from utils.forecast import DEFAULT_HORIZON_WEEKS, DEFAULT_PATHS
+
+
+def _goal_date(today, weeks):
+    return (today + np.timedelta64(int(round(weeks * 7)), 'D')).astype(str)
+
+
+def predictive_goal_date(weights, weekly_diffs):
+    """
+    Goal date forecast from a Monte Carlo simulation of the weekly changes so far.
+
+    The observed week-over-week changes are resampled into DEFAULT_PATHS
+    trajectories, giving a P10/P50/P90 range for the goal date and a fan chart
+    instead of a single date from the average rate.
+    """
     st.markdown("### 🎯 Predictive Goal Date")
     valid_weekly_changes = [d for d in weekly_diffs if d is not None]
-    if len(valid_weekly_changes) > 0:
-        avg_weekly_change = sum(valid_weekly_changes) / len(valid_weekly_changes)
+    if len(weights) == 0 or len(valid_weekly_changes) == 0:
+        st.info("Not enough recent weight change to predict a goal date. Try tracking a few more weeks.")
+        return
+
+    current_weight = float(weights[-1])
+    # The chosen target outlives the widget (dropped when another page runs), so
+    # the forecast precomputed after a save can be reused on the next visit
+    if 'goal_target_input' not in st.session_state:
+        st.session_state['goal_target_input'] = st.session_state.get('goal_target', current_weight)
+    target_weight = st.number_input(
+        "Set your target weight (kg):",
+        min_value=30.0,
+        max_value=300.0,
+        key='goal_target_input'
+    )
+    if target_weight == current_weight:
+        st.session_state.pop('goal_target', None)
+        st.info("Set a target weight above or below your current weight to forecast a goal date.")
+        return
+
+    st.session_state['goal_target'] = target_weight
+    forecast = get_goal_forecast(current_weight, target_weight, valid_weekly_changes)
+    avg_weekly_change = float(np.mean(valid_weekly_changes))
+    p10, p50, p90 = (forecast.goal_weeks[q] for q in (0.1, 0.5, 0.9))
+    today = np.datetime64('today', 'D')
+    if np.isfinite(p50):
+        upper = f"**{_goal_date(today, p90)}**" if np.isfinite(p90) else f"beyond {DEFAULT_HORIZON_WEEKS} weeks"
+        st.success(
+            f"Simulating {DEFAULT_PATHS:,} trajectories from your weekly changes "
+            f"(average **{avg_weekly_change:+.2f} kg/week**), you will most likely reach **{target_weight} kg** "
+            f"in about **{p50:.1f} weeks** (around **{_goal_date(today, p50)}**), "
+            f"with an 80% range from **{_goal_date(today, p10)}** to {upper}."
+        )
+        if forecast.probability < 1:
+            st.caption(f"Chance of reaching the target within {DEFAULT_HORIZON_WEEKS} weeks: "
+                       f"{forecast.probability:.1%}")
     else:
-        avg_weekly_change = 0
-    
-    if len(weights) > 0 and avg_weekly_change != 0:
-        target_weight = st.number_input(
-            "Set your target weight (kg):",
-            min_value=30.0,
-            max_value=300.0,
-            value=float(weights[-1])
+        st.info(
+            f"Only {forecast.probability:.0%} of the simulated trajectories reach **{target_weight} kg** "
+            f"within {DEFAULT_HORIZON_WEEKS} weeks at your current trend."
         )
-        # Calculate weeks needed (sign handles loss or gain)
-        weeks_needed = (target_weight - weights[-1]) / avg_weekly_change if avg_weekly_change != 0 else None
-        if weeks_needed is not None and weeks_needed > 0:
-            goal_date = np.datetime64('today', 'D') + np.timedelta64(int(weeks_needed * 7), 'D')
-            st.success(
-                f"At your current average rate (**{avg_weekly_change:+.2f} kg/week**), "
-                f"you will reach **{target_weight} kg** in about **{weeks_needed:.1f} weeks** "
-                f"(around **{goal_date.astype('M8[D]').astype(str)}**)."
-            )
-        elif weeks_needed is not None and weeks_needed < 0:
-            st.info("You have already passed your target weight based on your current trend.")
-        else:
-            st.info("Not enough recent weight change to predict a goal date. Try tracking a few more weeks.")
-            
\ No newline at end of file
+    st.plotly_chart(plot_goal_fan_chart(today, forecast.fan_weeks, forecast.fan, target_weight, forecast.goal_weeks),
+                    use_container_width=True)
@@ -1,61 +1,301 @@
-import pandas as pd
-from datetime import datetime
 import argparse
+import glob
+import os
+import pathlib
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+OUTPUT_COLUMNS = ['date', 'weight', 'day_of_week', 'weight_diff', 'month']
+OUTPUT_FORMATS = {'csv': '.csv', 'parquet': '.parquet'}
+# Rows held in memory per file; the output is written chunk by chunk
+DEFAULT_CHUNKSIZE = 100_000
+
+DAY_NAMES = np.array(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'])
+MONTH_NAMES = np.array(['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August',
+                        'September', 'October', 'November', 'December'])
+
+
+def convert_chunk(chunk, previous_weight=None):
+    """
+    Convert one chunk of a scale export to the app's weight layout.
+    Skips lines without Raw values.
+
+    Args:
+        chunk (pd.DataFrame): Rows with 'date' (dd.mm.yyyy) and 'Raw' (decimal comma) columns.
+        previous_weight (float, optional): Last weight of the previous chunk, so
+            the first 'weight_diff' of this chunk continues the running difference.
+
+    Returns:
+        tuple: (converted DataFrame, last weight of the chunk or previous_weight if it is empty).
+    """
+    chunk = chunk.dropna(subset=['Raw'])
+    raw = chunk['Raw']
+    if raw.dtype == object:
+        raw = raw.str.replace(',', '.', regex=False)
+    weights = raw.to_numpy(dtype=np.float64)
+    dates = pd.to_datetime(chunk['date'], format='%d.%m.%Y').to_numpy()
+
+    weight_diff = np.empty_like(weights)
+    weight_diff[1:] = weights[1:] - weights[:-1]
+    if len(weights) > 0:
+        weight_diff[0] = weights[0] - previous_weight if previous_weight is not None else np.nan
+        previous_weight = float(weights[-1])
+
+    days = dates.astype('datetime64[D]')
+    converted = pd.DataFrame({
+        'date': np.char.add(np.datetime_as_string(days, unit='D'), ' 00:00:00'),
+        'weight': weights,
+        # 1970-01-01 was a Thursday
+        'day_of_week': DAY_NAMES[(days.view(np.int64) + 3) % 7],
+        'weight_diff': weight_diff,
+        'month': MONTH_NAMES[days.astype('datetime64[M]').view(np.int64) % 12],
+    })
+    return converted, previous_weight
+
+
+def convert_file(input_file, output_file, output_format='csv', chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Stream a scale export through convert_chunk into output_file.
+
+    Memory stays bounded by chunksize rows. The output is written to a
+    temporary file and renamed into place, so a failed run never leaves a
+    partial file behind.
+
+    Args:
+        input_file (str): Path to the input CSV file.
+        output_file (str): Path of the converted file.
+        output_format (str): 'csv' or 'parquet'.
+        chunksize (int): Rows read per chunk.
+
+    Returns:
+        int: Number of rows written.
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format!r}; use one of {sorted(OUTPUT_FORMATS)}")
+    output_file = pathlib.Path(output_file)
+    tmp_file = output_file.with_name(output_file.name + '.tmp')
+    sink = _CsvSink(tmp_file) if output_format == 'csv' else _ParquetSink(tmp_file)
+    n_rows = 0
+    previous_weight = None
+    try:
+        chunks = pd.read_csv(input_file, usecols=['date', 'Raw'], dtype={'date': str, 'Raw': str}, chunksize=chunksize)
+        for chunk in chunks:
+            converted, previous_weight = convert_chunk(chunk, previous_weight)
+            sink.write(converted)
+            n_rows += len(converted)
+        sink.close()
+        os.replace(tmp_file, output_file)
+    finally:
+        sink.close()
+        if tmp_file.exists():
+            tmp_file.unlink()
+    return n_rows
+
+
+class _CsvSink:
+    def __init__(self, path):
+        self._handle = open(path, 'w', newline='')
+        self._header = True
+
+    def write(self, converted):
+        converted.to_csv(self._handle, index=False, header=self._header)
+        self._header = False
+
+    def close(self):
+        if self._handle.closed:
+            return
+        if self._header:
+            self._handle.write(','.join(OUTPUT_COLUMNS) + '\n')
+        self._handle.close()
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        self.path = path
+        self._writer = None
+        self._closed = False
+
+    def write(self, converted):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # A fixed schema, since chunks without any Raw values come out empty and untyped
+        schema = pa.schema([('date', pa.string()), ('weight', pa.float64()), ('day_of_week', pa.string()),
+                            ('weight_diff', pa.float64()), ('month', pa.string())])
+        table = pa.Table.from_pandas(converted, schema=schema, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._closed:
+            return
+        if self._writer is None:
+            self.write(convert_chunk(pd.DataFrame({'date': [], 'Raw': []}, dtype=str))[0])
+        self._writer.close()
+        self._closed = True
+
 
 def process_csv(input_file: str, output_file: str) -> None:
     """
     Process CSV file by adding additional columns and reformatting the date.
     Skips lines without Raw values.
-    
+
     Args:
         input_file (str): Path to the input CSV file
         output_file (str): Path to save the output CSV file
     """
     try:
-        # Read the CSV file
-        df = pd.read_csv(input_file)
+        convert_file(input_file, output_file)
+        print(f"Successfully processed {input_file} and saved results to {output_file}")
 
-        # Drop rows where Raw is NaN
-        df = df.dropna(subset=['Raw'])
+    except Exception as e:
+        print(f"An error occurred: {str(e)}")
 
-        # Convert date string to datetime
-        df['date'] = pd.to_datetime(df['date'], format='%d.%m.%Y')
 
-        # Convert Raw column to float, replacing comma with dot
-        df['Raw'] = df['Raw'].str.replace(',', '.').astype(float)
+def expand_inputs(patterns):
+    """
+    Resolve files, directories (every *.csv inside) and glob patterns to a sorted list of files.
+    """
+    files = []
+    for pattern in patterns:
+        path = pathlib.Path(pattern)
+        if path.is_dir():
+            files.extend(sorted(path.glob('*.csv')))
+        elif path.is_file():
+            files.append(path)
+        else:
+            files.extend(sorted(pathlib.Path(match) for match in glob.glob(pattern, recursive=True)))
+    return list(dict.fromkeys(files))
 
-        # Create new columns
-        df['day_of_week'] = df['date'].dt.day_name()  # Get full day name
-        df['month'] = df['date'].dt.strftime('%B')  # Get full month name
-        df['weight_diff'] = df['Raw'].diff()  # Calculate difference with previous row
 
-        # Reorder columns and format date
-        df['date'] = df['date'].dt.strftime('%Y-%m-%d 00:00:00')
+def _convert_job(input_file, output_file, output_format, chunksize):
+    start = time.perf_counter()
+    n_rows = convert_file(input_file, output_file, output_format, chunksize)
+    return n_rows, time.perf_counter() - start
 
-        # Rename 'Raw' column to 'weight'
-        df = df.rename(columns={'Raw': 'weight'})
 
-        # Arrange columns in desired order
-        df = df[['date', 'weight', 'day_of_week', 'weight_diff', 'month']]
+def batch_output_paths(input_files, output_dir, output_format='csv'):
+    """
+    Output path of each input in output_dir, named after the input's stem.
+
+    Raises:
+        ValueError: If two inputs share a stem, so one output would overwrite
+            the other, or if an output would overwrite an input.
+    """
+    output_dir = pathlib.Path(output_dir)
+    suffix = OUTPUT_FORMATS[output_format]
+    outputs = {input_file: output_dir / (pathlib.Path(input_file).stem + suffix) for input_file in input_files}
+    claimed = {}
+    for input_file, output_file in outputs.items():
+        claimed.setdefault(output_file.resolve(), []).append(str(input_file))
+    problems = [f"{' and '.join(sources)} would be written to the same file {output_file}"
+                for output_file, sources in claimed.items() if len(sources) > 1]
+    resolved_inputs = {pathlib.Path(input_file).resolve() for input_file in input_files}
+    problems += [f"{output_file} would overwrite an input file" for output_file in claimed
+                 if output_file in resolved_inputs]
+    if problems:
+        raise ValueError("; ".join(problems))
+    return outputs
+
+
+def convert_batch(input_files, output_dir, output_format='csv', chunksize=DEFAULT_CHUNKSIZE, workers=None):
+    """
+    Convert many exports in parallel across a process pool.
+
+    Args:
+        input_files (list): Input CSV paths.
+        output_dir (Path): Directory receiving one converted file per input.
+        output_format (str): 'csv' or 'parquet'.
+        chunksize (int): Rows read per chunk.
+        workers (int, optional): Process count; defaults to the CPU count.
+
+    Returns:
+        list: (input_file, rows, seconds, error) per input; error is None on success.
+
+    Raises:
+        ValueError: If the output paths collide with each other or with an input (see batch_output_paths).
+    """
+    outputs = batch_output_paths(input_files, output_dir, output_format)
+    pathlib.Path(output_dir).mkdir(parents=True, exist_ok=True)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            input_file: executor.submit(_convert_job, input_file, output_file, output_format, chunksize)
+            for input_file, output_file in outputs.items()
+        }
+        for input_file, future in futures.items():
+            try:
+                n_rows, seconds = future.result()
+                results.append((input_file, n_rows, seconds, None))
+            except Exception as e:
+                results.append((input_file, 0, 0.0, e))
+    return results
 
-        # Write to new CSV file
-        df.to_csv(output_file, index=False)
-        print(f"Successfully processed {input_file} and saved results to {output_file}")
-        
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
 
 def main():
     """
-    Parse command line arguments and call the process_csv function.
+    Parse command line arguments and convert the requested files.
+
+    With --output-dir every input (files, directories or globs) is converted in
+    parallel into that directory. Without it, the original usage
+    'input_file output_file' converts a single file.
+
+    Returns:
+        int: Process exit code, non-zero if any file failed.
     """
     parser = argparse.ArgumentParser(description='Process CSV file to add additional columns and reformat date.')
-    parser.add_argument('input_file', type=str, help='Path to the input CSV file')
-    parser.add_argument('output_file', type=str, help='Path to save the output CSV file')
-    
+    parser.add_argument('inputs', nargs='+',
+                        help='Input CSV files, directories or glob patterns; '
+                             'without --output-dir, the input file followed by the output file')
+    parser.add_argument('-o', '--output-dir', help='Directory for the converted files (batch mode)')
+    parser.add_argument('--format', choices=sorted(OUTPUT_FORMATS), default='csv', help='Output format')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help='Rows read per chunk')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+
     args = parser.parse_args()
-    
-    process_csv(args.input_file, args.output_file)
+
+    start = time.perf_counter()
+    if args.output_dir is None:
+        if len(args.inputs) != 2:
+            parser.error('expected input_file output_file, or use --output-dir for batch mode')
+        input_file, output_file = args.inputs
+        try:
+            n_rows = convert_file(input_file, output_file, args.format, args.chunksize)
+        except Exception as e:
+            print(f"Failed to process {input_file}: {e}", file=sys.stderr)
+            return 1
+        seconds = time.perf_counter() - start
+        print(f"Successfully processed {input_file} and saved results to {output_file} "
+              f"({n_rows:,} rows, {n_rows / max(seconds, 1e-9):,.0f} rows/s)")
+        return 0
+
+    input_files = expand_inputs(args.inputs)
+    if not input_files:
+        print("No input files matched", file=sys.stderr)
+        return 1
+    try:
+        results = convert_batch(input_files, args.output_dir, args.format, args.chunksize, args.workers)
+    except ValueError as e:
+        print(f"Nothing converted: {e}", file=sys.stderr)
+        return 1
+    failures = 0
+    for input_file, n_rows, seconds, error in results:
+        if error is not None:
+            failures += 1
+            print(f"FAILED {input_file}: {error}", file=sys.stderr)
+        else:
+            print(f"{input_file}: {n_rows:,} rows in {seconds:.2f}s ({n_rows / max(seconds, 1e-9):,.0f} rows/s)")
+    total_rows = sum(n_rows for _, n_rows, _, _ in results)
+    seconds = time.perf_counter() - start
+    print(f"Converted {len(results) - failures}/{len(results)} files, {total_rows:,} rows "
+          f"in {seconds:.2f}s ({total_rows / max(seconds, 1e-9):,.0f} rows/s)")
+    return 1 if failures else 0
+
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
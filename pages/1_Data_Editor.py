@@ -1,9 +1,13 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import datetime
-import pathlib
 
-from utils.file_utils import load_data, save_data
+from utils.analysis import DEFAULT_EWMA_HALFLIFE_DAYS, invalidate_analysis
+from utils.file_utils import commit_edits, load_data, read_weight_rows, set_weight_series, user_frame
+from utils.precompute import schedule_analysis
+from utils.validation import ValidationError
+from utils.weight_series import WeightSeries
 
 st.title("📋 Data Editor")
 load_data()
@@ -23,7 +27,35 @@ if 'user_data' not in st.session_state:
         st.rerun()  # Only rerun after submit
         st.stop()   # Only stop after submit
 else:
-    df = st.session_state['user_data']
+    df = user_frame()
+    series = WeightSeries.from_frame(df)
+
+    def apply_edits(new_rows=None, deleted_days=(), message=""):
+        """Publish the edited series and persist the batch as one transaction."""
+        # Evict the analyses of this session's data before the edit, while df still holds it;
+        # other data versions stay cached for the sessions showing them
+        invalidate_analysis(df)
+        set_weight_series(series)
+        # Keep the running statistics in O(1) while entries arrive in date order
+        for key in ('weight_stats', 'tdee_estimator'):
+            stats = st.session_state.get(key)
+            appendable = (stats is not None and len(deleted_days) == 0 and new_rows is not None
+                          and stats.can_append(new_rows['date'].min()))
+            if appendable:
+                for date, weight in new_rows[['date', 'weight']].itertuples(index=False):
+                    stats.append(date, weight)
+            else:
+                st.session_state.pop(key, None)
+        commit_edits(new_rows, deleted_days)
+        # Saved: recompute the Analysis page in the background instead of on its next visit
+        schedule_analysis(user_frame(), st.session_state.get('ewma_halflife_days', DEFAULT_EWMA_HALFLIFE_DAYS),
+                          st.session_state.get('goal_target'))
+        st.session_state['edit_message'] = message
+        st.rerun()
+
+    def upsert_rows(rows):
+        (dates, weights), replaced_days = series.upsert_many(rows['date'], rows['weight'])
+        return pd.DataFrame({'date': dates, 'weight': weights}), replaced_days
 
     # --- ADD DATA FORM ---
     st.divider()
@@ -37,18 +69,54 @@ else:
         add_submitted = st.form_submit_button("Add")
         if add_submitted:
             new_datetime = datetime.datetime.combine(new_date, datetime.time())
+            replaced = series.upsert(new_datetime, new_weight)
             new_data = pd.DataFrame([{'date': new_datetime, 'weight': new_weight}])
-            df = pd.concat([df, new_data], ignore_index=True)
-            st.session_state['user_data'] = df  # Update session state
-            st.session_state['add_success'] = True
-        
-            save_data();
+            apply_edits(new_data, [new_date] if replaced else [], "New data added successfully!")
+
+    # --- BATCH EDIT ---
+    st.divider()
+    st.subheader("Batch edit")
+    paste_tab, grid_tab = st.tabs(["Paste or upload", "Edit in grid"])
+    with paste_tab:
+        with st.form("batch_add_form"):
+            pasted = st.text_area("Rows to add, one 'date,weight' per line (tab-separated works too)",
+                                  placeholder="2025-05-01,82.4\n2025-05-02,82.1")
+            uploaded = st.file_uploader("...or upload a CSV with date and weight columns", type="csv")
+            batch_submitted = st.form_submit_button("Commit rows")
+        if batch_submitted and (pasted.strip() or uploaded is not None):
+            try:
+                new_data = read_weight_rows(uploaded if uploaded is not None else pasted)
+            except ValidationError as e:
+                st.error(f"Could not read the rows:\n\n{e}")
+            else:
+                new_data, replaced_days = upsert_rows(new_data)
+                apply_edits(new_data, replaced_days,
+                            f"Committed {len(new_data)} rows ({len(replaced_days)} days replaced).")
+
+    with grid_tab:
+        last_day = pd.Timestamp(series.dates[-1]).date() if len(series) > 0 else datetime.date.today()
+        grid_range = st.date_input("Rows to edit", value=(last_day - datetime.timedelta(days=60), last_day),
+                                   key="grid_range")
+        grid_start, grid_end = (grid_range[0], grid_range[-1]) if len(grid_range) > 0 else (last_day, last_day)
+        shown_dates, shown_weights = series.slice(grid_start, grid_end)
+        shown = pd.DataFrame({'date': shown_dates, 'weight': shown_weights})
+        edited = st.data_editor(shown, num_rows="dynamic", key="weight_grid", use_container_width=True)
+        if st.button("Commit grid changes"):
+            edited = edited.dropna(subset=['date', 'weight'])
+            edited_days = pd.to_datetime(edited['date']).to_numpy().astype('datetime64[D]')
+            dropped_days = np.setdiff1d(shown_dates.astype('datetime64[D]'), edited_days)
+            changed = edited.merge(shown.drop_duplicates(), on=['date', 'weight'], how='left', indicator=True)['_merge'] == 'left_only'
+            new_data = edited[changed.to_numpy()]
+            if len(new_data) == 0 and len(dropped_days) == 0:
+                st.info("No changes to commit.")
+            else:
+                series.delete_days(dropped_days)
+                new_data, replaced_days = upsert_rows(new_data)
+                apply_edits(new_data, np.union1d(dropped_days, replaced_days),
+                            f"Committed {len(new_data)} changed rows and {len(dropped_days)} deleted days.")
 
-            st.rerun()
-    
-    if st.session_state.get('add_success'):
-        st.success("New data added successfully!")
-        del st.session_state['add_success']
+    if st.session_state.get('edit_message'):
+        st.success(st.session_state.pop('edit_message'))
 
     # --- DELETE DATA FORM ---
     st.divider()
@@ -56,31 +124,25 @@ else:
     with st.form("delete_weight_form"):
         del_col1, del_col2 = st.columns(2)
         with del_col1:
-            date_to_delete = st.date_input('Date to delete')
+            dates_to_delete = st.date_input('Dates to delete (one day or a range)', value=(datetime.date.today(),))
         with del_col2:
             delete_submitted = st.form_submit_button("Delete")
-            if delete_submitted:
-                mask = df['date'].dt.date != date_to_delete
-                new_df = df[mask]
-                if len(new_df) < len(df):
-                    df = new_df
-                    st.session_state['user_data'] = df # Update session state
-                    st.session_state['delete_success'] = True
-                    save_data()
-                    st.rerun()
+            if delete_submitted and len(dates_to_delete) > 0:
+                n_before = len(series)
+                removed_days = series.delete_range(dates_to_delete[0], dates_to_delete[-1])
+                if len(removed_days) > 0:
+                    apply_edits(deleted_days=removed_days,
+                                message=f"Deleted {n_before - len(series)} entries on {len(removed_days)} days.")
                 else:
                     st.session_state['delete_warning'] = True
                     st.rerun()
-    if st.session_state.get('delete_success'):
-        st.success("Data deleted successfully!")
-        del st.session_state['delete_success']
     if st.session_state.get('delete_warning'):
         st.warning("No entry found for that date.")
         del st.session_state['delete_warning']
 
     # --- DOWNLOAD UPDATED CSV ---
     st.divider()
-    csv = df.to_csv(index=False, date_format='%Y-%m-%d %H:%M:%S')
+    csv = user_frame(calendar=True).to_csv(index=False, date_format='%Y-%m-%d %H:%M:%S')
     st.download_button(
         label="Download updated CSV",
         data=csv,
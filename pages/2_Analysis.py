@@ -1,65 +1,163 @@
-import streamlit as st
-import pandas as pd
+import contextlib
+import datetime
+
 import numpy as np
+import pandas as pd
 import streamlit as st
 from components.predictive_goal import predictive_goal_date
-from utils.data_utils import compute_trend, compute_weekly_averages, compute_moving_average, compute_moving_average_dates
-from utils.file_utils import load_data
-from utils.charts import plot_day_of_week_bar, plot_month_bar, plot_weight_progression, plot_weekly_average_weight, plot_weekly_table
+from utils.analysis import (DEFAULT_EWMA_HALFLIFE_DAYS, analysis_cache_nbytes, analysis_cache_stats, cached_analysis,
+                            get_analysis, weekly_table_figure, zoomed_progression_figure)
+from utils.charts import WEEKLY_TABLE_PAGE_SIZE
+from utils.figure_cache import figure_cache
+from utils.file_utils import load_data, user_frame
+from utils.incremental import IncrementalWeightStats
+from utils.memory import estimate_server_memory, format_bytes, session_memory_report
+from utils.precompute import pending_analysis, schedule_analysis
+from utils.profiling import PROFILE_BY_DEFAULT, PROFILE_LOG, StageProfiler, stage
 from components.info_display import show_avg_weekly_loss, show_day_of_week_summary, show_month_summary, show_total_weight_loss
 
 
 # st.set_page_config(layout="wide")
 st.title("📈 Weight Analysis")
-load_data()
-
-# --- Use session_state to get user data ---
-if 'user_data' not in st.session_state:
-    st.info("Please upload your CSV file in the Data Editor page first.")
-else:
-    # Get user data
-    df = st.session_state['user_data']
-    dates = df['date'].values
-    weights = df['weight'].values
-    days = np.arange(1, len(weights) + 1)
-    
-    # Compute weekly averages and differences
-    week_labels, weekly_means, weekly_diffs = compute_weekly_averages(df)
-    moving_avg = compute_moving_average(weights)
-    moving_avg_dates = compute_moving_average_dates(dates)
-    trend = compute_trend(dates, weights)
-    total_loss = weights[0] - weights[-1] if len(weights) > 0 else 0
-
-    # --- TABS ---
-    tab1, tab2, tab3, tab4 = st.tabs(["📈 Weight Progression", "📅 Weekly Average", "📋 Weekly Table", "📊 Seasonality Analysis"])
-    
-    with tab1:
-        # st.subheader("Weight Progression")
-        show_total_weight_loss(total_loss)
-        fig = plot_weight_progression(dates, weights, moving_avg_dates, moving_avg, trend, days)
+with st.sidebar.expander("Profiling"):
+    # Off by default: measuring adds overhead and payload sizes serialize every chart a second time
+    profiling = st.checkbox("Time pipeline stages", value=PROFILE_BY_DEFAULT)
+    trace_memory = st.checkbox("Trace allocations (tracemalloc)", disabled=not profiling)
+    run_cprofile = st.checkbox("Profile functions (cProfile)", disabled=not profiling)
+    log_samples = st.checkbox(f"Append samples to {PROFILE_LOG.name}", value=PROFILE_BY_DEFAULT, disabled=not profiling)
+profiler = StageProfiler(trace_memory=trace_memory, profile=run_cprofile)
+
+
+def show_chart(name, fig):
+    with stage(f'render: {name}', figure=fig):
         st.plotly_chart(fig, use_container_width=True)
-        predictive_goal_date(weights, weekly_diffs)
-        
-    with tab2:
-        st.subheader("Weekly Average Weight (Monday to Sunday)")
-        fig2 = plot_weekly_average_weight(week_labels, weekly_means)
-        st.plotly_chart(fig2, use_container_width=True)
-
-    with tab3:
-        fig3, avg_weekly_loss = plot_weekly_table(week_labels, weekly_means, weekly_diffs)
-        show_avg_weekly_loss(avg_weekly_loss)
-        st.plotly_chart(fig3, use_container_width=True)
+
+
+with profiler.activate() if profiling else contextlib.nullcontext():
+    with stage('load data'):
+        load_data()
+
+    # --- Use session_state to get user data ---
+    if 'user_data' not in st.session_state:
+        st.info("Please upload your CSV file in the Data Editor page first.")
+    else:
+        with stage('user frame'):
+            df = user_frame()
+        # Rebuilt only after deletes or out-of-order inserts; the Data Editor appends to it
+        if st.session_state.get('weight_stats') is None or st.session_state['weight_stats'].count != len(df):
+            with stage('weight stats'):
+                st.session_state['weight_stats'] = IncrementalWeightStats.from_series(df['date'].values, df['weight'].values)
+
+        ewma_halflife_days = st.sidebar.number_input(
+            "EWMA half-life (days)", min_value=1, max_value=90, value=DEFAULT_EWMA_HALFLIFE_DAYS
+        )
+
+        # Remembered for the precomputation the Data Editor starts after a save
+        st.session_state['ewma_halflife_days'] = ewma_halflife_days
+
+        # Cached per dataset: widget interactions that don't change the data skip all recomputation
+        with stage('analysis'):
+            analysis = cached_analysis(df, ewma_halflife_days)
+            refresh_job = None
+            if analysis is None and st.session_state.get('analysis') is not None:
+                # Keep showing the previous results while the new ones are computed in the background
+                refresh_job = schedule_analysis(df, ewma_halflife_days, st.session_state.get('goal_target'))
+                analysis = st.session_state['analysis']
+            elif analysis is None:
+                job = pending_analysis(df, ewma_halflife_days)
+                analysis = job.result() if job is not None else get_analysis(df, st.session_state['weight_stats'], ewma_halflife_days)
+        if refresh_job is None:
+            st.session_state['analysis'] = analysis
+        elif refresh_job.done() and refresh_job.exception() is not None:
+            st.error(f"Could not refresh the analysis, showing the previous results: {refresh_job.exception()}")
+        else:
+            st.caption("🔄 Refreshing: showing the previous analysis until the new one is ready.")
+
+            @st.fragment(run_every=0.5)
+            def wait_for_refresh():
+                if refresh_job.done():
+                    st.rerun()
+
+            wait_for_refresh()
+        weights = analysis['weights']
+
+        # --- TABS ---
+        tab1, tab2, tab3, tab4 = st.tabs(["📈 Weight Progression", "📅 Weekly Average", "📋 Weekly Table", "📊 Seasonality Analysis"])
     
-    with tab4:
-        st.info("Negative values mean weight loss on average; positive means weight gain. Use these insights to spot patterns and adjust your habits!")
+        with tab1:
+            # st.subheader("Weight Progression")
+            show_total_weight_loss(analysis['total_loss'])
+            fig = analysis['fig_progression']
+            if len(weights) > 0:
+                first_date = analysis['dates'].min().astype('datetime64[D]').item()
+                last_date = analysis['dates'].max().astype('datetime64[D]').item()
+                if first_date < last_date:
+                    visible = st.slider("Date range", min_value=first_date, max_value=last_date, value=(first_date, last_date))
+                    if visible != (first_date, last_date):
+                        # Zoomed in: downsample only the visible window, so detail is refined
+                        x_range = (np.datetime64(visible[0]), np.datetime64(datetime.datetime.combine(visible[1], datetime.time.max)))
+                        with stage('figure: progression (zoomed)'):
+                            fig = zoomed_progression_figure(analysis, x_range)
+            show_chart('progression', fig)
+            with stage('goal forecast'):
+                predictive_goal_date(weights, analysis['weekly_diffs'])
         
-        # Date column should be datetime
-        df['date'] = pd.to_datetime(df['date'])
-
-        fig_dow, day_avg = plot_day_of_week_bar(df)
-        st.plotly_chart(fig_dow, use_container_width=True)
-        show_day_of_week_summary(day_avg)
-        st.markdown("---")
-        fig_month, month_avg = plot_month_bar(df)
-        st.plotly_chart(fig_month, use_container_width=True)
-        show_month_summary(month_avg)
+        with tab2:
+            st.subheader("Weekly Average Weight (Monday to Sunday)")
+            show_chart('weekly average', analysis['fig_weekly_average'])
+
+        with tab3:
+            show_avg_weekly_loss(analysis['avg_weekly_loss'])
+            fig_table = analysis['fig_weekly_table']
+            n_pages = max(1, -(-len(analysis['week_labels']) // WEEKLY_TABLE_PAGE_SIZE))
+            if n_pages > 1:
+                page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1)
+                if page > 1:
+                    with stage('figure: weekly table page'):
+                        fig_table = weekly_table_figure(analysis['week_labels'], analysis['weekly_means'],
+                                                        analysis['weekly_diffs'], page - 1, analysis['data_version'])
+            show_chart('weekly table', fig_table)
+    
+        with tab4:
+            st.info("Negative values mean weight loss on average; positive means weight gain. Use these insights to spot patterns and adjust your habits!")
+
+            show_chart('day of week', analysis['fig_day_of_week'])
+            show_day_of_week_summary(analysis['day_avg'])
+            st.markdown("---")
+            show_chart('month', analysis['fig_month'])
+            show_month_summary(analysis['month_avg'])
+            with st.expander("Week of year and day of month"):
+                show_chart('week of year', analysis['fig_week_of_year'])
+                show_chart('day of month', analysis['fig_day_of_month'])
+
+
+if profiling:
+    samples = profiler.to_frame()
+    total_ms = samples.loc[~samples['stage'].str.contains('/'), 'ms'].sum()
+    with st.expander(f"Stage timings: {total_ms:.0f} ms this run"):
+        for column in ('peak_bytes', 'payload_bytes'):
+            samples[column] = samples[column].map(lambda n_bytes: format_bytes(n_bytes) if pd.notna(n_bytes) else '')
+        st.dataframe(samples.round({'ms': 2}), hide_index=True, use_container_width=True)
+        if run_cprofile:
+            st.code(profiler.profile_report())
+    if log_samples:
+        profiler.append_log(PROFILE_LOG, 'Analysis')
+
+if 'user_data' in st.session_state:
+    with st.sidebar.expander("Analysis cache"):
+        st.json(analysis_cache_stats())
+        st.caption("Figures on disk")
+        st.json(figure_cache().stats())
+
+    with st.sidebar.expander("Memory"):
+        # Measuring walks every cached figure, so it only runs on request
+        if st.checkbox("Measure session memory"):
+            report = session_memory_report(st.session_state)
+            shared_bytes = analysis_cache_nbytes()
+            st.dataframe(report.map(format_bytes).rename("size"))
+            st.caption(f"This session: {format_bytes(report.sum())}, "
+                       f"weights: {format_bytes(st.session_state['user_data'].nbytes)}. "
+                       f"Shared analysis cache: {format_bytes(shared_bytes)}.")
+            n_sessions = st.number_input("Concurrent sessions", min_value=1, value=100, step=10)
+            st.metric("Estimated server memory",
+                      format_bytes(estimate_server_memory(report.sum(), n_sessions, shared_bytes)))
@@ -1,9 +1,19 @@
+import numpy as np
 import pandas as pd
 import streamlit as st
 from datetime import date, timedelta
 
+from utils.calculators import (ACTIVITY_MULTIPLIERS, BMR_FORMULAS, CALORIE_ADJUSTMENTS, harris_benedict, katch_mcardle,
+                               mifflin_st_jeor, scenario_grid, tdee)
+from utils.charts import plot_calorie_heatmap
+from utils.file_utils import load_data, user_frame
+from utils.storage import read_calorie_csv
+from utils.tdee import DEFAULT_WINDOW_DAYS, MIN_WINDOW_WEIGH_INS, AdaptiveTdee, daily_intake
+from utils.validation import ValidationError
+
 st.set_page_config(layout="wide")
 st.title("⚖️ Fitness Calculators")
+load_data()
 
 tab1, tab2, tab3 = st.tabs(["🧮 TDEE and Calorie Target Calculator", "🧑‍🔬 Macro Calculator", "🎯 Weight Goal Timeline Calculator"])
 
@@ -27,70 +37,83 @@ with tab1:
     age = st.number_input("Age", min_value=10, max_value=100, value=25)
     weight = st.number_input("Weight (kg)", min_value=30.0, max_value=200.0, value=70.0)
     height = st.number_input("Height (cm)", min_value=120.0, max_value=250.0, value=170.0)
-    activity = st.selectbox(
-        "Activity Level",
-        [
-            "Sedentary (little or no exercise)",
-            "Lightly active (light exercise/sports 1-3 days/week)",
-            "Moderately active (moderate exercise/sports 3-5 days/week)",
-            "Very active (hard exercise/sports 6-7 days/week)",
-            "Extra active (very hard exercise & physical job)"
-        ]
-    )
-
-    # Calculate BMR using Mifflin-St Jeor Equation
-    if gender == "Male":
-        bmr = 10 * weight + 6.25 * height - 5 * age + 5
-    else:
-        bmr = 10 * weight + 6.25 * height - 5 * age - 161
-
-    # Activity multiplier
-    activity_multipliers = {
-        "Sedentary (little or no exercise)": 1.2,
-        "Lightly active (light exercise/sports 1-3 days/week)": 1.375,
-        "Moderately active (moderate exercise/sports 3-5 days/week)": 1.55,
-        "Very active (hard exercise/sports 6-7 days/week)": 1.725,
-        "Extra active (very hard exercise & physical job)": 1.9,
-    }
+    activity = st.selectbox("Activity Level", list(ACTIVITY_MULTIPLIERS))
     # Optional for Katch-McArdle
     body_fat = st.number_input("Body Fat (%) [for Katch-McArdle, optional]", min_value=0.0, max_value=70.0, value=20.0)
 
     # --- BMR Calculations ---
-    def mifflin_st_jeor(weight, height, age, gender):
-        if gender == "Male":
-            return 10 * weight + 6.25 * height - 5 * age + 5
-        else:
-            return 10 * weight + 6.25 * height - 5 * age - 161
+    bmr_msj = float(mifflin_st_jeor(weight, height, age, gender))
+    bmr_hb = float(harris_benedict(weight, height, age, gender))
+    bmr_km = float(katch_mcardle(weight, body_fat)) if body_fat > 0 else None
 
-    def harris_benedict(weight, height, age, gender):
-        if gender == "Male":
-            return 66.47 + (13.75 * weight) + (5.003 * height) - (6.755 * age)
-        else:
-            return 655.1 + (9.563 * weight) + (1.850 * height) - (4.676 * age)
+    # --- TDEE Calculations ---
+    mult = ACTIVITY_MULTIPLIERS[activity]
+    tdee_msj = float(tdee(bmr_msj, mult))
+    tdee_hb = float(tdee(bmr_hb, mult))
+    tdee_km = float(tdee(bmr_km, mult)) if bmr_km else None
 
-    def katch_mcardle(weight, body_fat):
-        lean_mass = weight * (1 - body_fat/100)
-        return 370 + (21.6 * lean_mass)
+    # --- Adaptive TDEE from the logged weight trend ---
+    st.divider()
+    st.markdown("##### Adaptive TDEE from your weight log")
+    tdee_adaptive = None
+    if 'user_data' not in st.session_state:
+        st.caption("Log your weight in the Data Editor to estimate your TDEE from your actual weight trend.")
+    else:
+        log = user_frame()
+        # Rebuilt only after deletes or out-of-order inserts; the Data Editor appends to it
+        estimator = st.session_state.get('tdee_estimator')
+        if estimator is None or estimator.count != len(log):
+            estimator = AdaptiveTdee.from_series(log['date'].values, log['weight'].values)
+            st.session_state['tdee_estimator'] = estimator
 
-    bmr_msj = mifflin_st_jeor(weight, height, age, gender)
-    bmr_hb = harris_benedict(weight, height, age, gender)
-    bmr_km = katch_mcardle(weight, body_fat) if body_fat > 0 else None
+        intake_source = st.radio("Calorie intake", ["Typical daily intake", "Calorie log (CSV)"], horizontal=True)
+        intake = None
+        if intake_source == "Typical daily intake":
+            intake = st.number_input(
+                f"Average daily intake over the last {DEFAULT_WINDOW_DAYS} days (kcal)",
+                min_value=800, max_value=8000, value=2000, step=50
+            )
+        else:
+            calorie_file = st.file_uploader("Calorie log with 'date' and 'calories' columns (one row per day or meal)",
+                                            type=["csv"])
+            if calorie_file is not None:
+                try:
+                    calorie_log = read_calorie_csv(calorie_file)
+                except ValidationError as e:
+                    st.error(f"The calorie log is not valid:\n\n{e}")
+                else:
+                    intake = daily_intake(calorie_log['date'].values, calorie_log['calories'].values)
 
-    # --- TDEE Calculations ---
-    mult = activity_multipliers[activity]
-    tdee_msj = bmr_msj * mult
-    tdee_hb = bmr_hb * mult
-    tdee_km = bmr_km * mult if bmr_km else None
+        estimate = estimator.latest(intake)
+        if estimate is None or np.isnan(estimate['energy_balance']):
+            st.info(f"At least {MIN_WINDOW_WEIGH_INS} weigh-ins spread over the last {DEFAULT_WINDOW_DAYS} days "
+                    "are needed to estimate your TDEE from your weight trend.")
+        else:
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Weight trend", f"{estimate['trend_per_week']:+.2f} kg/week")
+            col2.metric("Energy balance", f"{estimate['energy_balance']:+.0f} kcal/day")
+            if np.isnan(estimate['tdee']):
+                col3.metric("TDEE (Adaptive)", "N/A")
+                st.caption(f"No calories logged in the last {DEFAULT_WINDOW_DAYS} days of your weight log.")
+            else:
+                tdee_adaptive = float(estimate['tdee'])
+                col3.metric("TDEE (Adaptive)", f"{int(tdee_adaptive)} kcal",
+                            f"{tdee_adaptive - tdee_msj:+.0f} vs. Mifflin-St Jeor", delta_color="off")
+            if intake is not None and not np.isscalar(intake):
+                history = estimator.estimates(intake).dropna(subset=['tdee'])
+                if len(history) > 1:
+                    st.line_chart(history.set_index('date')['tdee'], y_label="TDEE (kcal)")
+        st.caption(f"Expenditure = average intake − weight trend × 7700 kcal/kg, over rolling {DEFAULT_WINDOW_DAYS}-day windows.")
 
     # --- Table of Calorie Targets ---
-    deficit_surplus = [-1000, -500, -200, 0, 200, 500, 1000]
     rows = []
-    for adj in deficit_surplus:
+    for adj in CALORIE_ADJUSTMENTS:
         row = {
             "Deficit/Surplus (kcal)": adj,
             "TDEE (Mifflin-St Jeor)": int(tdee_msj + adj),
             "TDEE (Harris-Benedict)": int(tdee_hb + adj),
-            "TDEE (Katch-McArdle)": int(tdee_km + adj) if tdee_km else "N/A"
+            "TDEE (Katch-McArdle)": int(tdee_km + adj) if tdee_km else "N/A",
+            "TDEE (Adaptive)": int(tdee_adaptive + adj) if tdee_adaptive else "N/A"
         }
         rows.append(row)
     df = pd.DataFrame(rows)
@@ -123,7 +146,9 @@ with tab1:
         "Goal": ["Mild weight loss (0.25 kg/week)", "Weight loss (0.5 kg/week)"],
         "Mifflin-St Jeor": [int(tdee_msj - 250), int(tdee_msj - 500)],
         "Harris-Benedict": [int(tdee_hb - 250), int(tdee_hb - 500)],
-        "Katch-McArdle": [int(tdee_km - 250) if tdee_km else "N/A", int(tdee_km - 500) if tdee_km else "N/A"]
+        "Katch-McArdle": [int(tdee_km - 250) if tdee_km else "N/A", int(tdee_km - 500) if tdee_km else "N/A"],
+        "Adaptive": [int(tdee_adaptive - 250) if tdee_adaptive else "N/A",
+                     int(tdee_adaptive - 500) if tdee_adaptive else "N/A"]
     }
     st.markdown("##### Table of Weight Loss Calorie Targets")
     st.table(pd.DataFrame(loss_data))
@@ -133,7 +158,9 @@ with tab1:
         "Goal": ["Mild weight gain (0.25 kg/week)", "Weight gain (0.5 kg/week)"],
         "Mifflin-St Jeor": [int(tdee_msj + 250), int(tdee_msj + 500)],
         "Harris-Benedict": [int(tdee_hb + 250), int(tdee_hb + 500)],
-        "Katch-McArdle": [int(tdee_km + 250) if tdee_km else "N/A", int(tdee_km + 500) if tdee_km else "N/A"]
+        "Katch-McArdle": [int(tdee_km + 250) if tdee_km else "N/A", int(tdee_km + 500) if tdee_km else "N/A"],
+        "Adaptive": [int(tdee_adaptive + 250) if tdee_adaptive else "N/A",
+                     int(tdee_adaptive + 500) if tdee_adaptive else "N/A"]
     }
     st.markdown("##### Table of Weight Gain Calorie Targets")
     st.table(pd.DataFrame(gain_data))
@@ -144,7 +171,32 @@ with tab1:
         "For muscle gain, a surplus (e.g., +200 kcal) is common. "
         "Consult a health professional for personalized advice."
     )
-    
+
+    # --- Sensitivity heatmaps: one broadcasted grid of weight x activity x deficit/surplus ---
+    st.divider()
+    st.markdown("##### Calorie Target Sensitivity")
+    formula = st.selectbox("BMR formula", list(BMR_FORMULAS))
+    grid_weights = np.arange(60, 151)
+    grid_adjustments = np.arange(-1000, 1001, 100)
+    targets, _ = scenario_grid(formula, weight=grid_weights, height=height, age=age, gender=gender, body_fat=body_fat,
+                               activity=list(ACTIVITY_MULTIPLIERS.values()), adjustment=grid_adjustments)
+    if np.isnan(targets).all():
+        st.info("Enter your body fat percentage to use Katch-McArdle.")
+    else:
+        activity_labels = [label.split(" (")[0] for label in ACTIVITY_MULTIPLIERS]
+        col1, col2 = st.columns(2)
+        with col1:
+            adjustment = st.select_slider("Deficit/Surplus (kcal)", options=list(grid_adjustments), value=0)
+            st.plotly_chart(plot_calorie_heatmap(
+                targets[:, :, list(grid_adjustments).index(adjustment)], activity_labels, grid_weights,
+                "Activity Level", f"Calorie target by weight and activity ({adjustment:+d} kcal)"
+            ), use_container_width=True)
+        with col2:
+            st.plotly_chart(plot_calorie_heatmap(
+                targets[:, list(ACTIVITY_MULTIPLIERS).index(activity), :], grid_adjustments, grid_weights,
+                "Deficit/Surplus (kcal)", f"Calorie target by weight and deficit/surplus ({activity.split(' (')[0]})"
+            ), use_container_width=True)
+
 with tab2:
     st.write("Divide your daily calories into protein, carbs, and fats based on your preferences or common recommendations.")
 
@@ -0,0 +1,70 @@
+import hashlib
+
+import streamlit as st
+
+from utils.figure_cache import cached_figure
+from utils.fitnotes import FitNotesIndex, load_fitnotes, load_workout_plan
+from utils.gym_charts import plot_exercise_progress
+from utils.validation import ValidationError
+
+
+@st.cache_resource(show_spinner="Summarizing FitNotes export...")
+def index_export(csv_bytes):
+    # Keyed on the file content: the export is ingested and indexed once, then
+    # every date filter is answered by binary search on the index. The index is
+    # read-only, so every session shares the one instance instead of unpickling a copy per rerun
+    return FitNotesIndex.from_sets(load_fitnotes(csv_bytes))
+
+
+st.set_page_config(layout="wide")
+st.title("🏋️ Fit Notes")
+
+col1, col2 = st.columns(2)
+with col1:
+    plan_file = st.file_uploader("Workout routine (JSON)", type="json")
+with col2:
+    fitnotes_file = st.file_uploader("FitNotes export (CSV)", type="csv")
+
+if plan_file is None or fitnotes_file is None:
+    st.info("Upload your workout routine JSON and your FitNotes CSV export to see your progress.")
+    st.stop()
+try:
+    plan = load_workout_plan(plan_file)
+except ValidationError as e:
+    st.error(f"The workout routine is not valid:\n\n{e}")
+    st.stop()
+if not plan:
+    st.info("The workout routine has no days; add at least one day with its exercises.")
+    st.stop()
+# Figures of the same export are reused across sessions and restarts
+export_version = hashlib.blake2b(fitnotes_file.getvalue(), digest_size=16).hexdigest()
+try:
+    index = index_export(fitnotes_file.getvalue())
+except ValidationError as e:
+    st.error(f"The FitNotes export is not valid:\n\n{e}")
+    st.stop()
+if index.summary.empty:
+    st.warning("The FitNotes export has no sets with reps.")
+    st.stop()
+
+first_date, last_date = index.date_bounds()
+date_range = st.date_input("Date range", value=(first_date, last_date), min_value=first_date, max_value=last_date)
+start, end = (date_range[0], date_range[-1]) if len(date_range) > 0 else (first_date, last_date)
+
+for day, tab in zip(plan, st.tabs(list(plan))):
+    with tab:
+        for exercise in plan[day]:
+            sessions = index.sessions(exercise, start, end)
+            if sessions.empty:
+                st.caption(f"No sessions of **{exercise}** in this date range.")
+                continue
+            latest = sessions.iloc[-1]
+            totals = index.totals(exercise, start, end)
+            metric1, metric2, metric3, metric4 = st.columns(4)
+            metric1.metric("Estimated 1RM", f"{latest['Est_1RM']:.1f} kg")
+            metric2.metric("Tonnage (last session)", f"{latest['Tonnage']:.0f} kg")
+            metric3.metric("Sessions with progressive overload", f"{int(sessions['Overload'].sum())} / {len(sessions)}")
+            metric4.metric("Sets / tonnage in range", f"{totals['sets']:.0f} / {totals['tonnage']:.0f} kg")
+            fig = cached_figure('exercise_progress', {'exercise': exercise, 'start': str(start), 'end': str(end)},
+                                export_version, lambda: plot_exercise_progress(sessions, exercise))
+            st.plotly_chart(fig, use_container_width=True, key=f"{day}-{exercise}")
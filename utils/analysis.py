@@ -0,0 +1,243 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from utils.charts import (WEEKLY_TABLE_PAGE_SIZE, plot_day_of_week_bar, plot_month_bar, plot_seasonality_bar,
+                          plot_weekly_average_weight, plot_weekly_table, plot_weight_progression)
+from utils.downsampling import DEFAULT_MAX_POINTS
+from utils.memory import deep_sizeof
+from utils.profiling import stage
+from utils.data_utils import (as_datetime64, compute_ewma, compute_time_moving_average, compute_trend,
+                              compute_weekly_averages, elapsed_days, mean_weekly_change)
+from utils.figure_cache import cached_figure
+from utils.forecast import forecast_goal
+from utils.seasonality import compute_seasonality
+from utils.weight_series import WeightSeries
+
+# Shared by every session on the server; each entry holds one dataset's results
+MAX_CACHED_ANALYSES = 32
+MAX_CACHED_FORECASTS = 64
+DEFAULT_EWMA_HALFLIFE_DAYS = 7
+
+_cache = OrderedDict()
+_forecasts = OrderedDict()
+_cache_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+
+def dataset_fingerprint(df):
+    """
+    Cheap content hash of the date and weight columns of a weight DataFrame.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    dates = as_datetime64(df['date'].values)
+    digest.update(np.ascontiguousarray(dates).view(np.int64).tobytes())
+    digest.update(np.ascontiguousarray(df['weight'].values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def compute_analysis(df, stats=None, ewma_halflife_days=DEFAULT_EWMA_HALFLIFE_DAYS, data_version=None):
+    """
+    Run every Analysis page computation on a weight DataFrame.
+
+    Figures come from the on-disk figure cache when they were built for the
+    same data before, e.g. by another session or before a restart.
+
+    Args:
+        df (pd.DataFrame): Data with 'date' and 'weight' columns. It is not modified.
+        stats (IncrementalWeightStats, optional): Running statistics kept in
+            sync with df; used instead of recomputing the moving average and trend.
+        ewma_halflife_days (float): Half-life of the exponentially weighted average.
+        data_version (str, optional): dataset_fingerprint(df), if already known.
+
+    Returns:
+        dict: Series, statistics and figures used by the Analysis page tabs.
+    """
+    # Sorted zero-copy views; unsorted data (e.g. an older date added last) is sorted once here
+    with stage('sort'):
+        series = WeightSeries.from_frame(df)
+        dates = series.dates
+        weights = series.weights
+        days = elapsed_days(dates)
+
+    with stage('weekly averages'):
+        week_labels, weekly_means, weekly_diffs = compute_weekly_averages(df)
+    with stage('moving averages and trend'):
+        if stats is not None and stats.count == len(weights) and stats.count > 0:
+            moving_avg_dates, moving_avg = stats.moving_average()
+            trend = stats.trend()
+        else:
+            moving_avg_dates, moving_avg = compute_time_moving_average(dates, weights, 7)
+            trend = compute_trend(dates, weights)
+        smoothed_lines = [
+            ('30-day Moving Average', *compute_time_moving_average(dates, weights, 30)),
+            (f'EWMA ({ewma_halflife_days:g}-day half-life)', *compute_ewma(dates, weights, ewma_halflife_days)),
+        ]
+    with stage('seasonality'):
+        seasonality = compute_seasonality(dates, weights)
+
+    if data_version is None:
+        data_version = dataset_fingerprint(df)
+    with stage('figure: progression'):
+        fig_progression = cached_figure(
+            'progression', {'ewma_halflife_days': ewma_halflife_days, 'max_points': DEFAULT_MAX_POINTS}, data_version,
+            lambda: plot_weight_progression(dates, weights, moving_avg_dates, moving_avg, trend, days, smoothed_lines,
+                                            max_points=DEFAULT_MAX_POINTS))
+    with stage('figure: weekly average'):
+        fig_weekly_average = cached_figure('weekly_average', {}, data_version,
+                                           lambda: plot_weekly_average_weight(week_labels, weekly_means))
+    with stage('figure: weekly table'):
+        fig_weekly_table = weekly_table_figure(week_labels, weekly_means, weekly_diffs, 0, data_version)
+    with stage('figure: seasonality'):
+        fig_dow = cached_figure('day_of_week', {}, data_version,
+                                lambda: plot_day_of_week_bar(seasonality['weekday'])[0])
+        fig_month = cached_figure('month', {}, data_version, lambda: plot_month_bar(seasonality['month'])[0])
+        fig_week_of_year = cached_figure('week_of_year', {}, data_version, lambda: plot_seasonality_bar(
+            seasonality['week_of_year'], 'ISO Week', "Average Weight Change by Week of Year")[0])
+        fig_day_of_month = cached_figure('day_of_month', {}, data_version, lambda: plot_seasonality_bar(
+            seasonality['day_of_month'], 'Day of Month', "Average Weight Change by Day of Month")[0])
+    return {
+        'data_version': data_version,
+        'ewma_halflife_days': ewma_halflife_days,
+        'dates': dates,
+        'weights': weights,
+        'days': days,
+        'week_labels': week_labels,
+        'weekly_means': weekly_means,
+        'weekly_diffs': weekly_diffs,
+        'moving_avg': moving_avg,
+        'moving_avg_dates': moving_avg_dates,
+        'trend': trend,
+        'total_loss': weights[0] - weights[-1] if len(weights) > 0 else 0,
+        'avg_weekly_loss': mean_weekly_change(weekly_diffs),
+        # The mean change per bucket, as plot_day_of_week_bar and plot_month_bar return it
+        'day_avg': seasonality['weekday']['mean'],
+        'month_avg': seasonality['month']['mean'],
+        'smoothed_lines': smoothed_lines,
+        'fig_progression': fig_progression,
+        'fig_weekly_average': fig_weekly_average,
+        'fig_weekly_table': fig_weekly_table,
+        'fig_day_of_week': fig_dow,
+        'fig_month': fig_month,
+        'seasonality': seasonality,
+        'fig_week_of_year': fig_week_of_year,
+        'fig_day_of_month': fig_day_of_month,
+    }
+
+
+def weekly_table_figure(week_labels, weekly_means, weekly_diffs, page, data_version):
+    """
+    One page of the weekly table, through the figure cache.
+    """
+    return cached_figure('weekly_table', {'page': page, 'page_size': WEEKLY_TABLE_PAGE_SIZE}, data_version,
+                         lambda: plot_weekly_table(week_labels, weekly_means, weekly_diffs, page=page,
+                                                   page_size=WEEKLY_TABLE_PAGE_SIZE)[0])
+
+
+def zoomed_progression_figure(analysis, x_range):
+    """
+    The progression chart restricted to x_range = (start, end), through the figure cache.
+    """
+    params = {'ewma_halflife_days': analysis['ewma_halflife_days'], 'max_points': DEFAULT_MAX_POINTS,
+              'x_range': [str(bound) for bound in x_range]}
+    return cached_figure('progression', params, analysis['data_version'], lambda: plot_weight_progression(
+        analysis['dates'], analysis['weights'], analysis['moving_avg_dates'], analysis['moving_avg'],
+        analysis['trend'], analysis['days'], analysis['smoothed_lines'], max_points=DEFAULT_MAX_POINTS,
+        x_range=x_range))
+
+
+def _analysis_key(df, ewma_halflife_days):
+    with stage('fingerprint'):
+        return dataset_fingerprint(df), ewma_halflife_days
+
+
+def cached_analysis(df, ewma_halflife_days=DEFAULT_EWMA_HALFLIFE_DAYS):
+    """
+    Return the cached analysis results for df, or None without computing them.
+    """
+    key = _analysis_key(df, ewma_halflife_days)
+    with _cache_lock:
+        if key not in _cache:
+            return None
+        _cache.move_to_end(key)
+        _counters['hits'] += 1
+        return _cache[key]
+
+
+def get_analysis(df, stats=None, ewma_halflife_days=DEFAULT_EWMA_HALFLIFE_DAYS):
+    """
+    Return the analysis results for df, computing them only on a cache miss.
+    """
+    key = _analysis_key(df, ewma_halflife_days)
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _counters['hits'] += 1
+            return _cache[key]
+        _counters['misses'] += 1
+
+    result = compute_analysis(df, stats, ewma_halflife_days, data_version=key[0])
+    with _cache_lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > MAX_CACHED_ANALYSES:
+            _cache.popitem(last=False)
+            _counters['evictions'] += 1
+    return result
+
+
+def get_goal_forecast(current_weight, target_weight, weekly_changes):
+    """
+    forecast_goal with its default settings, cached on the inputs.
+
+    The simulation is seeded, so the same weights and weekly changes always
+    give the same forecast and reruns of the Analysis page reuse it.
+    """
+    weekly_changes = np.asarray(weekly_changes, dtype=np.float64)
+    changes_digest = hashlib.blake2b(weekly_changes.tobytes(), digest_size=16).hexdigest()
+    key = (float(current_weight), float(target_weight), changes_digest)
+    with _cache_lock:
+        if key in _forecasts:
+            _forecasts.move_to_end(key)
+            return _forecasts[key]
+
+    forecast = forecast_goal(current_weight, target_weight, weekly_changes)
+    with _cache_lock:
+        _forecasts[key] = forecast
+        while len(_forecasts) > MAX_CACHED_FORECASTS:
+            _forecasts.popitem(last=False)
+    return forecast
+
+
+def invalidate_analysis(df=None):
+    """
+    Drop the cached results for df, or every cached result when df is None.
+    """
+    with _cache_lock:
+        if df is None:
+            _counters['invalidations'] += len(_cache)
+            _cache.clear()
+        else:
+            fingerprint = dataset_fingerprint(df)
+            for key in [key for key in _cache if key[0] == fingerprint]:
+                del _cache[key]
+                _counters['invalidations'] += 1
+
+
+def analysis_cache_stats():
+    """
+    Hit/miss counters and current size of the analysis cache.
+    """
+    with _cache_lock:
+        return dict(_counters, size=len(_cache), max_size=MAX_CACHED_ANALYSES)
+
+
+def analysis_cache_nbytes():
+    """
+    Approximate memory held by the cached analyses, shared by every session.
+    """
+    with _cache_lock:
+        entries = list(_cache.values())
+    return deep_sizeof(entries)
@@ -0,0 +1,101 @@
+import numpy as np
+
+ACTIVITY_MULTIPLIERS = {
+    "Sedentary (little or no exercise)": 1.2,
+    "Lightly active (light exercise/sports 1-3 days/week)": 1.375,
+    "Moderately active (moderate exercise/sports 3-5 days/week)": 1.55,
+    "Very active (hard exercise/sports 6-7 days/week)": 1.725,
+    "Extra active (very hard exercise & physical job)": 1.9,
+}
+# Daily calorie deficit/surplus rows of the calorie target table
+CALORIE_ADJUSTMENTS = (-1000, -500, -200, 0, 200, 500, 1000)
+# Order of the axes of scenario_grid
+GRID_PARAMETERS = ('weight', 'height', 'age', 'gender', 'body_fat', 'activity', 'adjustment')
+_GRID_DEFAULTS = {'body_fat': 0, 'adjustment': 0}
+
+
+def _is_male(gender):
+    return np.asarray(gender) == "Male"
+
+
+def mifflin_st_jeor(weight, height, age, gender):
+    """
+    BMR in kcal/day by the Mifflin-St Jeor equation.
+
+    All arguments broadcast: scalars or NumPy arrays of weight (kg), height
+    (cm), age (years) and gender ("Male" or "Female").
+    """
+    return 10 * np.asarray(weight) + 6.25 * np.asarray(height) - 5 * np.asarray(age) + np.where(_is_male(gender), 5, -161)
+
+
+def harris_benedict(weight, height, age, gender):
+    """
+    BMR in kcal/day by the revised Harris-Benedict equation; arguments broadcast like mifflin_st_jeor.
+    """
+    male = _is_male(gender)
+    weight, height, age = np.asarray(weight), np.asarray(height), np.asarray(age)
+    return np.where(male,
+                    66.47 + 13.75 * weight + 5.003 * height - 6.755 * age,
+                    655.1 + 9.563 * weight + 1.850 * height - 4.676 * age)
+
+
+def katch_mcardle(weight, body_fat):
+    """
+    BMR in kcal/day from lean mass; NaN where body_fat (%) is not positive.
+    """
+    body_fat = np.asarray(body_fat, dtype=np.float64)
+    lean_mass = np.asarray(weight) * (1 - body_fat / 100)
+    return np.where(body_fat > 0, 370 + 21.6 * lean_mass, np.nan)
+
+
+BMR_FORMULAS = {
+    "Mifflin-St Jeor": lambda weight, height, age, gender, body_fat: mifflin_st_jeor(weight, height, age, gender),
+    "Harris-Benedict": lambda weight, height, age, gender, body_fat: harris_benedict(weight, height, age, gender),
+    "Katch-McArdle": lambda weight, height, age, gender, body_fat: katch_mcardle(weight, body_fat),
+}
+
+
+def tdee(bmr, activity):
+    """
+    TDEE in kcal/day from a BMR and an activity multiplier (see ACTIVITY_MULTIPLIERS), broadcasting.
+    """
+    return np.asarray(bmr) * np.asarray(activity)
+
+
+def calorie_targets(weight, height, age, gender, activity, adjustment=0, body_fat=0, formula="Mifflin-St Jeor"):
+    """
+    Daily calorie target: TDEE by formula plus a deficit (negative) or surplus adjustment.
+
+    All numeric arguments and gender broadcast against each other.
+
+    Returns:
+        np.ndarray: kcal/day, NaN where the formula is undefined (Katch-McArdle without body fat).
+    """
+    bmr = BMR_FORMULAS[formula](weight, height, age, gender, body_fat)
+    return tdee(bmr, activity) + np.asarray(adjustment)
+
+
+def scenario_grid(formula="Mifflin-St Jeor", **parameters):
+    """
+    Calorie targets for every combination of the given parameter values, in one broadcasted call.
+
+    Each parameter of GRID_PARAMETERS passed as a sequence becomes one grid
+    axis, in GRID_PARAMETERS order; scalars are held fixed. For example
+    scenario_grid(weight=np.arange(60, 151), activity=list(ACTIVITY_MULTIPLIERS.values()),
+    adjustment=CALORIE_ADJUSTMENTS, height=180, age=30, gender="Male") is a
+    (91, 5, 7) array.
+
+    Returns:
+        tuple: (targets np.ndarray, list of the parameter names along its axes)
+    """
+    unknown = set(parameters) - set(GRID_PARAMETERS)
+    missing = [name for name in GRID_PARAMETERS if name not in parameters and name not in _GRID_DEFAULTS]
+    if unknown or missing:
+        raise ValueError(f"Unknown grid parameters: {sorted(unknown)}, missing: {missing}")
+    values = {**_GRID_DEFAULTS, **parameters}
+    axes = [name for name in GRID_PARAMETERS if np.ndim(values[name]) == 1]
+    for i, name in enumerate(axes):
+        shape = [1] * len(axes)
+        shape[i] = -1
+        values[name] = np.asarray(values[name]).reshape(shape)
+    return calorie_targets(formula=formula, **values), axes
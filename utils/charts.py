@@ -1,14 +1,57 @@
-import plotly.graph_objects as go
-import plotly.express as px
-from plotly.colors import sample_colorscale
+import numpy as np
 
-def plot_weight_progression(dates, weights, moving_avg_dates, moving_avg, trend, days):
+from utils.data_utils import mean_weekly_change
+from utils.downsampling import downsample, slice_range
+
+# Plotly is imported inside the functions: plotly.express alone takes ~0.4 s
+# to import, and pages importing this module (via utils.analysis) should not
+# pay for it before a chart is drawn.
+
+
+def _visible_line(x, y, x_range, max_points, method='lttb'):
+    x, y = slice_range(x, y, x_range=x_range)
+    if max_points is not None:
+        x, y = downsample(x, y, max_points, method)
+    return x, y
+
+
+def plot_weight_progression(dates, weights, moving_avg_dates, moving_avg, trend, days, smoothed_lines=None,
+                            max_points=None, x_range=None):
+    """
+    Daily weight with moving averages and the linear trend.
+
+    Args:
+        max_points (int, optional): Downsample each line to about this many
+            points (see utils.downsampling); None keeps every point.
+        x_range (tuple, optional): (start, end) dates to restrict the chart
+            to, so zooming in refines the downsampled detail.
+
+    Returns:
+        go.Figure: Plotly figure object.
+    """
     import plotly.graph_objects as go
+    if max_points is not None or x_range is not None:
+        order = np.argsort(dates, kind='stable')
+        dates, weights, days = np.asarray(dates)[order], np.asarray(weights)[order], np.asarray(days)[order]
+        visible_dates, visible_days = slice_range(dates, days, x_range=x_range)
+        dates, weights = _visible_line(dates, weights, x_range, max_points)
+        moving_avg_dates, moving_avg = _visible_line(moving_avg_dates, moving_avg, x_range, max_points)
+        smoothed_lines = [(name, *_visible_line(line_dates, values, x_range, max_points))
+                          for name, line_dates, values in smoothed_lines or []]
+        # A straight line only needs its two visible endpoints
+        endpoints = [0, -1] if len(visible_dates) > 0 else []
+        trend_dates, trend_days = visible_dates[endpoints], visible_days[endpoints]
+    else:
+        trend_dates, trend_days = dates, days
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=dates, y=weights, mode='lines+markers', name='Daily Weight'))
     if len(moving_avg) > 0:
         fig.add_trace(go.Scatter(x=moving_avg_dates, y=moving_avg, mode='lines', name='7-day Moving Average'))
-    fig.add_trace(go.Scatter(x=dates, y=trend(days), mode='lines', name='Linear Trend', line=dict(dash='dash')))
+    # Optional (name, dates, values) lines such as longer averages or an EWMA
+    for name, line_dates, values in smoothed_lines or []:
+        if len(values) > 0:
+            fig.add_trace(go.Scatter(x=line_dates, y=values, mode='lines', name=name, visible='legendonly'))
+    fig.add_trace(go.Scatter(x=trend_dates, y=trend(trend_days), mode='lines', name='Linear Trend', line=dict(dash='dash')))
     fig.update_yaxes(title_text="Weight (kg)")
     fig.update_layout(height=600, width=1200, showlegend=True)
     return fig
@@ -24,6 +67,7 @@ def plot_weekly_average_weight(week_labels, weekly_means):
     Returns:
         go.Figure: Plotly figure object.
     """
+    import plotly.graph_objects as go
     fig = go.Figure()
     fig.add_trace(go.Scatter(
         x=week_labels,
@@ -44,42 +88,91 @@ def plot_weekly_average_weight(week_labels, weekly_means):
     )
     return fig
 
-def plot_weekly_table(week_labels, weekly_means, weekly_diffs):
-    # Use all valid weekly changes (loss and gain)
-    valid_weekly_changes = [d for d in weekly_diffs if d is not None]
-    avg_weekly_change = sum(valid_weekly_changes) / len(valid_weekly_changes) if valid_weekly_changes else None
+DARK_GREEN_START = 0.3
+NEUTRAL_CELL_COLOR = '#2D333B'
+GAIN_CELL_COLOR = 'rgb(178,34,34)'
+WEEKLY_TABLE_PAGE_SIZE = 26
+
+
+def _sample_colorscale_array(name, values):
+    """
+    Vectorized plotly.colors.sample_colorscale for an array of points in [0, 1].
+    """
+    from plotly.colors import get_colorscale, unlabel_rgb
+    stops = get_colorscale(name)
+    positions = np.array([position for position, _ in stops])
+    channels = np.array([unlabel_rgb(color) for _, color in stops], dtype=np.float64)
+    # np.rint rounds half to even, like plotly
+    rgb = np.rint(np.column_stack([np.interp(values, positions, channels[:, i]) for i in range(3)])).astype(np.int64)
+    return [f"rgb({r}, {g}, {b})" for r, g, b in rgb.tolist()]
 
-    # For coloring, still extract negative diffs for color scale
-    negative_diffs = [d for d in valid_weekly_changes if d < 0]
-    min_loss = min(negative_diffs) if negative_diffs else -1
-    max_loss = max(negative_diffs) if negative_diffs else -0.1
 
+def _loss_range(diffs):
+    negative_diffs = diffs[diffs < 0]
+    if len(negative_diffs) == 0:
+        return -1, -0.1
+    return negative_diffs.min(), negative_diffs.max()
 
-    DARK_GREEN_START = 0.3
 
-    def normalize(val):
+def weekly_diff_colors(diffs, loss_range=None):
+    """
+    Cell colors for weekly differences: greens scaled by loss size, red for gains.
+
+    Args:
+        diffs (np.ndarray): Weekly differences, NaN where there is none.
+        loss_range (tuple, optional): (largest loss, smallest loss) the green
+            scale spans; defaults to the range found in diffs.
+
+    Returns:
+        np.ndarray: One color string per difference.
+    """
+    min_loss, max_loss = loss_range or _loss_range(diffs)
+    negative = diffs < 0
+    colors = np.full(len(diffs), NEUTRAL_CELL_COLOR, dtype=object)
+    colors[diffs > 0] = GAIN_CELL_COLOR
+    if negative.any():
         if min_loss == max_loss:
-            return 1.0
-        return (val - max_loss) / (min_loss - max_loss)
-
-    def get_color(diff):
-        if diff is None:
-            return '#2D333B'  # default gray
-        elif diff < 0:
-            norm_val = normalize(diff)
-            mapped_val = DARK_GREEN_START + (1 - DARK_GREEN_START) * norm_val
-            color = sample_colorscale("Greens", mapped_val)[0]
-            return color
-        elif diff > 0:
-            return 'rgb(178,34,34)'  # red for gain
+            norm = np.ones(negative.sum())
         else:
-            return '#2D333B'  # gray for no change or first row
+            norm = (diffs[negative] - max_loss) / (min_loss - max_loss)
+        colors[negative] = _sample_colorscale_array("Greens", DARK_GREEN_START + (1 - DARK_GREEN_START) * norm)
+    return colors
+
+
+def plot_weekly_table(week_labels, weekly_means, weekly_diffs, page=0, page_size=None):
+    """
+    Table of weekly averages with color-coded week-over-week differences.
+
+    Statistics and the color scale use every week; only the rows of the
+    requested page are formatted and serialized into the figure.
+
+    Args:
+        week_labels (list): Labels for each week.
+        weekly_means (list): Average weight for each week.
+        weekly_diffs (list): Difference from the previous week (None for the first).
+        page (int): Zero-based page to render.
+        page_size (int, optional): Weeks per page; None renders every week.
+
+    Returns:
+        tuple: (go.Figure, average weekly change or None)
+    """
+    import plotly.graph_objects as go
+    means = np.asarray(weekly_means, dtype=np.float64)
+    diffs = np.array(weekly_diffs, dtype=np.float64)  # None becomes NaN
+    valid = ~np.isnan(diffs)
+    # Use all valid weekly changes (loss and gain)
+    avg_weekly_change = mean_weekly_change(diffs)
+    loss_range = _loss_range(diffs)
+
+    if page_size is not None:
+        rows = slice(page * page_size, (page + 1) * page_size)
+        week_labels, means, diffs, valid = week_labels[rows], means[rows], diffs[rows], valid[rows]
+    colors = weekly_diff_colors(diffs, loss_range)
 
     n_rows = len(week_labels)
-    col1_colors = ['#2D333B'] * n_rows
-    col2_colors = ['#2D333B'] * n_rows
-    col3_colors = [get_color(d) for d in weekly_diffs]
-    cell_colors = [col1_colors, col2_colors, col3_colors]
+    mean_labels = np.char.mod('%.3f', means) if n_rows else np.array([], dtype=str)
+    diff_labels = np.where(valid, np.char.mod('%+.3f', np.nan_to_num(diffs)), '--') if n_rows else np.array([], dtype=str)
+    cell_colors = [[NEUTRAL_CELL_COLOR] * n_rows, [NEUTRAL_CELL_COLOR] * n_rows, colors.tolist()]
 
     header = dict(
         values=["Week", "Average Weight (kg)", "Difference from Previous (kg)"],
@@ -88,53 +181,120 @@ def plot_weekly_table(week_labels, weekly_means, weekly_diffs):
         font=dict(size=12)
     )
     cells = dict(
-        values=[
-            week_labels,
-            [f"{m:.3f}" for m in weekly_means],
-            ["--" if d is None else f"{d:+.3f}" for d in weekly_diffs]
-        ],
+        values=[list(week_labels), mean_labels.tolist(), diff_labels.tolist()],
         fill_color=cell_colors,
         align='center',
         font=dict(size=13)
     )
     fig = go.Figure(data=[go.Table(header=header, cells=cells)])
     fig.update_layout(
-        height=1200,
+        # Grow with the rows shown instead of a fixed height
+        height=min(1200, 220 + 30 * n_rows),
         width=800,
         margin=dict(l=80, r=80, t=100, b=80)
     )
     return fig, avg_weekly_change
 
-def plot_day_of_week_bar(df):
-    df['day_of_week'] = df['date'].dt.day_name()
-    df['weight_diff'] = df['weight'].diff()
-    day_avg = df.groupby('day_of_week')['weight_diff'].mean().reindex([
-        'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'
-    ])
-    fig = px.bar(
-        x=day_avg.index,
-        y=day_avg.values,
-        labels={'x': 'Day of Week', 'y': 'Average Weight Change (kg)'},
-        title="Average Weight Change by Day of Week",
-        color=day_avg.values,
-        color_continuous_scale="Blues"
-    )
-    return fig, day_avg
-
-def plot_month_bar(df):
-    df['month'] = df['date'].dt.month_name()
-    df['weight_diff'] = df['weight'].diff()
-    months_order = [
-        'January', 'February', 'March', 'April', 'May', 'June',
-        'July', 'August', 'September', 'October', 'November', 'December'
-    ]
-    month_avg = df.groupby('month')['weight_diff'].mean().reindex(months_order)
+def plot_seasonality_bar(bucket_stats, x_label, title):
+    """
+    Bar chart of the mean weight change per calendar bucket with 95% CI error bars.
+
+    Args:
+        bucket_stats (pd.DataFrame): One bucket table from compute_seasonality.
+        x_label (str): Axis label for the buckets.
+        title (str): Chart title.
+
+    Returns:
+        tuple: (go.Figure, pd.Series of mean change per bucket)
+    """
+    import plotly.express as px
+    bucket_avg = bucket_stats['mean']
     fig = px.bar(
-        x=month_avg.index,
-        y=month_avg.values,
-        labels={'x': 'Month', 'y': 'Average Weight Change (kg)'},
-        title="Average Weight Change by Month",
-        color=month_avg.values,
+        x=bucket_avg.index,
+        y=bucket_avg.values,
+        error_y=(bucket_stats['ci_high'] - bucket_avg).values,
+        labels={'x': x_label, 'y': 'Average Weight Change (kg)'},
+        title=title,
+        color=bucket_avg.values,
         color_continuous_scale="Blues"
     )
-    return fig, month_avg
\ No newline at end of file
+    return fig, bucket_avg
+
+def plot_day_of_week_bar(day_stats):
+    return plot_seasonality_bar(day_stats, 'Day of Week', "Average Weight Change by Day of Week")
+
+def plot_month_bar(month_stats):
+    return plot_seasonality_bar(month_stats, 'Month', "Average Weight Change by Month")
+
+def plot_goal_fan_chart(start_date, fan_weeks, fan, target_weight, goal_weeks=None):
+    """
+    Fan chart of simulated weight trajectories towards a goal.
+
+    Args:
+        start_date (np.datetime64): Date of week 0.
+        fan_weeks (np.ndarray): Weeks from start_date, one per fan point.
+        fan (dict): Quantile -> weight per week, as returned by forecast_goal;
+            the outer quantiles form the widest band.
+        target_weight (float): Goal weight, drawn as a horizontal line.
+        goal_weeks (dict, optional): Quantile -> weeks to goal, marked as
+            vertical lines where finite.
+
+    Returns:
+        go.Figure: Plotly figure object.
+    """
+    import plotly.graph_objects as go
+    dates = np.datetime64(start_date, 'D') + (np.asarray(fan_weeks) * 7).astype('timedelta64[D]')
+    quantiles = sorted(fan)
+    fig = go.Figure()
+    # Nested bands from the outside in, each drawn as an upper line filled down to its lower line
+    for i in range(len(quantiles) // 2):
+        low, high = quantiles[i], quantiles[-1 - i]
+        label = f"P{low * 100:.0f}-P{high * 100:.0f}"
+        fig.add_trace(go.Scatter(x=dates, y=fan[high], mode='lines', line=dict(width=0),
+                                 legendgroup=label, showlegend=False, hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=dates, y=fan[low], mode='lines', line=dict(width=0), fill='tonexty',
+                                 fillcolor=f'rgba(31,119,180,{0.15 + 0.15 * i:.2f})', name=label,
+                                 legendgroup=label, hoverinfo='skip'))
+    if len(quantiles) % 2:
+        median = quantiles[len(quantiles) // 2]
+        fig.add_trace(go.Scatter(x=dates, y=fan[median], mode='lines', name=f"P{median * 100:.0f}",
+                                 line=dict(color='rgb(31,119,180)'),
+                                 hovertemplate='%{x}<br>%{y:.1f} kg<extra></extra>'))
+    fig.add_hline(y=target_weight, line_dash='dash', line_color='green',
+                  annotation_text=f"Target {target_weight:g} kg")
+    for quantile, weeks in sorted((goal_weeks or {}).items()):
+        if np.isfinite(weeks):
+            goal_date = np.datetime64(start_date, 'D') + np.timedelta64(int(round(weeks * 7)), 'D')
+            # add_vline cannot place annotations on date axes, so the label is a separate annotation
+            fig.add_shape(type='line', x0=goal_date, x1=goal_date, y0=0, y1=1, yref='paper',
+                          line=dict(color='gray', dash='dot'))
+            fig.add_annotation(x=goal_date, y=1, yref='paper', text=f"P{quantile * 100:.0f}",
+                               showarrow=False, yanchor='bottom')
+    fig.update_yaxes(title_text="Weight (kg)")
+    fig.update_layout(height=500, width=1200, showlegend=True)
+    return fig
+
+def plot_calorie_heatmap(targets, x, weights, x_label, title):
+    """
+    Heatmap of calorie targets with body weight on the y axis.
+
+    Args:
+        targets (np.ndarray): kcal/day, one row per weight and one column per x value.
+        x (list): Column labels, e.g. activity levels or deficits.
+        weights (np.ndarray): Body weight of each row (kg).
+        x_label (str): Axis label for the columns.
+        title (str): Chart title.
+
+    Returns:
+        go.Figure: Plotly figure object.
+    """
+    import plotly.graph_objects as go
+    fig = go.Figure(go.Heatmap(
+        z=np.round(targets), x=list(x), y=weights, colorscale='Viridis',
+        colorbar=dict(title='kcal/day'),
+        hovertemplate=f'{x_label}: %{{x}}<br>Weight: %{{y}} kg<br>Target: %{{z:.0f}} kcal<extra></extra>'
+    ))
+    fig.update_xaxes(title_text=x_label, type='category' if isinstance(x[0], str) else None)
+    fig.update_yaxes(title_text="Weight (kg)")
+    fig.update_layout(title=title, height=600)
+    return fig
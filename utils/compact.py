@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import sort_by_date
+from utils.seasonality import MONTH_NAMES, WEEKDAY_NAMES, calendar_codes
+
+class CompactWeights:
+    """
+    Session-resident weight data: int32 day numbers and float64 weights.
+
+    Twelve bytes per measurement instead of a DataFrame with datetime64,
+    float64 and string columns. Weights keep full precision, so the session,
+    the store and the CSV export always hold the same values. A second-of-day
+    int32 array is kept only if some measurement is not at midnight. Calendar
+    fields (weekday, month, weight difference) are derived on demand instead
+    of stored, and the timestamps are rebuilt per script run by dates().
+    """
+
+    __slots__ = ('days', 'seconds', 'weights')
+
+    def __init__(self, days, weights, seconds=None):
+        self.days = days
+        self.weights = weights
+        self.seconds = seconds
+
+    @classmethod
+    def from_arrays(cls, dates, weights):
+        """
+        Compact a series, sorting it by date first.
+        """
+        if len(dates) == 0:
+            dates, weights = np.array([], dtype='datetime64[ns]'), np.array([], dtype=np.float64)
+        dates, weights = sort_by_date(dates, weights)
+        days = dates.astype('datetime64[D]')
+        seconds = ((dates - days) // np.timedelta64(1, 's')).astype(np.int32)
+        return cls(days.view(np.int64).astype(np.int32), weights.astype(np.float64),
+                   seconds if seconds.any() else None)
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Compact the 'date' and 'weight' columns of df; every other column is dropped.
+        """
+        return cls.from_arrays(df['date'].values, df['weight'].values)
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def nbytes(self):
+        return self.days.nbytes + self.weights.nbytes + (self.seconds.nbytes if self.seconds is not None else 0)
+
+    def dates(self):
+        """
+        Measurement timestamps as datetime64[ns].
+        """
+        dates = self.days.astype('datetime64[D]').astype('datetime64[ns]')
+        if self.seconds is not None:
+            dates = dates + self.seconds.astype('timedelta64[s]')
+        return dates
+
+    def weights64(self):
+        """
+        Weights as a float64 copy.
+        """
+        return self.weights.copy()
+
+    def calendar_fields(self):
+        """
+        Derived per-row fields of the original CSV layout, computed on demand.
+
+        Returns:
+            dict: 'day_of_week' and 'month' names and 'weight_diff' (difference
+            to the previous row, NaN first).
+        """
+        codes = calendar_codes(self.days.astype(np.int64))
+        weights = self.weights64()
+        weight_diff = np.empty_like(weights)
+        weight_diff[:1] = np.nan
+        weight_diff[1:] = np.diff(weights)
+        return {
+            'day_of_week': np.asarray(WEEKDAY_NAMES)[codes['weekday']],
+            'month': np.asarray(MONTH_NAMES)[codes['month']],
+            'weight_diff': weight_diff,
+        }
+
+    def to_frame(self, calendar=False):
+        """
+        Materialize a 'date'/'weight' DataFrame, optionally with the calendar fields.
+        """
+        df = pd.DataFrame({'date': self.dates(), 'weight': self.weights64()})
+        if calendar:
+            fields = self.calendar_fields()
+            df['day_of_week'] = fields['day_of_week']
+            df['weight_diff'] = fields['weight_diff']
+            df['month'] = fields['month']
+        return df
@@ -1,20 +1,154 @@
+from typing import NamedTuple
+
 import numpy as np
 import pandas as pd
-from collections import defaultdict
+
+# np.add.reduce sums runs shorter than this sequentially and switches to
+# pairwise/unrolled summation above it. Aggregation mirrors that split so the
+# vectorized means are bit-for-bit identical to np.mean over each group.
+_SEQUENTIAL_SUM_LIMIT = 8
+
+
+class PeriodStats(NamedTuple):
+    """Per-period aggregates returned by aggregate_periods (all arrays are aligned)."""
+    keys: np.ndarray
+    labels: list
+    means: np.ndarray
+    counts: np.ndarray
+    mins: np.ndarray
+    maxs: np.ndarray
+    diffs: np.ndarray
+
+
+def as_datetime64(dates):
+    """
+    View dates as a datetime64[ns] array, parsing only when they are not datetimes already.
+    """
+    dates = np.asarray(dates)
+    if dates.dtype.kind == 'M':
+        return dates.astype('datetime64[ns]', copy=False)
+    return pd.to_datetime(dates).values
+
+
+def iso_year_week(dates):
+    """
+    Vectorized ISO-8601 calendar year and week number for a datetime64 array.
+
+    Returns:
+        tuple: (iso_year, iso_week) as int64 arrays.
+    """
+    return iso_year_week_from_day_numbers(day_numbers(dates))
+
+
+def day_numbers(dates):
+    """
+    Whole days since 1970-01-01 for an array of dates.
+    """
+    return as_datetime64(dates).astype('datetime64[D]').astype(np.int64)
+
+
+def iso_year_week_from_day_numbers(days):
+    """
+    ISO-8601 year and week number for days since 1970-01-01 (see iso_year_week).
+    """
+    weekday = (days + 3) % 7  # Monday == 0, 1970-01-01 was a Thursday
+    thursday = days - weekday + 3  # ISO weeks belong to the year of their Thursday
+    years = thursday.astype('datetime64[D]').astype('datetime64[Y]')
+    jan_first = years.astype('datetime64[D]').astype(np.int64)
+    iso_week = (thursday - jan_first) // 7 + 1
+    iso_year = years.astype(np.int64) + 1970
+    return iso_year, iso_week
+
+
+def _period_keys(dates, freq):
+    if freq == 'W':
+        iso_year, iso_week = iso_year_week(dates)
+        return iso_year * 100 + iso_week
+    if freq == 'M':
+        return as_datetime64(dates).astype('datetime64[M]').astype(np.int64)
+    if isinstance(freq, (int, np.integer)) and freq > 0:
+        days = day_numbers(dates)
+        first_day = days.min()
+        return first_day + (days - first_day) // freq * freq
+    raise ValueError(f"Unsupported period {freq!r}; use 'W', 'M' or a positive number of days")
+
+
+def _period_labels(keys, freq):
+    if freq == 'W':
+        return [f"{key // 100}-W{key % 100}" for key in keys.tolist()]
+    if freq == 'M':
+        return np.datetime_as_string(keys.astype('datetime64[M]'), unit='M').tolist()
+    return np.datetime_as_string(keys.astype('datetime64[D]'), unit='D').tolist()
+
+
+def _segment_sums(values, starts, counts):
+    sums = values[starts].copy()
+    short = counts < _SEQUENTIAL_SUM_LIMIT
+    # Short segments: add the j-th element of every segment at once, in order
+    for offset in range(1, int(counts[short].max(initial=1))):
+        active = short & (counts > offset)
+        sums[active] += values[starts[active] + offset]
+    for index in np.flatnonzero(~short):
+        sums[index] = np.add.reduce(values[starts[index]:starts[index] + counts[index]])
+    return sums
+
+
+def aggregate_periods(dates, weights, freq='W'):
+    """
+    Columnar weekly/monthly/custom-period aggregation of a weight series.
+
+    Args:
+        dates (array-like): Measurement timestamps, in any order.
+        weights (array-like): Weight for each timestamp.
+        freq: 'W' for ISO weeks, 'M' for calendar months or an int for
+            fixed periods of that many days starting at the first date.
+
+    Returns:
+        PeriodStats: Sorted period keys and labels with the mean, count,
+        min, max and mean difference to the previous period (NaN first).
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if len(weights) == 0:
+        empty = np.array([], dtype=np.float64)
+        return PeriodStats(np.array([], dtype=np.int64), [], empty, np.array([], dtype=np.int64),
+                           empty, empty, empty)
+
+    keys = _period_keys(dates, freq)
+    if np.any(keys[1:] < keys[:-1]):
+        # Stable so each period keeps its original row order (and summation order)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        weights = weights[order]
+
+    boundaries = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+    starts = np.concatenate(([0], boundaries))
+    counts = np.diff(np.append(starts, len(keys)))
+
+    means = _segment_sums(weights, starts, counts) / counts
+    mins = np.minimum.reduceat(weights, starts)
+    maxs = np.maximum.reduceat(weights, starts)
+    diffs = np.empty_like(means)
+    diffs[0] = np.nan
+    diffs[1:] = means[1:] - means[:-1]
+
+    period_keys = keys[starts]
+    return PeriodStats(period_keys, _period_labels(period_keys, freq), means, counts, mins, maxs, diffs)
+
 
 def compute_weekly_averages(df):
-    dates = df['date'].values
-    weights = df['weight'].values
-    weeks = defaultdict(list)
-    for date, weight in zip(dates, weights):
-        py_date = pd.Timestamp(date).to_pydatetime()
-        year, week, weekday = py_date.isocalendar()
-        weeks[(year, week)].append(weight)
-    sorted_weeks = sorted(weeks.items())
-    weekly_means = [np.mean(week_weights) for _, week_weights in sorted_weeks]
-    week_labels = [f"{year}-W{week}" for (year, week), _ in sorted_weeks]
-    weekly_diffs = [None] + [weekly_means[i] - weekly_means[i-1] for i in range(1, len(weekly_means))]
-    return week_labels, weekly_means, weekly_diffs
+    stats = aggregate_periods(df['date'].values, df['weight'].values, 'W')
+    weekly_means = stats.means.tolist()
+    weekly_diffs = [None] + stats.diffs[1:].tolist()
+    return stats.labels, weekly_means, weekly_diffs
+
+
+def mean_weekly_change(weekly_diffs):
+    """
+    Average of the weekly differences (losses and gains), or None without any.
+    """
+    diffs = np.array(weekly_diffs, dtype=np.float64)  # None becomes NaN
+    valid = ~np.isnan(diffs)
+    return float(diffs[valid].mean()) if valid.any() else None
 
 def compute_moving_average(weights, window=7):
     """
@@ -37,10 +171,103 @@ def compute_moving_average_dates(dates, window=7):
     else:
         return []
 
+def elapsed_days(dates, origin=None):
+    """
+    Real time elapsed since origin (the first date by default), in fractional days.
+    """
+    dates = as_datetime64(dates)
+    if origin is None:
+        origin = dates.min() if len(dates) > 0 else np.datetime64(0, 'ns')
+    return (dates - np.datetime64(origin, 'ns')) / np.timedelta64(1, 'D')
+
+
+def sort_by_date(dates, weights):
+    """
+    Return dates as datetime64[ns] and weights as float64, stably sorted by date.
+    """
+    dates = as_datetime64(dates)
+    weights = np.asarray(weights, dtype=np.float64)
+    if np.any(dates[1:] < dates[:-1]):
+        order = np.argsort(dates, kind='stable')
+        dates, weights = dates[order], weights[order]
+    return dates, weights
+
+
+def date_range_bounds(dates, start, end):
+    """
+    Positions [lo, hi) of the sorted dates that fall on the calendar days [start, end].
+    """
+    dates = as_datetime64(dates)
+    lo = np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+    hi = np.searchsorted(dates, np.datetime64(end, 'D') + np.timedelta64(1, 'D'), side='left')
+    return int(lo), int(hi)
+
+
+def compute_time_moving_average(dates, weights, window_days=7):
+    """
+    Moving average over a window measured in real time rather than in rows.
+
+    Each value averages every measurement in the window_days ending at (and
+    including) its timestamp, so gaps shorten the window and several weigh-ins
+    on one day all count. Values start once the data spans a full window.
+    Runs in O(n) with a binary search per point over the sorted timestamps
+    and a cumulative sum.
+
+    Args:
+        dates (array-like): Measurement timestamps, in any order.
+        weights (array-like): Weight for each timestamp.
+        window_days (float): Window length in days.
+
+    Returns:
+        tuple: (moving_avg_dates, moving_avg) as arrays sorted by date.
+    """
+    dates, weights = sort_by_date(dates, weights)
+    if len(dates) == 0:
+        return dates, weights
+    window = np.timedelta64(int(window_days * 86400 * 10**9), 'ns')
+    starts = np.searchsorted(dates, dates - window, side='right')
+    ends = np.arange(1, len(dates) + 1)
+    # Summing offsets from the first weight keeps the cumulative sum small and precise
+    cumulative = np.concatenate(([0.0], np.cumsum(weights - weights[0])))
+    moving_avg = (cumulative[ends] - cumulative[starts]) / (ends - starts) + weights[0]
+    complete = dates >= dates[0] + window - np.timedelta64(1, 'D')
+    return dates[complete], moving_avg[complete]
+
+
+def compute_ewma(dates, weights, halflife_days=7):
+    """
+    Exponentially weighted moving average with a half-life in real time.
+
+    A measurement's weight halves every halflife_days, however many or few
+    weigh-ins fall in between.
+
+    Returns:
+        tuple: (dates, ewma) as arrays sorted by date.
+    """
+    dates, weights = sort_by_date(dates, weights)
+    if len(dates) == 0:
+        return dates, weights
+    ewma = pd.Series(weights).ewm(halflife=pd.Timedelta(days=halflife_days), times=dates).mean()
+    return dates, ewma.to_numpy()
+
+
 def compute_trend(days, weights):
-    days = np.arange(1, len(weights) + 1)
-    if len(weights) > 1:
+    """
+    Least-squares line of weight against elapsed days.
+
+    Args:
+        days (array-like): Measurement dates, or elapsed days as numbers.
+        weights (array-like): Weight for each entry.
+
+    Returns:
+        callable: Trend evaluated at elapsed days (see elapsed_days).
+    """
+    days = np.asarray(days)
+    if days.dtype.kind in 'MO':
+        days = elapsed_days(days)
+    if len(weights) > 1 and np.ptp(days) > 0:
         z = np.polyfit(days, weights, 1)
         return np.poly1d(z)
     else:
-        return lambda x: [weights[0]] * len(x)
+        level = float(np.mean(weights))
+        return lambda x: [level] * len(x)
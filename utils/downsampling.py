@@ -0,0 +1,112 @@
+import numpy as np
+
+# Roughly one point per horizontal pixel of the 1200px wide progression chart
+DEFAULT_MAX_POINTS = 1200
+
+
+def _as_numeric(x):
+    x = np.asarray(x)
+    if x.dtype.kind == 'M':
+        return x.astype('datetime64[ns]').view(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept. Every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the average of the next bucket, which preserves the visual shape of the line.
+
+    Args:
+        x (array-like): Sorted x values (numbers or datetime64).
+        y (array-like): y values.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Sorted indices into x and y.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_numeric(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    n_buckets = n_out - 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+    counts = np.diff(edges)
+    avg_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    avg_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    # The point after the last bucket is the final point itself
+    next_x = np.append(avg_x[1:], x[-1])
+    next_y = np.append(avg_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    anchor = 0
+    for bucket in range(n_buckets):
+        lo, hi = edges[bucket], edges[bucket + 1]
+        area = np.abs((x[anchor] - next_x[bucket]) * (y[lo:hi] - y[anchor])
+                      - (x[anchor] - x[lo:hi]) * (next_y[bucket] - y[anchor]))
+        anchor = lo + int(np.argmax(area))
+        selected[bucket + 1] = anchor
+    return selected
+
+
+def minmax_indices(y, n_out):
+    """
+    Indices of the minimum and maximum of each of n_out // 2 equal buckets.
+
+    Keeps every peak and trough, so spikes never disappear from the chart.
+
+    Returns:
+        np.ndarray: Sorted unique indices, including the first and last point.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    n_buckets = max(n_out // 2, 1)
+    y = np.asarray(y, dtype=np.float64)
+    size = -(-n // n_buckets)
+    padded = np.full(size * n_buckets, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    filled = ~np.all(np.isnan(buckets), axis=1)
+    offsets = np.arange(n_buckets)[filled] * size
+    buckets = buckets[filled]
+    lows = offsets + np.nanargmin(buckets, axis=1)
+    highs = offsets + np.nanargmax(buckets, axis=1)
+    return np.unique(np.concatenate(([0, n - 1], lows, highs)))
+
+
+def downsample(x, y, n_out, method='lttb'):
+    """
+    Reduce a sorted series to about n_out points with 'lttb' or 'minmax'.
+
+    Returns:
+        tuple: (x, y) arrays with the kept points.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method == 'lttb':
+        indices = lttb_indices(x, y, n_out)
+    elif method == 'minmax':
+        indices = minmax_indices(y, n_out)
+    else:
+        raise ValueError(f"Unknown downsampling method {method!r}; use 'lttb' or 'minmax'")
+    return x[indices], y[indices]
+
+
+def slice_range(x, *columns, x_range=None):
+    """
+    Restrict sorted x (and aligned columns) to x_range = (start, end), inclusive.
+    """
+    x = np.asarray(x)
+    if x_range is None or len(x) == 0:
+        return (x, *(np.asarray(column) for column in columns))
+    start, end = (np.datetime64(bound, 'ns') if x.dtype.kind == 'M' else bound for bound in x_range)
+    lo = np.searchsorted(x, start, side='left')
+    hi = np.searchsorted(x, end, side='right')
+    return (x[lo:hi], *(np.asarray(column)[lo:hi] for column in columns))
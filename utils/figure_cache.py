@@ -0,0 +1,237 @@
+import contextlib
+import hashlib
+import os
+import pathlib
+import threading
+
+# Serialized figures persist across sessions and server restarts; 'WEIGHT_TRACKER_FIGURE_CACHE_MB=0' disables it
+FIGURE_CACHE_DIR = pathlib.Path(os.environ.get('WEIGHT_TRACKER_FIGURE_CACHE',
+                                               pathlib.Path(__file__).parent.parent / 'data' / 'figure_cache'))
+FIGURE_CACHE_MAX_BYTES = int(float(os.environ.get('WEIGHT_TRACKER_FIGURE_CACHE_MB', 256)) * 2**20)
+# Eviction removes the least recently used files until the cache is this far under its limit
+EVICT_TO_FRACTION = 0.8
+ZSTD_LEVEL = 3
+# Every module of this package is part of the code version: the figures hold what the chart builders
+# and the data, seasonality, analysis and FitNotes modules compute, and a hand-kept list would drift
+_PACKAGE_DIR = pathlib.Path(__file__).parent
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def _code_version():
+    """
+    Digest of the utils package sources and the plotly version, so upgrades never serve stale figures.
+    """
+    import plotly
+    digest = hashlib.blake2b(plotly.__version__.encode(), digest_size=8)
+    for path in sorted(_PACKAGE_DIR.glob('*.py')):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """
+    Size-bounded directory of pre-serialized Plotly figures.
+
+    Each figure is stored as its plotly JSON (encoded with orjson, and
+    zstd-compressed when zstandard is installed) under a hash of the chart
+    name, its parameters and the version of the data it shows. A hit
+    rebuilds the figure from that JSON without running the chart builder or
+    plotly's validation. Files are written atomically; when the directory
+    grows past max_bytes, the least recently used ones are deleted.
+    """
+
+    def __init__(self, directory, max_bytes=FIGURE_CACHE_MAX_BYTES, compress=True):
+        self.directory = pathlib.Path(directory)
+        self.max_bytes = max_bytes
+        self.zstandard = _zstandard() if compress else None
+        self.suffix = '.json.zst' if self.zstandard is not None else '.json'
+        self.counters = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+        self._nbytes = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def key(self, chart, params, data_version):
+        """
+        File name stem for a chart; params must be JSON-serializable (NumPy scalars and datetimes are fine).
+        """
+        import orjson
+        if self._version is None:
+            self._version = _code_version()
+        spec = orjson.dumps([self._version, chart, data_version, params],
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        return f"{chart}-{hashlib.blake2b(spec, digest_size=16).hexdigest()}"
+
+    def _path(self, key):
+        return self.directory / (key + self.suffix)
+
+    def load(self, key):
+        """
+        Cached figure for key, or None.
+        """
+        import orjson
+        import plotly.graph_objects as go
+        path = self._path(key)
+        corrupt = (OSError, ValueError) + ((self.zstandard.ZstdError,) if self.zstandard is not None else ())
+        try:
+            payload = path.read_bytes()
+            if self.zstandard is not None:
+                payload = self.zstandard.ZstdDecompressor().decompress(payload)
+            # The JSON came from a validated figure, so plotly's validation is skipped
+            figure = go.Figure(orjson.loads(payload), _validate=False)
+        except FileNotFoundError:
+            return None
+        except corrupt:
+            # Truncated or corrupt entry; rebuild it
+            path.unlink(missing_ok=True)
+            with self._lock:
+                self._nbytes = None
+            return None
+        # The modification time doubles as the last-use time for eviction
+        with contextlib.suppress(FileNotFoundError):
+            os.utime(path)
+        return figure
+
+    def store(self, key, figure):
+        """
+        Serialize a figure under key, then evict least recently used entries if over the size limit.
+        """
+        import plotly.io
+        payload = plotly.io.to_json(figure, validate=False, engine='orjson').encode()
+        if self.zstandard is not None:
+            payload = self.zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+        if len(payload) > self.max_bytes * EVICT_TO_FRACTION:
+            return
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_bytes(payload)
+            # Under the lock, so the size of a file another session stored first is not counted twice
+            with self._lock:
+                try:
+                    replaced_bytes = path.stat().st_size
+                except FileNotFoundError:
+                    replaced_bytes = 0
+                os.replace(tmp_path, path)
+                self.counters['stores'] += 1
+                if self._nbytes is not None:
+                    self._nbytes += len(payload) - replaced_bytes
+        except OSError:
+            # A read-only or full disk only costs the cache
+            tmp_path.unlink(missing_ok=True)
+            return
+        if self.nbytes() > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob('*' + self.suffix):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def nbytes(self):
+        """
+        Bytes stored on disk, from a directory scan cached between evictions.
+        """
+        with self._lock:
+            if self._nbytes is None:
+                self._nbytes = sum(size for _, size, _ in self._entries())
+            return self._nbytes
+
+    def evict(self):
+        """
+        Delete the least recently used entries until the cache is EVICT_TO_FRACTION of max_bytes.
+        """
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[0])
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * EVICT_TO_FRACTION
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                self.counters['evictions'] += 1
+            self._nbytes = total
+
+    def get_or_build(self, chart, params, data_version, build):
+        """
+        The cached figure for (chart, params, data_version), built with build() and stored on a miss.
+        """
+        if not self.enabled:
+            return build()
+        key = self.key(chart, params, data_version)
+        figure = self.load(key)
+        with self._lock:
+            self.counters['hits' if figure is not None else 'misses'] += 1
+        if figure is None:
+            figure = build()
+            self.store(key, figure)
+        return figure
+
+    def clear(self):
+        for _, _, path in self._entries():
+            path.unlink(missing_ok=True)
+        with self._lock:
+            self._nbytes = 0
+
+    def stats(self):
+        """
+        Hit/miss counters and the size of the cache on disk.
+        """
+        nbytes = self.nbytes()
+        with self._lock:
+            return dict(self.counters, files=len(self._entries()), bytes=nbytes, max_bytes=self.max_bytes,
+                        compressed=self.zstandard is not None)
+
+
+def figure_cache():
+    """
+    The FigureCache shared by every session.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FigureCache(FIGURE_CACHE_DIR)
+        return _cache
+
+
+@contextlib.contextmanager
+def use_figure_cache(cache):
+    """
+    Make cache the shared FigureCache inside the block, e.g. a disabled one for benchmarks.
+    """
+    global _cache
+    with _cache_lock:
+        previous, _cache = _cache, cache
+    try:
+        yield cache
+    finally:
+        with _cache_lock:
+            _cache = previous
+
+
+def cached_figure(chart, params, data_version, build):
+    """
+    Shorthand for figure_cache().get_or_build(chart, params, data_version, build).
+    """
+    return figure_cache().get_or_build(chart, params, data_version, build)
@@ -1,49 +1,112 @@
-import json
+import os
 import pandas as pd
 import pathlib
+import threading
 import streamlit as st
 
+from utils.compact import CompactWeights
+from utils.storage import WEIGHT_SCHEMA, open_weight_store
+from utils.validation import ValidationError, ValidationIssue, check_user_name, offending_lines, read_typed_csv
 
-def is_valid_json_file(file):
-    try:
-        if file is None:
-            return False
-        if hasattr(file, "seek"):
-            file.seek(0)
-        json.load(file)
-        if hasattr(file, "seek"):
-            file.seek(0)
-        return True
-    except Exception:
-        return False
-
-
-def is_valid_csv_file(file):
+
+def read_weight_rows(source):
+    """
+    Parse pasted text or an uploaded CSV of weigh-ins.
+
+    Accepts comma- or tab-separated 'date,weight' rows; the header line is optional.
+
+    Returns:
+        pd.DataFrame: Rows with 'date' and 'weight' columns.
+
+    Raises:
+        ValidationError: If a row has no weight or cannot be parsed.
+    """
+    data = source.encode() if isinstance(source, str) else source.getvalue()
+    data = data.strip().replace(b'\r\n', b'\n').replace(b'\t', b',')
+    if b'date' not in data.split(b'\n', 1)[0].lower():
+        data = b'date,weight\n' + data
+    rows = read_typed_csv(data, WEIGHT_SCHEMA)[['date', 'weight']]
+    missing = rows['weight'].isna()
+    if missing.any():
+        raise ValidationError([ValidationIssue('missing_value', f"{int(missing.sum())} rows have no weight",
+                                               'weight', offending_lines(missing))])
+    return rows
+
+
+DATA_DIR = pathlib.Path(__file__).parent.parent.resolve() / "data"
+# Dataset opened until the user picks another one in the sidebar
+DEFAULT_USER = os.environ.get('WEIGHT_TRACKER_USER', 'lukas')
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def current_user():
+    return st.session_state.get('user_name', DEFAULT_USER)
+
+
+def _store():
+    # One store per user for the whole server, so its lock orders every session's writes
+    user = current_user()
+    with _stores_lock:
+        if user not in _stores:
+            _stores[user] = open_weight_store(DATA_DIR, user)
+        return _stores[user]
+
+
+def select_user():
+    """
+    Sidebar input switching the session to another user's dataset.
+    """
+    user = st.sidebar.text_input("User", value=current_user()).strip()
+    if user == current_user():
+        return
     try:
-        if file is None:
-            return False
-        if hasattr(file, "seek"):
-            file.seek(0)
-        pd.read_csv(file, nrows=1)
-        if hasattr(file, "seek"):
-            file.seek(0)
-        return True
-    except Exception:
-        return False
+        check_user_name(user)
+    except ValueError as e:
+        st.sidebar.error(str(e))
+        return
+    st.session_state['user_name'] = user
+    for key in ('user_data', 'weight_stats', 'tdee_estimator', 'analysis', 'goal_target', 'goal_target_input',
+                'file_uploaded'):
+        st.session_state.pop(key, None)
+    st.rerun()
 
 
 def load_data():
-    path_csv = pathlib.Path(__file__).parent.parent.resolve() / "data" / "lukas.csv"
-    if 'user_data' not in st.session_state and path_csv.is_file():
-        df = pd.read_csv(path_csv.as_posix(), parse_dates=['date'])
-        st.session_state['user_data'] = df
+    select_user()
+    if 'user_data' not in st.session_state and _store().exists():
+        df = _store().load()
+        if df is None:
+            return
+        # Only the compact arrays stay in the session; frames are rebuilt per run
+        st.session_state['user_data'] = CompactWeights.from_frame(df)
         st.session_state['file_uploaded'] = True
         st.rerun()
 
 
-def save_data():
-    path_csv = pathlib.Path(__file__).parent.parent.resolve() / "data" / "lukas.csv"
-    df = st.session_state['user_data']
-    csv = df.to_csv(index=False, date_format='%Y-%m-%d %H:%M:%S')
-    with open(path_csv.as_posix(), "w") as file_handle:
-        file_handle.write(csv)
+def user_frame(calendar=False):
+    """
+    Materialize the session data as a sorted 'date'/'weight' DataFrame.
+
+    A DataFrame put in the session directly is compacted on first use.
+
+    Args:
+        calendar (bool): Also derive the 'day_of_week', 'weight_diff' and
+            'month' columns of the CSV layout.
+    """
+    data = st.session_state['user_data']
+    if isinstance(data, pd.DataFrame):
+        data = CompactWeights.from_frame(data)
+        st.session_state['user_data'] = data
+    return data.to_frame(calendar)
+
+
+def set_weight_series(series):
+    """Store an edited WeightSeries as the session data."""
+    st.session_state['user_data'] = CompactWeights.from_arrays(series.dates, series.weights)
+
+
+def commit_edits(new_rows=None, deleted_dates=()):
+    """Persist a batch of edits as a single journal transaction."""
+    _store().commit(new_rows, deleted_dates)
@@ -0,0 +1,190 @@
+import numpy as np
+import pandas as pd
+
+from utils.storage import read_fitnotes_csv
+from utils.validation import ValidationError, ValidationIssue, read_json
+
+LBS_TO_KG = 0.45359237
+
+SUMMARY_COLUMNS = [
+    'Series_Count', 'Total_Reps', 'Avg_Reps_Per_Series', 'Max_Weight', 'Tonnage', 'Avg_Volume_Per_Series',
+    'Est_1RM', 'Weight_PR', 'Overload',
+]
+
+
+def load_workout_plan(file):
+    """
+    Read a workout plan JSON mapping each routine day to its exercise names.
+
+    Returns:
+        dict: Day name -> list of exercise names, in file order and each listed once per day.
+
+    Raises:
+        ValidationError: If the file is not JSON or not a mapping of day -> list of names.
+    """
+    plan = read_json(file)
+    if not isinstance(plan, dict) or not all(isinstance(exercises, list) for exercises in plan.values()):
+        raise ValidationError([ValidationIssue('invalid_plan',
+                                               "The workout routine must map each day to a list of exercise names")])
+    return {str(day): list(dict.fromkeys(str(exercise) for exercise in exercises)) for day, exercises in plan.items()}
+
+
+def load_fitnotes(file):
+    """
+    Ingest a FitNotes CSV export as typed set rows with weights in kg.
+
+    Returns:
+        pd.DataFrame: One row per set, sorted by exercise and date.
+
+    Raises:
+        ValidationError: If the file does not have the FitNotes export layout.
+    """
+    sets = read_fitnotes_csv(file)
+    sets = sets.dropna(subset=['Reps'])
+    weights = sets['Weight'].to_numpy(dtype=np.float64, na_value=0.0)
+    in_lbs = (sets['Weight Unit'] == 'lbs').to_numpy()
+    sets['Weight'] = np.where(in_lbs, weights * LBS_TO_KG, weights)
+    return sets.sort_values(['Exercise', 'Date'], kind='stable').reset_index(drop=True)
+
+
+def estimated_one_rep_max(weight, reps):
+    """
+    Epley estimate of the one-rep max for sets of weight x reps.
+    """
+    weight = np.asarray(weight, dtype=np.float64)
+    reps = np.asarray(reps, dtype=np.float64)
+    return np.where(reps <= 1, weight, weight * (1 + reps / 30))
+
+
+def summarize_sessions(sets):
+    """
+    Per-exercise, per-date session summary for every exercise in one grouped pass.
+
+    Args:
+        sets (pd.DataFrame): Set rows from load_fitnotes.
+
+    Returns:
+        pd.DataFrame: Indexed by (Exercise, Date) with the columns expected by
+        plot_exercise_progress plus 'Total_Reps', 'Tonnage' (Σ weight x reps),
+        'Est_1RM' (best Epley estimate of the session), 'Weight_PR' (heaviest
+        weight so far for the exercise) and 'Overload' (estimated 1RM or
+        tonnage above the previous session).
+    """
+    reps = sets['Reps'].to_numpy(dtype=np.float64)
+    weight = sets['Weight'].to_numpy(dtype=np.float64)
+    per_set = pd.DataFrame({
+        'Exercise': sets['Exercise'],
+        'Date': sets['Date'],
+        'Reps': reps,
+        'Weight': weight,
+        'Volume': weight * reps,
+        'Est_1RM': estimated_one_rep_max(weight, reps),
+    })
+    summary = per_set.groupby(['Exercise', 'Date'], observed=True, sort=True).agg(
+        Series_Count=('Reps', 'size'),
+        Total_Reps=('Reps', 'sum'),
+        Max_Weight=('Weight', 'max'),
+        Tonnage=('Volume', 'sum'),
+        Est_1RM=('Est_1RM', 'max'),
+    )
+    summary['Avg_Reps_Per_Series'] = summary['Total_Reps'] / summary['Series_Count']
+    summary['Avg_Volume_Per_Series'] = summary['Tonnage'] / summary['Series_Count']
+
+    by_exercise = summary.groupby(level='Exercise', observed=True)
+    previous_best = by_exercise['Max_Weight'].cummax().groupby(level='Exercise', observed=True).shift()
+    previous_1rm = by_exercise['Est_1RM'].shift()
+    previous_tonnage = by_exercise['Tonnage'].shift()
+    summary['Weight_PR'] = summary['Max_Weight'] > previous_best
+    summary['Overload'] = (summary['Est_1RM'] > previous_1rm) | (summary['Tonnage'] > previous_tonnage)
+    return summary[SUMMARY_COLUMNS]
+
+
+def exercise_summary(summary, exercise, start=None, end=None):
+    """
+    Session rows of one exercise, indexed by date, optionally within [start, end].
+    """
+    try:
+        rows = summary.xs(exercise, level='Exercise')
+    except KeyError:
+        return summary.iloc[0:0].droplevel('Exercise')
+    return rows.loc[start:end] if start is not None or end is not None else rows
+
+
+class FitNotesIndex:
+    """
+    Date-partitioned index over the session summary for instant range queries.
+
+    Sessions are stored sorted by (exercise, date) with prefix sums of sets,
+    reps and volume and a sparse table of maximum weights. A [start, end]
+    query is two binary searches inside the exercise's partition plus prefix
+    sum differences, so it costs O(log n) however many sets are logged.
+    """
+
+    def __init__(self, summary):
+        self.summary = summary
+        exercises = summary.index.get_level_values('Exercise')
+        self.dates = summary.index.get_level_values('Date').values.astype('datetime64[ns]')
+        self.partitions = {}
+        if len(summary) > 0:
+            codes, names = pd.factorize(exercises, sort=False)
+            boundaries = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+            starts = np.concatenate(([0], boundaries))
+            ends = np.append(boundaries, len(codes))
+            self.partitions = {str(names[codes[lo]]): (lo, hi) for lo, hi in zip(starts, ends)}
+
+        self.prefix = {
+            column: np.concatenate(([0.0], np.cumsum(summary[column].to_numpy(dtype=np.float64))))
+            for column in ('Series_Count', 'Total_Reps', 'Tonnage')
+        }
+        # sparse_max[k][i] is the max weight of sessions i .. i + 2**k - 1
+        self.sparse_max = [summary['Max_Weight'].to_numpy(dtype=np.float64)]
+        span = 1
+        while 2 * span <= len(summary):
+            previous = self.sparse_max[-1]
+            self.sparse_max.append(np.maximum(previous[:-span], previous[span:]))
+            span *= 2
+
+    @classmethod
+    def from_sets(cls, sets):
+        return cls(summarize_sessions(sets))
+
+    def date_bounds(self):
+        """
+        First and last session dates as datetime.date.
+        """
+        return pd.Timestamp(self.dates.min()).date(), pd.Timestamp(self.dates.max()).date()
+
+    def _bounds(self, exercise, start=None, end=None):
+        lo, hi = self.partitions.get(exercise, (0, 0))
+        if start is not None:
+            lo = lo + np.searchsorted(self.dates[lo:hi], np.datetime64(pd.Timestamp(start), 'ns'), side='left')
+        if end is not None:
+            hi = lo + np.searchsorted(self.dates[lo:hi], np.datetime64(pd.Timestamp(end), 'ns'), side='right')
+        return int(lo), int(hi)
+
+    def _range_max(self, lo, hi):
+        level = int(np.log2(hi - lo))
+        table = self.sparse_max[level]
+        return max(table[lo], table[hi - (1 << level)])
+
+    def sessions(self, exercise, start=None, end=None):
+        """
+        Session rows of one exercise within [start, end], indexed by date.
+        """
+        lo, hi = self._bounds(exercise, start, end)
+        return self.summary.iloc[lo:hi].droplevel('Exercise')
+
+    def totals(self, exercise, start=None, end=None):
+        """
+        Aggregates of one exercise over [start, end] from prefix-sum differences.
+
+        Returns:
+            dict: 'sessions', 'sets', 'reps', 'tonnage' and 'max_weight'
+            (NaN when there are no sessions in the range).
+        """
+        lo, hi = self._bounds(exercise, start, end)
+        totals = {'sessions': hi - lo}
+        for key, column in (('sets', 'Series_Count'), ('reps', 'Total_Reps'), ('tonnage', 'Tonnage')):
+            totals[key] = self.prefix[column][hi] - self.prefix[column][lo]
+        totals['max_weight'] = self._range_max(lo, hi) if hi > lo else np.nan
+        return totals
@@ -1,7 +1,6 @@
-import plotly.graph_objects as go
-import pandas as pd
-
 def plot_exercise_progress(summary, exercise):
+    # Imported on first use so the page loads before a FitNotes export is uploaded
+    import plotly.graph_objects as go
     fig = go.Figure()
     fig.add_trace(go.Bar(
         x=summary.index, y=summary['Series_Count'],
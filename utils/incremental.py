@@ -0,0 +1,137 @@
+from collections import deque
+
+import numpy as np
+
+from utils.data_utils import compute_time_moving_average, sort_by_date
+
+_RESYNC_EVERY = 1024
+_DAY = np.timedelta64(1, 'D')
+
+
+class IncrementalWeightStats:
+    """
+    Time-window moving average and linear trend maintained with running sums.
+
+    Appending a measurement in date order updates the rolling window sum and
+    the least-squares sums (Σx, Σy, Σxy, Σx²) over elapsed days in O(1)
+    amortized. Deletes or out-of-order inserts are handled by rebuilding from
+    the full series with from_series. Results agree with
+    compute_time_moving_average and compute_trend within floating-point
+    tolerance.
+    """
+
+    def __init__(self, window_days=7):
+        self.window_days = window_days
+        self._window = np.timedelta64(int(window_days * 86400 * 10**9), 'ns')
+        self.count = 0
+        self.first_date = None
+        self.last_date = None
+        self._window_values = deque()
+        self._window_sum = 0.0
+        self._moving_avg = np.empty(64)
+        self._moving_avg_dates = np.empty(64, dtype='datetime64[ns]')
+        self._n_moving_avg = 0
+        # Weights are offset by the first one to keep the regression sums well conditioned
+        self._offset = None
+        self._sum_x = 0.0
+        self._sum_xx = 0.0
+        self._sum_y = 0.0
+        self._sum_xy = 0.0
+
+    @classmethod
+    def from_series(cls, dates, weights, window_days=7):
+        """
+        Build the statistics from a full series with one vectorized pass.
+        """
+        stats = cls(window_days)
+        dates, weights = sort_by_date(dates, weights)
+        n = len(weights)
+        if n == 0:
+            return stats
+        stats.count = n
+        stats.first_date = dates[0]
+        stats.last_date = dates[-1]
+        in_window = dates > dates[-1] - stats._window
+        stats._window_values = deque(zip(dates[in_window], weights[in_window].tolist()))
+        stats._window_sum = float(weights[in_window].sum())
+        moving_avg_dates, moving_avg = compute_time_moving_average(dates, weights, window_days)
+        capacity = max(64, 2 * len(moving_avg))
+        stats._moving_avg = np.resize(moving_avg, capacity)
+        stats._moving_avg_dates = np.resize(moving_avg_dates, capacity)
+        stats._n_moving_avg = len(moving_avg)
+
+        stats._offset = float(weights[0])
+        x = (dates - dates[0]) / _DAY
+        y = weights - stats._offset
+        stats._sum_x = float(x.sum())
+        stats._sum_xx = float(x @ x)
+        stats._sum_y = float(y.sum())
+        stats._sum_xy = float(x @ y)
+        return stats
+
+    def can_append(self, date):
+        """
+        True if date keeps the series in order, so append stays exact.
+        """
+        return self.last_date is None or np.datetime64(date, 'ns') >= self.last_date
+
+    def append(self, date, weight):
+        """
+        Add one measurement at the end of the series.
+        """
+        if not self.can_append(date):
+            raise ValueError("Out-of-order measurement; rebuild with from_series instead")
+        weight = float(weight)
+        date = np.datetime64(date, 'ns')
+        self.count += 1
+        self.last_date = date
+        if self.first_date is None:
+            self.first_date = date
+            self._offset = weight
+
+        self._window_values.append((date, weight))
+        self._window_sum += weight
+        while self._window_values[0][0] <= date - self._window:
+            self._window_sum -= self._window_values.popleft()[1]
+        if self.count % _RESYNC_EVERY == 0:
+            # Cancel the rounding drift of add/subtract updates
+            self._window_sum = sum(value for _, value in self._window_values)
+        if date >= self.first_date + self._window - _DAY:
+            if self._n_moving_avg == len(self._moving_avg):
+                self._moving_avg = np.resize(self._moving_avg, 2 * len(self._moving_avg))
+                self._moving_avg_dates = np.resize(self._moving_avg_dates, 2 * len(self._moving_avg_dates))
+            self._moving_avg[self._n_moving_avg] = self._window_sum / len(self._window_values)
+            self._moving_avg_dates[self._n_moving_avg] = date
+            self._n_moving_avg += 1
+
+        x = (date - self.first_date) / _DAY
+        y = weight - self._offset
+        self._sum_x += x
+        self._sum_xx += x * x
+        self._sum_y += y
+        self._sum_xy += x * y
+
+    def moving_average(self):
+        """
+        Moving average like compute_time_moving_average.
+
+        Returns:
+            tuple: (moving_avg_dates, moving_avg) arrays.
+        """
+        n = self._n_moving_avg
+        return self._moving_avg_dates[:n], self._moving_avg[:n]
+
+    def trend(self):
+        """
+        Least-squares line over elapsed days, as returned by compute_trend.
+        """
+        if self.count == 0:
+            raise ValueError("No measurements")
+        n = self.count
+        denominator = n * self._sum_xx - self._sum_x ** 2
+        if denominator <= 1e-12 * max(1.0, n * self._sum_xx):
+            level = self._sum_y / n + self._offset
+            return lambda x: [level] * len(x)
+        slope = (n * self._sum_xy - self._sum_x * self._sum_y) / denominator
+        intercept = (self._sum_y - slope * self._sum_x) / n + self._offset
+        return np.poly1d([slope, intercept])
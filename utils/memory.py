@@ -0,0 +1,80 @@
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+def deep_sizeof(obj, _seen=None):
+    """
+    Approximate bytes retained by obj and everything it references.
+
+    NumPy buffers shared between views are counted once, pandas objects use
+    memory_usage(deep=True) and Plotly figures are measured through their
+    plotly JSON dict.
+
+    Returns:
+        int: Size in bytes.
+    """
+    if _seen is None:
+        # Maps id -> object, keeping temporaries alive so their ids are not reused
+        _seen = {}
+    if id(obj) in _seen:
+        return 0
+    _seen[id(obj)] = obj
+
+    if isinstance(obj, np.ndarray):
+        # A view's own size excludes the data, which is counted once through its base
+        size = sys.getsizeof(obj) + (deep_sizeof(obj.base, _seen) if obj.base is not None else 0)
+        if obj.dtype == object:
+            size += sum(deep_sizeof(item, _seen) for item in obj.ravel())
+        return size
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if hasattr(obj, 'to_plotly_json'):
+        return deep_sizeof(obj.to_plotly_json(), _seen)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(key, _seen) + deep_sizeof(value, _seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        size += sum(deep_sizeof(item, _seen) for item in obj)
+    elif isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        pass
+    else:
+        if hasattr(obj, '__dict__'):
+            size += deep_sizeof(vars(obj), _seen)
+        for slot in getattr(type(obj), '__slots__', ()):
+            if hasattr(obj, slot):
+                size += deep_sizeof(getattr(obj, slot), _seen)
+    return size
+
+
+def session_memory_report(session_state):
+    """
+    Bytes retained by each session state entry, largest first.
+
+    Args:
+        session_state: st.session_state or any mapping.
+
+    Returns:
+        pd.Series: Bytes per key.
+    """
+    sizes = {str(key): deep_sizeof(session_state[key]) for key in list(session_state.keys())}
+    return pd.Series(sizes, dtype=np.int64).sort_values(ascending=False)
+
+
+def estimate_server_memory(per_session_bytes, n_sessions, shared_bytes=0):
+    """
+    Resident memory needed for n_sessions concurrent sessions plus state shared by all of them.
+    """
+    return int(per_session_bytes * n_sessions + shared_bytes)
+
+
+def format_bytes(n_bytes):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(n_bytes) < 1024 or unit == 'GB':
+            return f"{n_bytes:.0f} {unit}" if unit == 'B' else f"{n_bytes:.1f} {unit}"
+        n_bytes /= 1024
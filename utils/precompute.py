@@ -0,0 +1,78 @@
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.analysis import DEFAULT_EWMA_HALFLIFE_DAYS, dataset_fingerprint, get_analysis, get_goal_forecast
+
+# A thread pool rather than processes: the results land in the in-process
+# analysis cache, and Plotly figures are too costly to pickle back.
+PRECOMPUTE_WORKERS = 2
+
+_executor = None
+# Data version -> the job computing its analysis; successful jobs are dropped once their results are
+# cached, failed ones are kept so the same data is not retried in a loop
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def _pool():
+    global _executor
+    with _jobs_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=PRECOMPUTE_WORKERS, thread_name_prefix='precompute')
+        return _executor
+
+
+def _precompute(df, ewma_halflife_days, goal_target):
+    analysis = get_analysis(df, None, ewma_halflife_days)
+    weekly_changes = [diff for diff in analysis['weekly_diffs'] if diff is not None]
+    if goal_target is not None and len(analysis['weights']) > 0 and weekly_changes:
+        current_weight = float(analysis['weights'][-1])
+        if goal_target != current_weight:
+            get_goal_forecast(current_weight, goal_target, weekly_changes)
+    return analysis
+
+
+def _forget(key, future):
+    if future.exception() is not None:
+        return
+    with _jobs_lock:
+        if _jobs.get(key) is future:
+            del _jobs[key]
+
+
+def schedule_analysis(df, ewma_halflife_days=DEFAULT_EWMA_HALFLIFE_DAYS, goal_target=None):
+    """
+    Start computing the Analysis page artifacts for df on a background thread.
+
+    The weekly tables, seasonality and figures go into the shared analysis
+    cache, and with goal_target the goal forecast into the forecast cache.
+    A job already queued or running for the same data version is reused
+    instead of starting a duplicate, and one that failed is returned again
+    instead of being retried.
+
+    Args:
+        df (pd.DataFrame): Weight data; it must not be modified afterwards.
+
+    Returns:
+        concurrent.futures.Future: Resolves to the analysis results.
+    """
+    key = (dataset_fingerprint(df), ewma_halflife_days)
+    pool = _pool()
+    with _jobs_lock:
+        future = _jobs.get(key)
+        if future is not None:
+            return future
+        future = pool.submit(_precompute, df, ewma_halflife_days, goal_target)
+        _jobs[key] = future
+    # Outside the lock: the callback runs at once if the job has already finished
+    future.add_done_callback(functools.partial(_forget, key))
+    return future
+
+
+def pending_analysis(df, ewma_halflife_days=DEFAULT_EWMA_HALFLIFE_DAYS):
+    """
+    The job queued, running or failed for df's data version, or None.
+    """
+    with _jobs_lock:
+        return _jobs.get((dataset_fingerprint(df), ewma_halflife_days))
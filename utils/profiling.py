@@ -0,0 +1,164 @@
+import contextlib
+import contextvars
+import cProfile
+import datetime
+import io
+import json
+import os
+import pathlib
+import pstats
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+# Opt-in instrumentation; 'WEIGHT_TRACKER_PROFILE=1' turns stage timing on by default
+PROFILE_BY_DEFAULT = os.environ.get('WEIGHT_TRACKER_PROFILE', '') == '1'
+PROFILE_LOG = pathlib.Path(os.environ.get('WEIGHT_TRACKER_PROFILE_LOG',
+                                          pathlib.Path(__file__).parent.parent / 'data' / 'profile.jsonl'))
+PROFILE_REPORT_LINES = 25
+
+# The profiler of the script run on this thread; Streamlit runs each session's script on its own thread
+_active = contextvars.ContextVar('stage_profiler', default=None)
+_log_lock = threading.Lock()
+
+
+def stage(name, figure=None):
+    """
+    Time a block as a stage of the active StageProfiler; a no-op when none is active.
+
+    Args:
+        name (str): Stage name; stages opened inside it are recorded as 'outer/inner'.
+        figure (go.Figure, optional): Figure rendered in the block, whose JSON
+            payload size is recorded (measured after the block, untimed).
+    """
+    profiler = _active.get()
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.stage(name, figure)
+
+
+def figure_payload_bytes(figure):
+    """
+    Size of the JSON Streamlit sends to the browser for a Plotly figure.
+    """
+    import plotly.io
+    return len(plotly.io.to_json(figure, validate=False))
+
+
+class StageProfiler:
+    """
+    Per-rerun breakdown of where a page spends its time.
+
+    Inside activate(), every stage() block records its wall time, with
+    trace_memory the peak bytes allocated above the memory in use when it
+    started (tracemalloc sees every thread, so concurrent sessions add
+    noise), and with profile a cProfile of the whole run.
+    """
+
+    def __init__(self, trace_memory=False, profile=False):
+        self.trace_memory = trace_memory
+        self.profile = profile
+        self.samples = []
+        self._names = []
+        # [memory in use at start, highest peak seen] of each open stage
+        self._memory = []
+        self._profiler = None
+
+    @contextlib.contextmanager
+    def activate(self):
+        """
+        Make this the profiler of stage() calls on the current thread.
+        """
+        token = _active.set(self)
+        started_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        if self.profile:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        try:
+            yield self
+        finally:
+            if self._profiler is not None:
+                self._profiler.disable()
+            if started_tracing:
+                tracemalloc.stop()
+            _active.reset(token)
+
+    @contextlib.contextmanager
+    def stage(self, name, figure=None):
+        self._names.append(name)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._memory:
+                # Resetting the peak below loses the enclosing stage's peak so far
+                self._memory[-1][1] = max(self._memory[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._memory.append([current, current])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            sample = {'stage': '/'.join(self._names), 'ms': seconds * 1e3}
+            if tracing:
+                start_bytes, peak = self._memory.pop()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                sample['peak_bytes'] = peak - start_bytes
+                if self._memory:
+                    self._memory[-1][1] = max(self._memory[-1][1], peak)
+            if figure is not None:
+                sample['payload_bytes'] = figure_payload_bytes(figure)
+            self._names.pop()
+            self.samples.append(sample)
+
+    def to_frame(self):
+        """
+        Samples in the order the stages finished.
+
+        Returns:
+            pd.DataFrame: 'stage', 'ms' and, where measured, 'peak_bytes' and 'payload_bytes'.
+        """
+        return pd.DataFrame(self.samples, columns=['stage', 'ms', 'peak_bytes', 'payload_bytes'])
+
+    def profile_report(self, limit=PROFILE_REPORT_LINES):
+        """
+        The functions with the highest cumulative time in the cProfile capture, as text.
+        """
+        if self._profiler is None:
+            return ''
+        stream = io.StringIO()
+        pstats.Stats(self._profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+    def append_log(self, path, page):
+        """
+        Append this run's samples to a JSON Lines file, one line per run.
+        """
+        record = {'timestamp': datetime.datetime.now().isoformat(timespec='milliseconds'), 'page': page,
+                  'samples': self.samples}
+        line = json.dumps(record) + '\n'
+        with _log_lock, open(path, 'a', encoding='utf-8') as file_handle:
+            file_handle.write(line)
+
+
+def read_profile_log(path):
+    """
+    Load a log written by StageProfiler.append_log for offline analysis.
+
+    Returns:
+        pd.DataFrame: One row per sample with the run's 'timestamp' and 'page'.
+    """
+    rows = []
+    with open(path, encoding='utf-8') as file_handle:
+        for line in file_handle:
+            if line.strip():
+                record = json.loads(line)
+                rows.extend({'timestamp': record['timestamp'], 'page': record['page'], **sample}
+                            for sample in record['samples'])
+    df = pd.DataFrame(rows, columns=['timestamp', 'page', 'stage', 'ms', 'peak_bytes', 'payload_bytes'])
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import day_numbers, iso_year_week_from_day_numbers, sort_by_date
+
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+MONTH_NAMES = [
+    'January', 'February', 'March', 'April', 'May', 'June',
+    'July', 'August', 'September', 'October', 'November', 'December'
+]
+# Two-sided 95% normal quantile used for the confidence intervals
+CONFIDENCE_Z = 1.959964
+
+
+def calendar_codes(days):
+    """
+    Integer-coded calendar fields for days since 1970-01-01.
+
+    Returns:
+        dict: Zero-based 'weekday' (Monday == 0), 'month', 'week_of_year'
+        (ISO week - 1) and 'day_of_month' codes as int64 arrays.
+    """
+    months = days.astype('datetime64[D]').astype('datetime64[M]')
+    month_start = months.astype('datetime64[D]').astype(np.int64)
+    _, iso_week = iso_year_week_from_day_numbers(days)
+    return {
+        'weekday': (days + 3) % 7,
+        'month': months.astype(np.int64) % 12,
+        'week_of_year': iso_week - 1,
+        'day_of_month': days - month_start,
+    }
+
+
+BUCKET_LABELS = {
+    'weekday': WEEKDAY_NAMES,
+    'month': MONTH_NAMES,
+    'week_of_year': [f"W{week}" for week in range(1, 54)],
+    'day_of_month': [str(day) for day in range(1, 32)],
+}
+
+
+def _bucket_stats(codes, values, labels):
+    n_buckets = len(labels)
+    count = np.bincount(codes, minlength=n_buckets)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.bincount(codes, weights=values, minlength=n_buckets) / count
+        deviations = values - mean[codes]
+        variance = np.bincount(codes, weights=deviations * deviations, minlength=n_buckets) / (count - 1)
+        half_width = CONFIDENCE_Z * np.sqrt(variance / count)
+
+    # Sorting by (bucket, value) lays every bucket out contiguously for the medians
+    sorted_values = values[np.lexsort((values, codes))]
+    starts = np.cumsum(count) - count
+    present = count > 0
+    lower_mid = np.clip(starts + (count - 1) // 2, 0, max(len(values) - 1, 0))
+    upper_mid = np.clip(starts + count // 2, 0, max(len(values) - 1, 0))
+    median = np.full(n_buckets, np.nan)
+    if len(values) > 0:
+        median[present] = (sorted_values[lower_mid[present]] + sorted_values[upper_mid[present]]) / 2
+
+    half_width = np.where(count > 1, half_width, np.nan)
+    return pd.DataFrame({
+        'mean': mean,
+        'median': median,
+        'count': count,
+        'ci_low': mean - half_width,
+        'ci_high': mean + half_width,
+    }, index=pd.Index(labels, name='bucket'))
+
+
+def compute_seasonality(dates, weights):
+    """
+    Day-to-day weight change statistics per calendar bucket.
+
+    Differences between consecutive measurements are computed once and
+    attributed to the later measurement's weekday, month, ISO week of year
+    and day of month. The inputs are not modified.
+
+    Args:
+        dates (array-like): Measurement timestamps, in any order.
+        weights (array-like): Weight for each timestamp.
+
+    Returns:
+        dict: Bucket name -> DataFrame indexed by bucket label with 'mean',
+        'median', 'count' and a 95% normal-approximation confidence interval
+        ('ci_low', 'ci_high'). Empty buckets have count 0 and NaN statistics.
+    """
+    dates, weights = sort_by_date(dates, weights)
+    diffs = np.diff(weights)
+    days = day_numbers(dates[1:])
+    valid = ~np.isnan(diffs)
+    diffs, days = diffs[valid], days[valid]
+    return {
+        name: _bucket_stats(codes, diffs, BUCKET_LABELS[name])
+        for name, codes in calendar_codes(days).items()
+    }
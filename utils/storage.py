@@ -0,0 +1,407 @@
+import os
+import pathlib
+import threading
+
+import pandas as pd
+
+from utils.validation import CsvSchema, check_user_name, read_typed_csv
+
+# 'csv' keeps the human-readable layout, 'parquet' stores typed columns via pyarrow,
+# 'sqlite' keeps every user's data in one shared workspace database
+STORAGE_BACKEND = os.environ.get('WEIGHT_TRACKER_STORAGE', 'csv')
+STORAGE_BACKENDS = ('csv', 'parquet', 'sqlite')
+WORKSPACE_DB = 'workspace.sqlite'
+
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+# Journal records replayed on top of the base file before it is rewritten
+COMPACT_EVERY = 100
+
+WEIGHT_SCHEMA = CsvSchema(
+    name='weight',
+    required=('date', 'weight'),
+    dtypes={'weight': 'float64', 'weight_diff': 'float64'},
+    date_column='date',
+    date_formats=(DATE_FORMAT, '%Y-%m-%d', '%d.%m.%Y', 'ISO8601'),
+)
+
+_ADD = 'add'
+_DELETE = 'del'
+_COMPACT = 'compact'
+# Header of a batch of records that is replayed all-or-nothing
+_TRANSACTION = 'txn'
+
+
+def _fsync_write(path, text, mode='w'):
+    with open(path, mode) as file_handle:
+        file_handle.write(text)
+        file_handle.flush()
+        os.fsync(file_handle.fileno())
+
+
+def atomic_write_text(path, text):
+    """
+    Replace path with text so readers only ever see the old or the new file.
+    """
+    path = pathlib.Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    _fsync_write(tmp_path, text)
+    os.replace(tmp_path, path)
+
+
+def _fsync_path(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CsvFormat:
+    """Base file stored in the original CSV layout."""
+    suffix = '.csv'
+
+    def read(self, path):
+        return read_typed_csv(pathlib.Path(path), WEIGHT_SCHEMA)
+
+    def write(self, df, path):
+        _fsync_write(path, df.to_csv(index=False, date_format=DATE_FORMAT))
+
+
+class ParquetFormat:
+    """Base file stored as typed, dictionary-encoded Parquet columns."""
+    suffix = '.parquet'
+
+    def read(self, path):
+        return pd.read_parquet(path)
+
+    def write(self, df, path):
+        df = df.copy()
+        df['date'] = pd.to_datetime(df['date'])
+        df['weight'] = df['weight'].astype('float64')
+        for column in df.columns:
+            if df[column].dtype == object:
+                df[column] = df[column].astype('category')
+        df.to_parquet(path, index=False)
+        _fsync_path(path)
+
+
+BASE_FORMATS = {'csv': CsvFormat(), 'parquet': ParquetFormat()}
+
+
+def _with_rows(df, rows):
+    if not rows:
+        return df
+    new_rows = pd.DataFrame(rows)
+    return new_rows if df is None else pd.concat([df, new_rows], ignore_index=True)
+
+
+class JournalStore:
+    """
+    Weight data kept as a base file plus an append-only journal.
+
+    Adding rows appends one 'add' record per row and deleting a date appends a
+    single 'del' tombstone, so edits cost O(1) instead of rewriting the whole
+    history. Edits spanning several records are framed as a transaction that
+    is replayed all-or-nothing. Every COMPACT_EVERY records the journal is folded into the base
+    file with an atomic temp-file-plus-rename write. The base file is CSV or
+    Parquet depending on base_format.
+    """
+
+    def __init__(self, base_path, compact_every=COMPACT_EVERY, base_format=None):
+        self.base_path = pathlib.Path(base_path)
+        self.base_format = base_format or BASE_FORMATS['csv']
+        self.journal_path = self.base_path.with_name(self.base_path.name + '.journal')
+        self.compact_path = self.base_path.with_name(self.base_path.name + '.compact')
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+
+    def exists(self):
+        return self.base_path.is_file() or self.journal_path.is_file()
+
+    @staticmethod
+    def _parse_record(line):
+        op, _, rest = line.partition(',')
+        date, _, weight = rest.partition(',')
+        try:
+            if op == _ADD:
+                return op, pd.Timestamp(date), float(weight)
+            if op == _DELETE:
+                return op, pd.Timestamp(date).date(), None
+            if op == _COMPACT:
+                return op, None, None
+        except ValueError:
+            pass
+        return None
+
+    def _read_journal(self):
+        """
+        Read the complete records of the journal.
+
+        Returns:
+            tuple: (records, end) where end is the byte offset just past the
+            last complete record or transaction.
+        """
+        if not self.journal_path.is_file():
+            return [], 0
+        records, end, offset = [], 0, 0
+        transaction, remaining = [], 0
+        with open(self.journal_path, 'rb') as file_handle:
+            for raw_line in file_handle:
+                offset += len(raw_line)
+                # A truncated last line is a write interrupted by a crash
+                if not raw_line.endswith(b'\n'):
+                    break
+                line = raw_line.decode(errors='replace').rstrip('\n')
+                if line.startswith(_TRANSACTION + ','):
+                    try:
+                        transaction, remaining = [], int(line.split(',')[1])
+                    except ValueError:
+                        pass
+                    continue
+                record = self._parse_record(line)
+                if record is not None:
+                    transaction.append(record)
+                if remaining > 1:
+                    remaining -= 1
+                    continue
+                # Only whole transactions are replayed
+                records.extend(transaction)
+                transaction, remaining, end = [], 0, offset
+        return records, end
+
+    def _recover(self, records):
+        # A 'compact' marker is only written once the new base is complete on
+        # disk, so finish an interrupted compaction instead of replaying twice.
+        if records and records[-1][0] == _COMPACT:
+            if self.compact_path.is_file():
+                os.replace(self.compact_path, self.base_path)
+            atomic_write_text(self.journal_path, '')
+            return []
+        if self.compact_path.is_file():
+            self.compact_path.unlink()
+        return records
+
+    def _replay(self, records):
+        df = self.base_format.read(self.base_path) if self.base_path.is_file() else None
+        pending = []
+        for op, date, weight in records:
+            if op == _ADD:
+                pending.append({'date': date, 'weight': weight})
+                continue
+            df, pending = _with_rows(df, pending), []
+            if df is not None:
+                df = df[df['date'].dt.date != date]
+        return _with_rows(df, pending)
+
+    def load(self):
+        """
+        Read the base CSV and replay the journal on top of it.
+
+        Returns:
+            pd.DataFrame or None: The current data, or None if nothing is stored.
+        """
+        with self._lock:
+            records = self._recover(self._read_journal()[0])
+            df = self._replay(records)
+        if df is not None:
+            df = df.reset_index(drop=True)
+        return df
+
+    def _drop_incomplete_records(self):
+        if not self.journal_path.is_file():
+            return
+        _, end = self._read_journal()
+        if end < self.journal_path.stat().st_size:
+            with open(self.journal_path, 'rb+') as file_handle:
+                file_handle.truncate(end)
+
+    def _append_records(self, lines):
+        # A crash mid-append can leave a truncated record or transaction; drop
+        # it so it never gets completed by the next append and replayed
+        self._drop_incomplete_records()
+        if len(lines) > 1:
+            lines = [f"{_TRANSACTION},{len(lines)},\n", *lines]
+        _fsync_write(self.journal_path, ''.join(lines), mode='a')
+        with open(self.journal_path) as file_handle:
+            n_records = sum(1 for _ in file_handle)
+        if n_records >= self.compact_every:
+            self._compact()
+
+    @staticmethod
+    def _add_lines(rows):
+        return [
+            f"{_ADD},{pd.Timestamp(date).strftime(DATE_FORMAT)},{float(weight)!r}\n"
+            for date, weight in zip(rows['date'], rows['weight'])
+        ]
+
+    @staticmethod
+    def _delete_lines(dates):
+        return [f"{_DELETE},{pd.Timestamp(date).strftime('%Y-%m-%d')},\n" for date in dates]
+
+    def append(self, rows):
+        """
+        Journal new rows.
+
+        Args:
+            rows (pd.DataFrame): Rows with 'date' and 'weight' columns.
+        """
+        with self._lock:
+            self._append_records(self._add_lines(rows))
+
+    def delete(self, dates):
+        """
+        Journal a tombstone removing every row on each of the given calendar dates.
+        """
+        with self._lock:
+            self._append_records(self._delete_lines(dates))
+
+    def commit(self, rows=None, deleted_dates=()):
+        """
+        Journal a batch of edits as one all-or-nothing transaction.
+
+        Tombstones are replayed before the new rows, so deleting a date and
+        adding rows for it in the same commit replaces that day's entries.
+
+        Args:
+            rows (pd.DataFrame, optional): Rows with 'date' and 'weight' columns.
+            deleted_dates (iterable): Calendar dates whose rows are removed.
+        """
+        lines = self._delete_lines(deleted_dates) + (self._add_lines(rows) if rows is not None else [])
+        if not lines:
+            return
+        with self._lock:
+            self._append_records(lines)
+
+    def _write_base(self, df):
+        self.base_format.write(df, self.compact_path)
+        _fsync_write(self.journal_path, f"{_COMPACT},,\n", mode='a')
+        os.replace(self.compact_path, self.base_path)
+        atomic_write_text(self.journal_path, '')
+
+    def _compact(self):
+        df = self._replay(self._recover(self._read_journal()[0]))
+        if df is not None:
+            self._write_base(df)
+
+    def compact(self):
+        """
+        Fold the journal into the base CSV.
+        """
+        with self._lock:
+            self._compact()
+
+    def write(self, df):
+        """
+        Atomically replace the stored data with df and clear the journal.
+        """
+        with self._lock:
+            self._write_base(df)
+
+
+def open_weight_store(data_dir, name, backend=None):
+    """
+    Open the weight store for data_dir/name with the configured backend.
+
+    A Parquet or SQLite store is seeded from an existing data_dir/name.csv
+    the first time it is opened, so switching backends keeps the current
+    history.
+
+    Args:
+        data_dir (Path): Directory holding the data files.
+        name (str): Dataset (user) name without extension.
+        backend (str, optional): 'csv', 'parquet' or 'sqlite'; defaults to STORAGE_BACKEND.
+
+    Returns:
+        JournalStore or UserStore: Store for the dataset.
+    """
+    backend = backend or STORAGE_BACKEND
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend {backend!r}; use one of {list(STORAGE_BACKENDS)}")
+    check_user_name(name)
+    if backend == 'sqlite':
+        # SQLAlchemy takes ~0.3 s to import; only the sqlite backend needs it
+        from utils.workspace import open_workspace
+        store = open_workspace(pathlib.Path(data_dir) / WORKSPACE_DB).for_user(name)
+    else:
+        base_format = BASE_FORMATS[backend]
+        store = JournalStore(pathlib.Path(data_dir) / f"{name}{base_format.suffix}", base_format=base_format)
+    if backend != 'csv' and not store.exists():
+        csv_store = JournalStore(pathlib.Path(data_dir) / f"{name}.csv")
+        if csv_store.exists():
+            store.write(csv_store.load())
+    return store
+
+
+# --- FitNotes exports ---
+
+FITNOTES_COLUMNS = ['Date', 'Exercise', 'Category', 'Weight', 'Weight Unit', 'Reps', 'Distance', 'Distance Unit', 'Time']
+FITNOTES_CATEGORICAL = ['Exercise', 'Category', 'Weight Unit', 'Distance Unit']
+FITNOTES_DTYPES = {
+    'Exercise': 'category',
+    'Category': 'category',
+    'Weight': 'float64',
+    'Weight Unit': 'category',
+    'Reps': 'Int32',
+    'Distance': 'float64',
+    'Distance Unit': 'category',
+    'Time': 'string',
+}
+FITNOTES_SCHEMA = CsvSchema(
+    name='fitnotes',
+    required=('Date', 'Exercise', 'Weight', 'Weight Unit', 'Reps'),
+    dtypes=FITNOTES_DTYPES,
+    date_column='Date',
+    date_formats=('%Y-%m-%d',),
+)
+
+
+def read_fitnotes_csv(file):
+    """
+    Read a FitNotes CSV export into typed columns with categorical exercise names.
+
+    Raises:
+        ValidationError: If the file does not have the export layout.
+    """
+    return read_typed_csv(file, FITNOTES_SCHEMA)
+
+
+CALORIE_SCHEMA = CsvSchema(
+    name='calories',
+    required=('date', 'calories'),
+    dtypes={'calories': 'float64'},
+    date_column='date',
+    date_formats=WEIGHT_SCHEMA.date_formats,
+)
+
+
+def read_calorie_csv(file):
+    """
+    Read a calorie log with 'date' and 'calories' columns, one row per day or per meal.
+
+    Raises:
+        ValidationError: If the file does not have the log layout.
+    """
+    return read_typed_csv(file, CALORIE_SCHEMA)
+
+
+def write_fitnotes_csv(df, path):
+    """
+    Export FitNotes data in the app's CSV export layout.
+    """
+    atomic_write_text(path, df[FITNOTES_COLUMNS].to_csv(index=False, date_format='%Y-%m-%d'))
+
+
+def read_fitnotes_parquet(path):
+    return pd.read_parquet(path).astype(FITNOTES_DTYPES)
+
+
+def write_fitnotes_parquet(df, path):
+    """
+    Store FitNotes data as Parquet with dictionary-encoded text columns.
+    """
+    path = pathlib.Path(path)
+    tmp_path = path.with_name(path.name + '.tmp')
+    df = df[FITNOTES_COLUMNS].astype(FITNOTES_DTYPES)
+    df.to_parquet(tmp_path, index=False)
+    _fsync_path(tmp_path)
+    os.replace(tmp_path, path)
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import sort_by_date
+
+# Energy stored in one kilogram of body weight change
+KCAL_PER_KG = 7700
+DEFAULT_WINDOW_DAYS = 28
+# A window needs this many weigh-ins spanning at least half its length for a trend
+MIN_WINDOW_WEIGH_INS = 4
+
+_DAY = np.timedelta64(1, 'D')
+
+
+def daily_intake(dates, calories):
+    """
+    Total calories per calendar day, for logs with one row per meal or per day.
+
+    Returns:
+        tuple: (day numbers since the epoch as int64, kcal per day as float64), sorted by day.
+    """
+    days = np.asarray(dates, dtype='datetime64[ns]').astype('datetime64[D]').view(np.int64)
+    calories = np.asarray(calories, dtype=np.float64)
+    keep = ~np.isnan(calories)
+    unique_days, inverse = np.unique(days[keep], return_inverse=True)
+    return unique_days, np.bincount(inverse, weights=calories[keep], minlength=len(unique_days))
+
+
+class AdaptiveTdee:
+    """
+    Actual energy expenditure estimated from the logged weight trend.
+
+    For each weigh-in, a least-squares slope over the weigh-ins of the
+    preceding window_days gives the energy balance (slope x KCAL_PER_KG
+    kcal/day); expenditure is the mean daily intake over the same window
+    minus that balance. The regression sums are kept as prefix sums, so any
+    window is a difference of two entries: estimates() for the whole history
+    is one vectorized pass and append() is O(1) amortized, like
+    IncrementalWeightStats. Intake is passed per call, either as a constant
+    kcal/day or as a daily log from daily_intake.
+    """
+
+    def __init__(self, window_days=DEFAULT_WINDOW_DAYS):
+        self.window_days = window_days
+        self.count = 0
+        self._window = np.timedelta64(int(window_days * 86400 * 10**9), 'ns')
+        # Regression sums use x in days since the first weigh-in and y offset by its weight
+        self._dates = np.empty(64, dtype='datetime64[ns]')
+        self._origin = None
+        self._offset = None
+        # Prefix sums of x, y, x*y and x*x; entry i covers the first i weigh-ins
+        self._prefix = np.zeros((4, 65))
+
+    @classmethod
+    def from_series(cls, dates, weights, window_days=DEFAULT_WINDOW_DAYS):
+        """
+        Build the estimator from a full series with one vectorized pass.
+        """
+        estimator = cls(window_days)
+        dates, weights = sort_by_date(dates, weights)
+        n = len(weights)
+        if n == 0:
+            return estimator
+        estimator.count = n
+        estimator._origin = dates[0]
+        estimator._offset = float(weights[0])
+        estimator._dates = np.resize(dates, max(64, 2 * n))
+        x = (dates - dates[0]) / _DAY
+        y = weights - estimator._offset
+        estimator._prefix = np.zeros((4, len(estimator._dates) + 1))
+        np.cumsum(np.stack([x, y, x * y, x * x]), axis=1, out=estimator._prefix[:, 1:n + 1])
+        return estimator
+
+    def can_append(self, date):
+        """
+        True if date keeps the series in order, so append stays exact.
+        """
+        return self.count == 0 or np.datetime64(date, 'ns') >= self._dates[self.count - 1]
+
+    def append(self, date, weight):
+        """
+        Add one weigh-in at the end of the series.
+        """
+        if not self.can_append(date):
+            raise ValueError("Out-of-order measurement; rebuild with from_series instead")
+        date = np.datetime64(date, 'ns')
+        weight = float(weight)
+        if self.count == 0:
+            self._origin, self._offset = date, weight
+        if self.count == len(self._dates):
+            self._dates = np.resize(self._dates, 2 * len(self._dates))
+            prefix = np.zeros((4, len(self._dates) + 1))
+            prefix[:, :self.count + 1] = self._prefix[:, :self.count + 1]
+            self._prefix = prefix
+        x, y = (date - self._origin) / _DAY, weight - self._offset
+        self._dates[self.count] = date
+        self._prefix[:, self.count + 1] = self._prefix[:, self.count] + (x, y, x * y, x * x)
+        self.count += 1
+
+    def _fit(self, ends):
+        """
+        Window trend ending at each weigh-in index in ends.
+
+        Returns:
+            np.ndarray: Slope in kg/day, NaN where the window has too little data.
+        """
+        dates = self._dates[:self.count]
+        starts = np.searchsorted(dates, dates[ends] - self._window, side='right')
+        n = (ends + 1 - starts).astype(np.float64)
+        sum_x, sum_y, sum_xy, sum_xx = self._prefix[:, ends + 1] - self._prefix[:, starts]
+        denominator = n * sum_xx - sum_x ** 2
+        enough = ((n >= MIN_WINDOW_WEIGH_INS) & (dates[ends] - dates[starts] >= self._window // 2)
+                  & (denominator > 1e-12 * np.maximum(1.0, n * sum_xx)))
+        slope = np.divide(n * sum_xy - sum_x * sum_y, denominator, out=np.full(len(ends), np.nan), where=enough)
+        return slope
+
+    def _window_intake(self, ends, intake):
+        if intake is None:
+            return np.full(len(ends), np.nan)
+        if np.isscalar(intake):
+            return np.full(len(ends), float(intake))
+        intake_days, kcal = intake
+        cumulative = np.concatenate(([0.0], np.cumsum(kcal)))
+        last_days = self._dates[ends].astype('datetime64[D]').view(np.int64)
+        lo = np.searchsorted(intake_days, last_days - self.window_days, side='right')
+        hi = np.searchsorted(intake_days, last_days, side='right')
+        logged = hi - lo
+        return np.divide(cumulative[hi] - cumulative[lo], logged, out=np.full(len(ends), np.nan), where=logged > 0)
+
+    def _estimate(self, ends, intake):
+        slope = self._fit(ends)
+        balance = slope * KCAL_PER_KG
+        window_intake = self._window_intake(ends, intake)
+        return pd.DataFrame({
+            'date': self._dates[ends],
+            'trend_per_week': slope * 7,
+            'energy_balance': balance,
+            'intake': window_intake,
+            'tdee': window_intake - balance,
+        })
+
+    def estimates(self, intake=None):
+        """
+        Estimates at every weigh-in.
+
+        Args:
+            intake: None, a constant kcal/day, or (days, kcal) as returned by daily_intake.
+
+        Returns:
+            pd.DataFrame: 'date', 'trend_per_week' (kg), 'energy_balance' and
+            'intake' (kcal/day) and 'tdee'; NaN where a window has too few
+            weigh-ins or no logged intake.
+        """
+        return self._estimate(np.arange(self.count), intake)
+
+    def latest(self, intake=None):
+        """
+        Estimate at the last weigh-in, in O(log n).
+
+        Returns:
+            pd.Series or None: One row of estimates(), or None without data.
+        """
+        if self.count == 0:
+            return None
+        return self._estimate(np.array([self.count - 1]), intake).iloc[0]
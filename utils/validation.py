@@ -0,0 +1,239 @@
+import io
+import json
+import re
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import pandas as pd
+
+# Layouts remembered by read_typed_csv; one per distinct export format seen
+MAX_CACHED_FORMATS = 128
+# Offending line numbers kept per issue
+MAX_REPORTED_LINES = 10
+# Date values inspected when a layout is seen for the first time
+_DATE_SAMPLE_SIZE = 50
+
+USER_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+class ValidationIssue(NamedTuple):
+    """One problem found in an uploaded file."""
+    code: str
+    message: str
+    column: str = None
+    lines: tuple = ()
+
+
+class ValidationError(ValueError):
+    """Raised when a file cannot be ingested; carries every issue found."""
+
+    def __init__(self, issues):
+        self.issues = list(issues)
+        super().__init__("\n".join(_describe(issue) for issue in self.issues))
+
+
+def _describe(issue):
+    text = issue.message
+    if issue.lines:
+        shown = ", ".join(str(line) for line in issue.lines)
+        text += f" (line {shown})" if len(issue.lines) == 1 else f" (lines {shown})"
+    return text
+
+
+class CsvSchema(NamedTuple):
+    """
+    Expected layout of a CSV file.
+
+    Attributes:
+        name (str): Schema name, part of the format cache key.
+        required (tuple): Columns that must be present.
+        dtypes (dict): Column -> dtype for the columns that may be present.
+        date_column (str): Column parsed to datetime64.
+        date_formats (tuple): strftime formats tried, in order, on a new layout.
+    """
+    name: str
+    required: tuple
+    dtypes: dict
+    date_column: str
+    date_formats: tuple
+
+
+_format_cache = OrderedDict()
+_format_cache_lock = threading.Lock()
+
+
+def _read_bytes(file):
+    if isinstance(file, bytes):
+        return file
+    if isinstance(file, str) or hasattr(file, '__fspath__'):
+        with open(file, 'rb') as file_handle:
+            return file_handle.read()
+    if hasattr(file, 'getvalue'):
+        return file.getvalue()
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    data = file.read()
+    return data.encode() if isinstance(data, str) else data
+
+
+def _layout_signature(schema, data):
+    """
+    Key identifying an export layout: the header line plus the shape of the
+    first date value, so files with the same columns but another date layout
+    do not share a cached format.
+    """
+    lines = data.split(b'\n', 2)
+    header = lines[0].strip().lstrip(b'\xef\xbb\xbf')
+    columns = [column.strip().strip(b'"').decode(errors='replace') for column in header.split(b',')]
+    date_shape = ''
+    if len(lines) > 1 and schema.date_column in columns:
+        values = lines[1].strip().split(b',')
+        position = columns.index(schema.date_column)
+        if position < len(values):
+            date_shape = re.sub(r'\d', '9', values[position].decode(errors='replace'))
+    return (schema.name, header, date_shape), columns
+
+
+def _detect_date_format(schema, values):
+    """The candidate format parsing the most sampled values, or None if none parses any."""
+    sample = values.dropna().head(_DATE_SAMPLE_SIZE)
+    best_format, best_parsed = None, 0
+    for date_format in schema.date_formats:
+        parsed = int(pd.to_datetime(sample, format=date_format, errors='coerce').notna().sum())
+        if parsed > best_parsed:
+            best_format, best_parsed = date_format, parsed
+        if parsed == len(sample):
+            break
+    return best_format
+
+
+def offending_lines(mask):
+    """
+    File line numbers (the header is line 1) of the first rows flagged in mask.
+    """
+    return tuple(int(position) + 2 for position in mask.to_numpy().nonzero()[0][:MAX_REPORTED_LINES])
+
+
+def _numeric_issues(data, schema, columns):
+    """Locate the cells that made the typed fast path fail."""
+    numeric = [column for column in columns if column in schema.dtypes
+               and pd.api.types.is_numeric_dtype(pd.Series(dtype=schema.dtypes[column]))]
+    raw = pd.read_csv(io.BytesIO(data), usecols=numeric, dtype=str)
+    issues = []
+    for column in numeric:
+        parsed = pd.to_numeric(raw[column], errors='coerce')
+        bad = parsed.isna() & raw[column].notna()
+        if bad.any():
+            issues.append(ValidationIssue('invalid_number', f"Column '{column}' has {int(bad.sum())} non-numeric values",
+                                          column, offending_lines(bad)))
+    return issues
+
+
+def read_typed_csv(file, schema):
+    """
+    Validate and parse a CSV file in a single pass with explicit dtypes.
+
+    The date format of a layout is detected once and cached per layout
+    signature, so later files of the same export layout parse dates with a
+    fixed format and skip inference entirely. A file the cached format does
+    not fit has its format detected again, which then replaces the cached one.
+
+    Args:
+        file: Path, bytes, or a file-like object such as a Streamlit upload.
+        schema (CsvSchema): Expected layout.
+
+    Returns:
+        pd.DataFrame: Parsed data with schema dtypes and a datetime64 date column.
+
+    Raises:
+        ValidationError: With one ValidationIssue per problem found.
+    """
+    data = _read_bytes(file)
+    if not data.strip():
+        raise ValidationError([ValidationIssue('empty_file', "The file is empty")])
+    signature, columns = _layout_signature(schema, data)
+    missing = [column for column in schema.required if column not in columns]
+    if missing:
+        raise ValidationError([ValidationIssue('missing_columns', f"Missing required columns: {', '.join(missing)}")])
+
+    dtypes = {column: dtype for column, dtype in schema.dtypes.items() if column in columns}
+    dtypes[schema.date_column] = str
+    try:
+        df = pd.read_csv(io.BytesIO(data), dtype=dtypes)
+    except pd.errors.ParserError as e:
+        raise ValidationError([ValidationIssue('malformed_csv', f"The file is not a valid CSV: {e}")]) from e
+    except (ValueError, TypeError) as e:
+        issues = _numeric_issues(data, schema, columns)
+        raise ValidationError(issues or [ValidationIssue('malformed_csv', f"The file is not a valid CSV: {e}")]) from e
+
+    with _format_cache_lock:
+        cached_format = _format_cache.get(signature)
+        if cached_format is not None:
+            _format_cache.move_to_end(signature)
+    values = df[schema.date_column]
+    date_format = cached_format or _detect_date_format(schema, values)
+    if date_format is None:
+        raise ValidationError([ValidationIssue('unknown_date_format',
+                                               f"Column '{schema.date_column}' has no recognised date format",
+                                               schema.date_column)])
+    dates = pd.to_datetime(values, format=date_format, errors='coerce')
+    bad = dates.isna() & values.notna()
+    if bad.any() and cached_format is not None:
+        # The format was cached from another file of this layout; detect it again on this one,
+        # sampling the rejected dates first so the new format covers them
+        detected = _detect_date_format(schema, pd.concat([values[bad].head(_DATE_SAMPLE_SIZE // 2), values[~bad]]))
+        if detected is not None and detected != cached_format:
+            redetected = pd.to_datetime(values, format=detected, errors='coerce')
+            if redetected.isna().sum() < dates.isna().sum():
+                date_format, dates = detected, redetected
+    if date_format != cached_format:
+        with _format_cache_lock:
+            _format_cache[signature] = date_format
+            _format_cache.move_to_end(signature)
+            while len(_format_cache) > MAX_CACHED_FORMATS:
+                _format_cache.popitem(last=False)
+
+    bad = dates.isna()
+    if bad.any():
+        raise ValidationError([ValidationIssue('invalid_date',
+                                               f"Column '{schema.date_column}' has {int(bad.sum())} missing or "
+                                               f"invalid dates (expected {date_format})",
+                                               schema.date_column, offending_lines(bad))])
+    df[schema.date_column] = dates
+    return df
+
+
+def cached_date_format(file, schema):
+    """
+    Date format cached for the layout of file, or None if it was never seen.
+    """
+    signature, _ = _layout_signature(schema, _read_bytes(file))
+    with _format_cache_lock:
+        return _format_cache.get(signature)
+
+
+def read_json(file):
+    """
+    Parse a JSON file in a single pass.
+
+    Raises:
+        ValidationError: With the position of the syntax error.
+    """
+    data = _read_bytes(file)
+    try:
+        return json.loads(data)
+    except UnicodeDecodeError as e:
+        raise ValidationError([ValidationIssue('invalid_json', "The file is not UTF-8 text")]) from e
+    except json.JSONDecodeError as e:
+        raise ValidationError([ValidationIssue('invalid_json', f"Invalid JSON: {e.msg} at column {e.colno}",
+                                               lines=(e.lineno,))]) from e
+
+
+def check_user_name(user):
+    """
+    Raise ValueError unless user is 1-64 letters, digits, '_' or '-'.
+    """
+    if not isinstance(user, str) or not USER_NAME_PATTERN.match(user):
+        raise ValueError(f"Invalid user name {user!r}; use 1-64 letters, digits, '_' or '-'")
+    return user
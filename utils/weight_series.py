@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_utils import as_datetime64, date_range_bounds
+
+_DAY = np.timedelta64(1, 'D')
+
+
+def _days(dates):
+    return np.asarray(dates).astype('datetime64[D]')
+
+
+class WeightSeries:
+    """
+    Weight measurements kept sorted by date in a datetime64 and a float64 array.
+
+    Lookups and range bounds are binary searches, upserts and range deletes
+    move only the tail of the arrays, and dates/weights are read-only views
+    that can be handed to the analysis functions without copying. Each
+    calendar day written through upsert holds a single measurement; series
+    built from existing data keep every row, so several weigh-ins on one day
+    stay until that day is upserted.
+
+    Arrays passed to the constructor are shared until the first edit, which
+    copies them, so the source DataFrame is never modified.
+    """
+
+    def __init__(self, dates=(), weights=()):
+        dates = as_datetime64(dates) if len(dates) > 0 else np.array([], dtype='datetime64[ns]')
+        weights = np.asarray(weights, dtype=np.float64)
+        if np.any(dates[1:] < dates[:-1]):
+            order = np.argsort(dates, kind='stable')
+            dates, weights = dates[order], weights[order]
+        self._dates = dates
+        self._weights = weights
+        self._size = len(weights)
+        self._owned = False
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(df['date'].values, df['weight'].values)
+
+    def to_frame(self):
+        """
+        Copy the series into a DataFrame with 'date' and 'weight' columns.
+        """
+        return pd.DataFrame({'date': self.dates.copy(), 'weight': self.weights.copy()})
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def dates(self):
+        view = self._dates[:self._size]
+        view.flags.writeable = False
+        return view
+
+    @property
+    def weights(self):
+        view = self._weights[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def bounds(self, start, end):
+        """
+        Positions [lo, hi) of the measurements on the calendar days [start, end].
+        """
+        return date_range_bounds(self.dates, start, end)
+
+    def slice(self, start, end):
+        """
+        Zero-copy (dates, weights) views of the calendar days [start, end].
+        """
+        lo, hi = self.bounds(start, end)
+        return self.dates[lo:hi], self.weights[lo:hi]
+
+    def lookup(self, date):
+        """
+        Weight measured on the calendar day of date (the last one if several), or None.
+        """
+        lo, hi = self.bounds(date, date)
+        return float(self._weights[hi - 1]) if hi > lo else None
+
+    def _splice(self, lo, hi, dates, weights):
+        # Replace positions [lo, hi) with the given rows, shifting the tail once
+        n_new = self._size - (hi - lo) + len(weights)
+        if not self._owned or n_new > len(self._weights):
+            capacity = max(64, 2 * n_new)
+            new_dates = np.empty(capacity, dtype='datetime64[ns]')
+            new_weights = np.empty(capacity, dtype=np.float64)
+            new_dates[:lo] = self._dates[:lo]
+            new_weights[:lo] = self._weights[:lo]
+        else:
+            new_dates, new_weights = self._dates, self._weights
+        tail = slice(lo + len(weights), n_new)
+        new_dates[tail] = self._dates[hi:self._size]
+        new_weights[tail] = self._weights[hi:self._size]
+        new_dates[lo:lo + len(weights)] = dates
+        new_weights[lo:lo + len(weights)] = weights
+        self._dates, self._weights, self._size, self._owned = new_dates, new_weights, n_new, True
+
+    def upsert(self, date, weight):
+        """
+        Insert a measurement, replacing any on the same calendar day.
+
+        Returns:
+            bool: True if an existing day was replaced.
+        """
+        date = np.datetime64(date, 'ns')
+        lo, hi = self.bounds(date, date)
+        self._splice(lo, hi, [date], [float(weight)])
+        return hi > lo
+
+    def upsert_many(self, dates, weights):
+        """
+        Upsert a batch of measurements with one pass over the arrays.
+
+        The last row wins when the batch repeats a calendar day.
+
+        Returns:
+            tuple: (dates, weights) of the upserted rows after deduplication,
+            sorted days that already had measurements and were replaced.
+        """
+        dates = as_datetime64(dates)
+        weights = np.asarray(weights, dtype=np.float64)
+        order = np.argsort(dates, kind='stable')
+        dates, weights = dates[order], weights[order]
+        days = _days(dates)
+        last_of_day = np.append(days[1:] != days[:-1], True) if len(days) > 0 else np.array([], dtype=bool)
+        dates, weights, days = dates[last_of_day], weights[last_of_day], days[last_of_day]
+
+        replaced = np.isin(_days(self.dates), days)
+        replaced_days = np.unique(_days(self.dates[replaced]))
+        kept_dates, kept_weights = self.dates[~replaced], self.weights[~replaced]
+        positions = np.searchsorted(kept_dates, dates, side='right')
+        self._dates = np.insert(kept_dates, positions, dates)
+        self._weights = np.insert(kept_weights, positions, weights)
+        self._size, self._owned = len(self._weights), True
+        return (dates, weights), replaced_days
+
+    def delete_range(self, start, end):
+        """
+        Remove every measurement on the calendar days [start, end].
+
+        Returns:
+            np.ndarray: Sorted days that had measurements removed.
+        """
+        lo, hi = self.bounds(start, end)
+        removed_days = np.unique(_days(self.dates[lo:hi]))
+        if hi > lo:
+            self._splice(lo, hi, [], [])
+        return removed_days
+
+    def delete_days(self, days):
+        """
+        Remove every measurement on the given calendar days.
+        """
+        keep = ~np.isin(_days(self.dates), _days(days))
+        if not keep.all():
+            self._dates, self._weights = self.dates[keep], self.weights[keep]
+            self._size, self._owned = len(self._weights), True
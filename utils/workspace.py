@@ -0,0 +1,177 @@
+import pathlib
+import threading
+
+import pandas as pd
+from sqlalchemy import (Column, DateTime, Float, Index, Integer, MetaData, String, Table, create_engine, delete,
+                        event, func, insert, select)
+
+from utils.validation import check_user_name
+
+# Connections kept open per server process; readers never wait on each other
+POOL_SIZE = 8
+# Seconds a writer from another process waits for the database lock
+BUSY_TIMEOUT_SECONDS = 30
+
+_metadata = MetaData()
+weights_table = Table(
+    'weights', _metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user', String(64), nullable=False),
+    Column('date', DateTime, nullable=False),
+    Column('weight', Float, nullable=False),
+    Index('ix_weights_user_date', 'user', 'date'),
+)
+
+
+def _day_bounds(dates):
+    days = pd.DatetimeIndex(pd.to_datetime(list(dates))).normalize().unique()
+    return [(day.to_pydatetime(), (day + pd.Timedelta(days=1)).to_pydatetime()) for day in days]
+
+
+class WorkspaceStore:
+    """
+    Per-user weight datasets in one SQLite database.
+
+    Connections come from a SQLAlchemy pool and run in WAL mode, so any
+    number of sessions read concurrently while one writes. Writes are
+    serialized by an in-process lock plus BEGIN IMMEDIATE, which also orders
+    writers from other server processes. Rows are indexed on (user, date),
+    so loading one user's data or deleting a day never scans other users.
+    """
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self.engine = create_engine(
+            f"sqlite:///{self.path.as_posix()}",
+            pool_size=POOL_SIZE,
+            max_overflow=POOL_SIZE,
+            connect_args={'check_same_thread': False, 'timeout': BUSY_TIMEOUT_SECONDS},
+        )
+        event.listen(self.engine, 'connect', self._on_connect)
+        event.listen(self.engine, 'begin', self._on_begin)
+        self._write_lock = threading.Lock()
+        _metadata.create_all(self.engine)
+
+    @staticmethod
+    def _on_connect(dbapi_connection, _):
+        # Let SQLAlchemy emit BEGIN itself so writers can ask for IMMEDIATE
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+
+    @staticmethod
+    def _on_begin(connection):
+        connection.exec_driver_sql(connection.get_execution_options().get('sqlite_begin', 'BEGIN'))
+
+    def _write(self, statements):
+        # statements: (statement, parameters) pairs; an executemany with no rows is skipped
+        with self._write_lock, self.engine.connect().execution_options(sqlite_begin='BEGIN IMMEDIATE') as conn:
+            with conn.begin():
+                for statement, parameters in statements:
+                    if parameters is None or len(parameters) > 0:
+                        conn.execute(statement, parameters)
+
+    def users(self):
+        with self.engine.connect() as conn:
+            return [row.user for row in conn.execute(select(weights_table.c.user).distinct().order_by('user'))]
+
+    def count(self, user):
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).where(weights_table.c.user == user)).scalar_one()
+
+    def load(self, user):
+        """
+        Read one user's dataset.
+
+        Returns:
+            pd.DataFrame or None: 'date' and 'weight' sorted by date, or None if the user has no data.
+        """
+        query = (select(weights_table.c.date, weights_table.c.weight)
+                 .where(weights_table.c.user == user)
+                 .order_by(weights_table.c.date, weights_table.c.id))
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).all()
+        if not rows:
+            return None
+        dates, weights = zip(*rows)
+        return pd.DataFrame({'date': pd.to_datetime(list(dates)), 'weight': list(weights)})
+
+    @staticmethod
+    def _insert(user, rows):
+        parameters = [
+            {'user': user, 'date': pd.Timestamp(date).to_pydatetime(), 'weight': float(weight)}
+            for date, weight in zip(rows['date'], rows['weight'])
+        ] if rows is not None else []
+        return insert(weights_table), parameters
+
+    def commit(self, user, rows=None, deleted_dates=()):
+        """
+        Delete the given calendar days and insert rows in one transaction.
+        """
+        statements = [
+            (delete(weights_table).where(weights_table.c.user == user, weights_table.c.date >= start,
+                                         weights_table.c.date < end), None)
+            for start, end in _day_bounds(deleted_dates)
+        ]
+        statements.append(self._insert(user, rows))
+        self._write(statements)
+
+    def append(self, user, rows):
+        self.commit(user, rows)
+
+    def delete(self, user, dates):
+        self.commit(user, deleted_dates=dates)
+
+    def write(self, user, df):
+        """
+        Replace one user's dataset with df.
+        """
+        self._write([(delete(weights_table).where(weights_table.c.user == user), None), self._insert(user, df)])
+
+    def for_user(self, user):
+        return UserStore(self, check_user_name(user))
+
+
+class UserStore:
+    """
+    One user's dataset in a WorkspaceStore, with the JournalStore interface.
+    """
+
+    def __init__(self, workspace, user):
+        self.workspace = workspace
+        self.user = user
+
+    def exists(self):
+        return self.workspace.count(self.user) > 0
+
+    def load(self):
+        return self.workspace.load(self.user)
+
+    def append(self, rows):
+        self.workspace.append(self.user, rows)
+
+    def delete(self, dates):
+        self.workspace.delete(self.user, dates)
+
+    def commit(self, rows=None, deleted_dates=()):
+        self.workspace.commit(self.user, rows, deleted_dates)
+
+    def write(self, df):
+        self.workspace.write(self.user, df)
+
+
+_workspaces = {}
+_workspaces_lock = threading.Lock()
+
+
+def open_workspace(path):
+    """
+    Shared WorkspaceStore for path, so every session of the server uses one connection pool.
+    """
+    path = pathlib.Path(path).resolve()
+    with _workspaces_lock:
+        if path not in _workspaces:
+            _workspaces[path] = WorkspaceStore(path)
+        return _workspaces[path]